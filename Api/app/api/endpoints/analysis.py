@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from app.core.http_cache import REVALIDATE, etag_matches, make_etag, not_modified, set_cache_headers
 from app.schemas.analysis import AnalysisRequest, AnalysisResponse
 from app.services.analysis_service import AnalysisService
 
 router = APIRouter()
 
+# Each endpoint derives a weak ETag from the dataset fingerprint and its
+# parameters; a matching If-None-Match is answered with 304 before any computation.
+
 @router.get("/preview/{file_id}")
 def get_data_preview(
     file_id: str,
+    request: Request,
+    response: Response,
     service: AnalysisService = Depends()
 ):
     try:
-        return service.get_data_preview(file_id)
+        etag = make_etag(service.file_service.dataset_fingerprint(file_id), "preview")
+        if etag_matches(request, etag):
+            return not_modified(etag, REVALIDATE)
+        result = service.get_data_preview(file_id)
+        set_cache_headers(response, etag, REVALIDATE)
+        return result
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -19,6 +30,8 @@ def get_data_preview(
 @router.get("/visualize/{file_id}")
 def get_visualization_data(
     file_id: str,
+    request: Request,
+    response: Response,
     col1: str = Query(..., description="The primary column to analyze."),
     col2: str = Query(None, description="The secondary column for comparison (e.g., scatter plot)."),
     service: AnalysisService = Depends()
@@ -29,7 +42,12 @@ def get_visualization_data(
     - If two numeric columns are provided, it also returns data for a scatter plot.
     """
     try:
-        return service.get_visualization_data(file_id, col1, col2)
+        etag = make_etag(service.file_service.dataset_fingerprint(file_id), "visualize", col1, col2)
+        if etag_matches(request, etag):
+            return not_modified(etag, REVALIDATE)
+        result = service.get_visualization_data(file_id, col1, col2)
+        set_cache_headers(response, etag, REVALIDATE)
+        return result
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
@@ -41,13 +59,44 @@ def get_visualization_data(
 @router.get("/eda/{file_id}", response_model=AnalysisResponse)
 def generate_eda(
     file_id: str,
+    request: Request,
+    response: Response,
     target_column: str = Query(None, description="The column to be used as the prediction target."),
     service: AnalysisService = Depends()
 ):
     try:
+        etag = make_etag(service.file_service.dataset_fingerprint(file_id), "eda", target_column)
+        if etag_matches(request, etag):
+            return not_modified(etag, REVALIDATE)
         # Pass the target_column to the service
-        return service.generate_eda_report(file_id, target_column)
+        result = service.generate_eda_report(file_id, target_column)
+        set_cache_headers(response, etag, REVALIDATE)
+        return result
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/correlations/{file_id}")
+def get_correlations(
+    file_id: str,
+    request: Request,
+    response: Response,
+    service: AnalysisService = Depends()
+):
+    """
+    Strongest Pearson/Spearman correlations and categorical associations, plus a
+    heatmap matrix. Cached per dataset, so only the first call computes anything.
+    """
+    try:
+        etag = make_etag(service.file_service.dataset_fingerprint(file_id), "correlations")
+        if etag_matches(request, etag):
+            return not_modified(etag, REVALIDATE)
+        result = service.get_correlations(file_id)
+        set_cache_headers(response, etag, REVALIDATE)
+        return result
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,14 +1,37 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from fastapi.responses import FileResponse
-from app.schemas.model import TrainingRequest, StatusResponse, TaskResponse, PredictionRequest
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+from app.schemas.model import TrainingRequest, StatusResponse, TaskResponse, PredictionRequest, BatchPredictionRequest, LeaderboardResponse
 from app.services.model_service import ModelService
+from app.services.prediction_service import PredictionService, OUTPUT_MEDIA_TYPES, batch_output_key, model_key, prediction_batcher
+from app.services.storage_backend import get_storage_backend
 from app.core.config import settings
-import os
+from app.core.http_cache import IMMUTABLE, NO_STORE, etag_matches, make_etag, not_modified, set_cache_headers
+from app.services.cpu_governor import cpu_governor
+from app.pipelines.inference_profile import LATENCY_METRICS
+from app.services.storage_lifecycle import storage_lifecycle
 
 router = APIRouter()
 
+
+async def _object_response(key: str, filename: str, media_type: str):
+    """
+    Serves a stored object without blocking the event loop: local files through
+    FileResponse, remote objects streamed in ranged chunks. None if it does not exist.
+    """
+    backend = get_storage_backend()
+    if not await backend.exists(key):
+        return None
+    if backend.is_local:
+        return FileResponse(path=backend.local_path(key), filename=filename, media_type=media_type)
+    return StreamingResponse(
+        backend.iter_read(key), media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.post("/train", response_model=TaskResponse)
-async def train_model(
+def train_model(
     request: TrainingRequest,
     background_tasks: BackgroundTasks,
     model_service: ModelService = Depends()
@@ -29,27 +52,69 @@ async def train_model(
 @router.get("/status/{task_id}", response_model=StatusResponse)
 async def get_training_status(
     task_id: str,
+    request: Request,
+    response: Response,
     model_service: ModelService = Depends()
 ):
     """
     Retrieves the status and results of a specific training job.
+    Finished tasks never change, so their responses are cacheable and revalidated
+    with an ETag; queued and running tasks are not cached.
     """
-    status = model_service.get_job_status(task_id)
+    status = await model_service.get_job_status(task_id)
     if not status:
         raise HTTPException(status_code=404, detail="Task ID not found.")
+    if status.get("status") not in ("completed", "failed"):
+        set_cache_headers(response, None, NO_STORE)
+        return status
+    etag = make_etag("status", status)
+    if etag_matches(request, etag):
+        return not_modified(etag, IMMUTABLE)
+    set_cache_headers(response, etag, IMMUTABLE)
     return status
 
 
+@router.get("/leaderboard/{task_id}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    task_id: str,
+    latency: str = Query("single_row_p99_ms", description=f"One of {', '.join(LATENCY_METRICS)}"),
+    min_accuracy: float = Query(None, ge=0.0, le=1.0),
+    model_service: ModelService = Depends()
+):
+    """
+    Accuracy-vs-latency Pareto front across the models of a completed training job,
+    with the cheapest model that meets `min_accuracy` as the recommendation.
+    """
+    if latency not in LATENCY_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown latency metric '{latency}'. Use one of {LATENCY_METRICS}.")
+    leaderboard = await model_service.get_leaderboard(task_id, latency, min_accuracy)
+    if leaderboard is None:
+        raise HTTPException(status_code=404, detail="No completed training results for this task.")
+    return leaderboard
+
+
+@router.get("/cpu")
+def cpu_budget():
+    """
+    Cores leased by running training jobs across all workers. Each job's actual
+    usage against its budget is reported in its results (details.cpu_budget).
+    """
+    return cpu_governor.snapshot()
+
+
 @router.get("/download/{model_id}")
 async def download_model(model_id: str):
     """
     Allows downloading of a trained model file.
     """
     try:
-        model_path = settings.MODELS_DIR / f"{model_id}.joblib"
-        if not os.path.exists(model_path):
+        response = await _object_response(model_key(model_id), f"{model_id}.joblib", 'application/octet-stream')
+        if response is None:
             raise HTTPException(status_code=404, detail="Model file not found.")
-        return FileResponse(path=model_path, filename=f"{model_id}.joblib", media_type='application/octet-stream')
+        await run_in_threadpool(storage_lifecycle.touch, "models", model_id)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -57,16 +122,92 @@ async def download_model(model_id: str):
 @router.post("/predict")
 async def predict(
     request: PredictionRequest,
-    service: ModelService = Depends()
+    service: PredictionService = Depends()
 ):
     """
     Makes a prediction using a trained model.
     """
     try:
-        prediction = service.predict(request)
+        prediction = await service.predict(request)
         return {"prediction": prediction}
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/predict/metrics")
+async def prediction_batching_metrics():
+    """
+    Micro-batching statistics for /predict in this worker: batch sizes, queue wait
+    and predict time percentiles. Use them to tune PREDICT_BATCH_WINDOW_MS.
+    """
+    return prediction_batcher.metrics()
+
+
+@router.post("/predict/batch")
+def predict_batch(
+    request: BatchPredictionRequest,
+    background_tasks: BackgroundTasks,
+    service: PredictionService = Depends()
+):
+    """
+    Scores every row of an uploaded file in fixed-size chunks.
+    - delivery="stream": predictions are streamed back as CSV or NDJSON.
+    - delivery="file": a result file is written in the background; poll /status/{task_id}
+      and fetch it from /predict/batch/{task_id}/download.
+    """
+    try:
+        if request.delivery == "file":
+            task_id = service.start_batch_job(request, background_tasks)
+            return TaskResponse(task_id=task_id, status="queued")
+        # Validate up front so errors are returned before the stream starts
+        service.file_service.ensure_exists(request.file_id)
+        return StreamingResponse(
+            service.iter_file_predictions(request),
+            media_type=OUTPUT_MEDIA_TYPES[request.output_format]
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/predict/batch/upload")
+def predict_batch_upload(
+    file: UploadFile = File(..., description="CSV file with the rows to score."),
+    model_id: str = Form(...),
+    chunk_size: int = Form(10000, ge=1, le=1_000_000),
+    output_format: str = Form("csv", pattern="^(csv|ndjson)$"),
+    service: PredictionService = Depends()
+):
+    """
+    Scores a CSV sent with the request, reading and answering it chunk by chunk.
+    """
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Streaming batch prediction accepts CSV files only.")
+    try:
+        chunks = pd.read_csv(file.file, chunksize=chunk_size)
+        return StreamingResponse(
+            service.iter_predictions(model_id, chunks, output_format),
+            media_type=OUTPUT_MEDIA_TYPES[output_format]
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ValueError, pd.errors.ParserError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read the CSV: {e}")
+
+
+@router.get("/predict/batch/{task_id}/download")
+async def download_batch_predictions(task_id: str, model_service: ModelService = Depends()):
+    """
+    Downloads the result file of a completed batch prediction task.
+    """
+    status = await model_service.get_job_status(task_id)
+    if status.get("status") != "completed" or not status.get("output_file"):
+        raise HTTPException(status_code=404, detail="No finished batch prediction for this task.")
+    output_format = status["output_file"].rsplit(".", 1)[-1]
+    response = await _object_response(
+        batch_output_key(task_id, output_format), status["output_file"], OUTPUT_MEDIA_TYPES[output_format]
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="Batch prediction output not found.")
+    return response
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.services.storage_lifecycle import storage_lifecycle, CATEGORY_PRIORITY
+
+router = APIRouter()
+
+@router.get("/usage")
+async def storage_usage():
+    """
+    Disk usage per storage category (uploads, caches, models, reports, task_status)
+    against the configured quota.
+    """
+    return await run_in_threadpool(storage_lifecycle.usage)
+
+
+@router.post("/compact")
+async def compact_storage():
+    """
+    Runs an eviction pass now: expired entries first, then least recently used
+    entries if usage is above the quota. Pinned entries and active tasks are kept.
+    """
+    return await run_in_threadpool(storage_lifecycle.compact)
+
+
+@router.put("/pins/{category}/{key}")
+def pin_entry(category: str, key: str):
+    """
+    Protects an entry (e.g. a model serving predictions) from eviction until unpinned.
+    """
+    if category not in CATEGORY_PRIORITY:
+        raise HTTPException(status_code=400, detail=f"Unknown storage category: {category}")
+    if not storage_lifecycle.has_entry(category, key):
+        raise HTTPException(status_code=404, detail=f"No {category} entry with key {key}")
+    storage_lifecycle.pin(category, key, persistent=True)
+    return {"category": category, "key": key, "pinned": True}
+
+
+@router.delete("/pins/{category}/{key}")
+def unpin_entry(category: str, key: str):
+    if category not in CATEGORY_PRIORITY:
+        raise HTTPException(status_code=400, detail=f"Unknown storage category: {category}")
+    storage_lifecycle.unpin_persistent(category, key)
+    return {"category": category, "key": key, "pinned": False}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, File, UploadFile, HTTPException, Depends
 from app.services.file_service import FileService
 from app.schemas.upload import UploadResponse
 
@@ -6,11 +6,13 @@ router = APIRouter()
 
 @router.post("", response_model=UploadResponse)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="The dataset file to upload. Must be .xlsx, .xls, or .csv format."),
     file_service: FileService = Depends()
 ):
     """
     Accepts an Excel (.xlsx, .xls) or CSV (.csv) file upload.
+    The file is converted to a columnar store in the background for fast re-reads.
     """
     if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
         raise HTTPException(
@@ -19,7 +21,7 @@ async def upload_file(
         )
 
     try:
-        summary = await file_service.save_and_summarize_file(file)
+        summary = await file_service.save_and_summarize_file(file, background_tasks)
         return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
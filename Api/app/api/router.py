@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import upload, analysis, model, auth # Import the new auth module
+from app.api.endpoints import upload, analysis, model, auth, storage # Import the new auth module
 
 # Create the main API router that will be included in the FastAPI app instance
 api_router = APIRouter()
@@ -13,3 +13,4 @@ api_router.include_router(auth.router, prefix="/auth", tags=["0. Authentication
 api_router.include_router(upload.router, prefix="/upload", tags=["1. File Upload"])
 api_router.include_router(analysis.router, prefix="/analysis", tags=["2. Data Analysis"])
 api_router.include_router(model.router, prefix="/model", tags=["3. Model Training & Prediction"])
+api_router.include_router(storage.router, prefix="/storage", tags=["4. Storage"])
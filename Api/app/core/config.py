@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Dict, List, Literal, Optional
 from pathlib import Path
 
 # Base directory of the project
@@ -44,10 +44,69 @@ class Settings(BaseSettings):
     def TASK_STATUS_DIR(self) -> Path:
         return self.STORAGE_DIR / "task_status"
 
+    # --- STORAGE BACKEND ---
+    # "local" keeps everything in STORAGE_DIR. "s3" stores uploads, models, task
+    # records and reports in an S3-compatible bucket (AWS S3, Cloudflare R2, MinIO)
+    # and uses STORAGE_DIR as a local working cache.
+    STORAGE_BACKEND: Literal["local", "s3"] = "local"
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. https://<account_id>.r2.cloudflarestorage.com
+    S3_BUCKET: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_REGION: str = "auto"
+    S3_MAX_CONNECTIONS: int = 20
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+
+    # --- HTTP RESPONSES ---
+    # Responses larger than this many bytes are gzip-compressed when the client accepts it.
+    GZIP_MINIMUM_SIZE: int = 1024
+
+    # --- STORAGE LIFECYCLE ---
+    # render.yaml mounts a 1 GB disk; evict before it fills up.
+    STORAGE_QUOTA_BYTES: int = 900 * 1024 * 1024
+    # When over quota, evict least recently used entries down to this fraction of it.
+    STORAGE_LOW_WATERMARK: float = 0.8
+    # Entries not accessed for this many hours are evicted regardless of usage.
+    STORAGE_TTL_HOURS: Dict[str, float] = {
+        "caches": 24, "reports": 168, "uploads": 168, "task_status": 720, "models": 720,
+    }
+    STORAGE_COMPACTION_INTERVAL_MINUTES: float = 30
+
+    # --- SHARED DATASET CACHE ---
+    # Loaded datasets are shared by all worker processes through this RAM-backed
+    # directory (defaults to /dev/shm/automl-datasets). Set the size to 0 to disable.
+    SHARED_DATASET_CACHE_DIR: Optional[Path] = None
+    SHARED_DATASET_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
     # --- MODEL & TRAINING CONFIGURATIONS ---
     SUPPORTED_MODELS: List[str] = ["random_forest", "xgboost", "lightgbm", "catboost", "logistic_regression"]
     DEFAULT_TEST_SIZE: float = 0.2
 
+    # --- CPU BUDGET ---
+    # Cores shared by training jobs across all workers (defaults to every core).
+    CPU_TOTAL_CORES: Optional[int] = None
+    # Upper bound for a single job, so concurrent jobs each get a share.
+    CPU_MAX_CORES_PER_JOB: Optional[int] = None
+    # How long a job waits for free cores before running on a single core.
+    CPU_LEASE_WAIT_SECONDS: float = 30
+
+    # --- BATCH PREDICTION ---
+    # Threads scoring chunks in parallel; defaults to the number of CPU cores.
+    BATCH_PREDICTION_WORKERS: Optional[int] = None
+
+    # --- ONLINE PREDICTION MICRO-BATCHING ---
+    # Concurrent /predict calls for the same model are held for up to this many
+    # milliseconds and scored together (0 disables batching).
+    PREDICT_BATCH_WINDOW_MS: float = 5.0
+    # A batch is flushed early once it holds this many rows.
+    PREDICT_MAX_BATCH_ROWS: int = 256
+
+    # --- WORKER STARTUP ---
+    # When true, gunicorn imports the heavy ML libraries once in the master process
+    # so all forked workers share those pages copy-on-write (see gunicorn.conf.py).
+    # When false, each library is imported lazily the first time a model needs it.
+    PRELOAD_ML_LIBRARIES: bool = False
+
     model_config = SettingsConfigDict(
         env_file='.env',
         env_file_encoding='utf-8',
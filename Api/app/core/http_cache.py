@@ -0,0 +1,47 @@
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Bump when the shape or content of cached analysis responses changes, so clients
+# holding ETags from an older release revalidate instead of getting a 304.
+ANALYSIS_CACHE_VERSION = "2"
+
+# Analysis results for a dataset never change, but clients must revalidate so a
+# re-uploaded or evicted dataset is noticed; the 304 makes that cheap.
+REVALIDATE = "private, no-cache"
+# Completed and failed tasks are final.
+IMMUTABLE = "private, max-age=86400, immutable"
+NO_STORE = "no-store"
+
+
+def make_etag(*parts) -> str:
+    """
+    Weak ETag over the given parts (dataset fingerprint, endpoint, parameters). Weak
+    because GZipMiddleware serves the same content gzip- or identity-encoded, and a
+    strong ETag would promise byte-identical bodies.
+    """
+    payload = json.dumps([ANALYSIS_CACHE_VERSION, *parts], sort_keys=True, default=str)
+    return 'W/"' + hashlib.sha256(payload.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in candidates or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"})
+
+
+def set_cache_headers(response: Response, etag: Optional[str], cache_control: str):
+    if etag:
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    # The body may be gzip- or identity-encoded (GZipMiddleware only marks the former)
+    response.headers["Vary"] = "Accept-Encoding"
@@ -0,0 +1,12 @@
+import os
+
+
+def pid_alive(pid: int) -> bool:
+    """True while a process with this pid exists (marker files owned by dead workers are stale)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -1,7 +1,15 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.gzip import GZipMiddleware
 from app.api.router import api_router
 from app.core.config import settings
+from app.services.file_service import FileService
+from app.services.model_service import ModelService
+from app.services.storage_backend import get_storage_backend
+from app.services.storage_lifecycle import run_periodic_compaction
 import os
 import uvicorn
 
@@ -12,9 +20,30 @@ os.makedirs(settings.MODELS_DIR, exist_ok=True)
 os.makedirs(settings.TASK_STATUS_DIR, exist_ok=True)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Periodic TTL/LRU eviction keeps the storage disk under its quota
+    compaction = asyncio.create_task(run_periodic_compaction())
+    # Training jobs interrupted by a crash or redeploy resume with their unfinished
+    # models. A job still running at shutdown is resumed by the next start.
+    model_service = ModelService(FileService())
+    resumed = [
+        asyncio.create_task(run_in_threadpool(model_service._run_training_in_background, *job))
+        for job in await run_in_threadpool(model_service.resume_interrupted_jobs)
+    ]
+    yield
+    compaction.cancel()
+    # Stops waiting on resumed jobs; their threads end with the process and the
+    # jobs, still checkpointed, are picked up again by the next start
+    for task in resumed:
+        task.cancel()
+    await get_storage_backend().close()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS (Cross-Origin Resource Sharing)
@@ -26,6 +55,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON payloads (EDA reports, previews, batch predictions)
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
 # Include the main API router
 app.include_router(api_router, prefix="/api")
 
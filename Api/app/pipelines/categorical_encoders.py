@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils import murmurhash3_32
+from sklearn.utils.validation import check_is_fitted
+
+# Encodings a categorical column can get. One-hot width grows with the number of
+# categories; the other three stay bounded whatever the category count:
+#   target    - out-of-fold mean target per category (one column, or one per class)
+#   frequency - share of training rows with that category (one column)
+#   hashing   - signed one-hot over a fixed number of hash buckets
+CATEGORICAL_ENCODINGS = ["onehot", "target", "frequency", "hashing"]
+
+
+def choose_categorical_encodings(cardinality: dict, config) -> dict:
+    """
+    Picks an encoding per categorical column. With `categorical_encoding="auto"`,
+    columns with more distinct values than `high_cardinality_threshold` get
+    `high_cardinality_encoding` and the rest are one-hot encoded; any other value
+    applies to every column.
+    """
+    if config.categorical_encoding != "auto":
+        return {column: config.categorical_encoding for column in cardinality}
+    return {
+        column: config.high_cardinality_encoding if n_unique > config.high_cardinality_threshold else "onehot"
+        for column, n_unique in cardinality.items()
+    }
+
+
+def _as_frame(X) -> pd.DataFrame:
+    return X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+
+
+class FrequencyEncoder(TransformerMixin, BaseEstimator):
+    """Replaces each category with its share of the training rows; unseen categories get 0."""
+
+    def fit(self, X, y=None):
+        X = _as_frame(X)
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.frequencies_ = [X[column].astype(str).value_counts(normalize=True) for column in X.columns]
+        return self
+
+    def transform(self, X):
+        check_is_fitted(self, "frequencies_")
+        X = _as_frame(X)
+        encoded = np.empty((len(X), len(self.frequencies_)), dtype=np.float64)
+        for i, (column, frequencies) in enumerate(zip(X.columns, self.frequencies_)):
+            encoded[:, i] = X[column].astype(str).map(frequencies).fillna(0.0).to_numpy(dtype=np.float64)
+        return encoded
+
+    def get_feature_names_out(self, input_features=None):
+        check_is_fitted(self, "frequencies_")
+        return np.asarray([f"{column}_freq" for column in self.feature_names_in_], dtype=object)
+
+
+class HashingEncoder(TransformerMixin, BaseEstimator):
+    """
+    Hashes each category into one of `n_buckets` columns per feature (signed, so
+    collisions tend to cancel out instead of adding up). Stateless apart from the
+    column names: unseen categories simply land in some bucket.
+    """
+
+    def __init__(self, n_buckets: int = 32):
+        self.n_buckets = n_buckets
+
+    def fit(self, X, y=None):
+        self.feature_names_in_ = np.asarray(_as_frame(X).columns, dtype=object)
+        return self
+
+    def transform(self, X):
+        check_is_fitted(self, "feature_names_in_")
+        X = _as_frame(X)
+        encoded = np.zeros((len(X), len(X.columns) * self.n_buckets), dtype=np.float64)
+        rows = np.arange(len(X))
+        for i, column in enumerate(X.columns):
+            # Hash each distinct value once rather than every row
+            codes, uniques = pd.factorize(X[column].astype(str))
+            hashes = np.array([murmurhash3_32(f"{column}={value}", seed=0) for value in uniques], dtype=np.int64)
+            buckets = np.abs(hashes) % self.n_buckets
+            signs = np.where(hashes >= 0, 1.0, -1.0)
+            encoded[rows, i * self.n_buckets + buckets[codes]] = signs[codes]
+        return encoded
+
+    def get_feature_names_out(self, input_features=None):
+        check_is_fitted(self, "feature_names_in_")
+        return np.asarray(
+            [f"{column}_hash{b}" for column in self.feature_names_in_ for b in range(self.n_buckets)], dtype=object
+        )
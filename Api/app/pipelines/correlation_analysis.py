@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+# Correlation overview of a dataset for the EDA report. Everything here is sized
+# for wide data: rows are sampled, columns are processed in blocks, and only the
+# strongest pairs (plus a small heatmap) are returned, never a full n x n matrix.
+SAMPLE_ROWS = 20_000
+# Wide datasets get fewer sampled rows so the sample stays around this many
+# cells (float32: ~40 MB), but never fewer than MIN_SAMPLE_ROWS rows.
+MAX_SAMPLE_CELLS = 10_000_000
+MIN_SAMPLE_ROWS = 1_000
+BLOCK_SIZE = 256
+TOP_K_PAIRS = 50
+# The heatmap covers every column up to this many, otherwise the columns that
+# take part in the strongest pairs.
+HEATMAP_MAX_COLUMNS = 30
+# Categorical association (Cramér's V) is computed for columns with at most this
+# many distinct values, and for at most this many columns.
+ASSOCIATION_MAX_LEVELS = 50
+ASSOCIATION_MAX_COLUMNS = 200
+
+
+def _sample(df: pd.DataFrame, sample_rows: int) -> pd.DataFrame:
+    sample_rows = min(sample_rows, max(MIN_SAMPLE_ROWS, MAX_SAMPLE_CELLS // max(1, df.shape[1])))
+    return df.sample(n=sample_rows, random_state=42) if len(df) > sample_rows else df
+
+
+def _standardize(df: pd.DataFrame, method: str, block_size: int) -> tuple:
+    """
+    Columns ranked for Spearman, standardized and stored as float32, one block of
+    columns at a time; missing values become 0 (the mean). Constant columns are
+    dropped. Returns (Z, column names).
+    """
+    Z = np.empty(df.shape, dtype=np.float32)
+    keep = np.zeros(df.shape[1], dtype=bool)
+    for start in range(0, df.shape[1], block_size):
+        block = df.iloc[:, start:start + block_size]
+        if method == "spearman":
+            block = block.rank()
+        X = block.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            means = np.nanmean(X, axis=0) if len(X) else np.zeros(X.shape[1])
+            stds = np.nanstd(X, axis=0) if len(X) else np.zeros(X.shape[1])
+        keep[start:start + X.shape[1]] = stds > 0
+        stds[~(stds > 0)] = 1.0
+        X = (X - means) / stds
+        X[np.isnan(X)] = 0.0
+        Z[:, start:start + X.shape[1]] = X
+    return Z[:, keep], [column for column, kept in zip(df.columns, keep) if kept]
+
+
+def _merge_top_k(top: tuple, rows: np.ndarray, cols: np.ndarray, values: np.ndarray, k: int) -> tuple:
+    rows, cols, values = (np.concatenate([a, b]) for a, b in zip(top, (rows, cols, values)))
+    if len(values) > k:
+        keep = np.argpartition(-np.abs(values), k - 1)[:k]
+        rows, cols, values = rows[keep], cols[keep], values[keep]
+    return rows, cols, values
+
+
+def correlation_overview(df: pd.DataFrame, method: str = "pearson", top_k: int = TOP_K_PAIRS,
+                         block_size: int = BLOCK_SIZE, heatmap_max_columns: int = HEATMAP_MAX_COLUMNS) -> dict:
+    """
+    Pearson or Spearman correlations between the numeric columns of `df` (already
+    sampled), computed block by block over the standardized float32 sample: on top
+    of the sample, memory stays at O(block_size ** 2 + top_k) whatever the column
+    count.
+
+    Returns the `top_k` pairs with the largest |r| and a heatmap matrix over at most
+    `heatmap_max_columns` columns.
+    """
+    Z, columns = _standardize(df, method, block_size)
+    n_rows, n_cols = Z.shape
+    result = {"method": method, "n_columns": n_cols, "top_pairs": [], "heatmap": None}
+    if n_rows < 2 or n_cols < 2:
+        return result
+
+    empty = np.empty(0, dtype=np.int64)
+    top = (empty, empty, np.empty(0, dtype=np.float64))
+    for start_i in range(0, n_cols, block_size):
+        block_i = Z[:, start_i:start_i + block_size]
+        for start_j in range(start_i, n_cols, block_size):
+            corr = (block_i.T @ Z[:, start_j:start_j + block_size]).astype(np.float64) / n_rows
+            pairs = np.ones(corr.shape, dtype=bool)
+            if start_j == start_i:
+                pairs = np.triu(pairs, k=1)  # within a diagonal block only pairs above the diagonal
+            rows, cols = np.nonzero(pairs)
+            top = _merge_top_k(top, rows + start_i, cols + start_j, corr[rows, cols], top_k)
+
+    order = np.argsort(-np.abs(top[2]))
+    result["top_pairs"] = [
+        {"column_1": columns[top[0][o]], "column_2": columns[top[1][o]], "value": round(float(np.clip(top[2][o], -1, 1)), 4)}
+        for o in order
+    ]
+
+    if n_cols <= heatmap_max_columns:
+        heatmap_columns = columns
+    else:
+        involved = dict.fromkeys(name for pair in result["top_pairs"] for name in (pair["column_1"], pair["column_2"]))
+        heatmap_columns = list(involved)[:heatmap_max_columns]
+    index = [columns.index(name) for name in heatmap_columns]
+    matrix = np.clip(Z[:, index].T.astype(np.float64) @ Z[:, index] / n_rows, -1, 1)
+    result["heatmap"] = {"columns": heatmap_columns, "matrix": np.round(matrix, 4).tolist()}
+    return result
+
+
+def _cramers_v(codes_a: np.ndarray, n_a: int, codes_b: np.ndarray, n_b: int) -> float:
+    """Bias-corrected Cramér's V from two integer-coded columns (rows with a missing value dropped)."""
+    mask = (codes_a >= 0) & (codes_b >= 0)
+    n = int(mask.sum())
+    if n < 2:
+        return None
+    table = np.bincount(codes_a[mask] * n_b + codes_b[mask], minlength=n_a * n_b).reshape(n_a, n_b).astype(np.float64)
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    r, k = table.shape
+    if r < 2 or k < 2:
+        return None
+    expected = table.sum(axis=1, keepdims=True) * table.sum(axis=0, keepdims=True) / n
+    phi2 = ((table - expected) ** 2 / expected).sum() / n
+    phi2_corrected = max(0.0, phi2 - (k - 1) * (r - 1) / (n - 1))
+    r_corrected = r - (r - 1) ** 2 / (n - 1)
+    k_corrected = k - (k - 1) ** 2 / (n - 1)
+    denominator = min(k_corrected - 1, r_corrected - 1)
+    return float(np.sqrt(phi2_corrected / denominator)) if denominator > 0 else None
+
+
+def association_overview(df: pd.DataFrame, top_k: int = TOP_K_PAIRS, max_levels: int = ASSOCIATION_MAX_LEVELS,
+                         max_columns: int = ASSOCIATION_MAX_COLUMNS) -> dict:
+    """
+    Cramér's V between the categorical columns of `df` (already sampled). Columns
+    with more than `max_levels` distinct values (identifiers, free text) are
+    skipped; each pair costs one bincount over integer codes.
+    """
+    coded = {}
+    for column in df.columns:
+        codes, uniques = pd.factorize(df[column])
+        if 1 < len(uniques) <= max_levels:
+            coded[column] = (codes, len(uniques))
+    columns = list(coded)
+    result = {"method": "cramers_v", "n_columns": len(columns), "truncated": len(columns) > max_columns, "top_pairs": []}
+    columns = columns[:max_columns]
+
+    pairs = []
+    for i, column_1 in enumerate(columns):
+        for column_2 in columns[i + 1:]:
+            value = _cramers_v(*coded[column_1], *coded[column_2])
+            if value is not None:
+                pairs.append((value, column_1, column_2))
+    pairs.sort(key=lambda p: -p[0])
+    result["top_pairs"] = [
+        {"column_1": column_1, "column_2": column_2, "value": round(value, 4)} for value, column_1, column_2 in pairs[:top_k]
+    ]
+    return result
+
+
+def compute_correlations(df: pd.DataFrame, sample_rows: int = SAMPLE_ROWS, top_k: int = TOP_K_PAIRS) -> dict:
+    """Correlation and association overview for the EDA `visualizations` field."""
+    sample = _sample(df, sample_rows)
+    numeric = sample.select_dtypes(include=[np.number, "bool"])
+    categorical = sample.select_dtypes(exclude=[np.number, "bool", "datetime", "datetimetz"])
+    return {
+        "sampled_rows": len(sample),
+        "pearson": correlation_overview(numeric, "pearson", top_k=top_k),
+        "spearman": correlation_overview(numeric, "spearman", top_k=top_k),
+        "categorical_association": association_overview(categorical, top_k=top_k),
+    }
@@ -2,13 +2,33 @@ import numpy as np
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from sklearn.preprocessing import FunctionTransformer, StandardScaler, OneHotEncoder, TargetEncoder
+from app.pipelines.categorical_encoders import FrequencyEncoder, HashingEncoder, choose_categorical_encodings
 from app.schemas.model import PreprocessingConfig # Import the Pydantic model for type hinting
 
+def _as_object(X):
+    # SimpleImputer rejects bool columns (and mixes badly with category ones) when
+    # they make up a group on their own; as object they impute like text columns
+    return X.astype(object)
+
+
+def _categorical_encoder(encoding: str, config: PreprocessingConfig):
+    if encoding == "target":
+        # fit_transform cross-fits: each training row is encoded with statistics from
+        # the other folds, so the model never sees its own target leaked back
+        return TargetEncoder(target_type="auto", cv=config.target_encoding_folds, shuffle=True, random_state=42)
+    if encoding == "frequency":
+        return FrequencyEncoder()
+    if encoding == "hashing":
+        return HashingEncoder(n_buckets=config.hashing_buckets)
+    # Added sparse_output=False to prevent the ValueError with pandas output
+    return OneHotEncoder(handle_unknown='ignore', sparse_output=False)
+
 def create_preprocessing_pipeline(
     numeric_features: list,
     categorical_features: list,
-    config: PreprocessingConfig # Use the specific Pydantic model
+    config: PreprocessingConfig, # Use the specific Pydantic model
+    categorical_cardinality: dict = None
 ) -> ColumnTransformer:
     """
     Creates a scikit-learn preprocessing pipeline based on dynamic configuration.
@@ -17,6 +37,12 @@ def create_preprocessing_pipeline(
         numeric_features: List of names of numeric columns.
         categorical_features: List of names of categorical columns.
         config: A Pydantic object containing preprocessing settings.
+        categorical_cardinality: Number of distinct values per categorical column,
+            used to pick bounded-width encoders for high-cardinality columns. Without
+            it, every categorical column uses the configured encoding (one-hot for "auto").
+
+    The pipeline must be fitted with the target (`fit_transform(X, y)`) when any
+    column is target encoded.
 
     Returns:
         A scikit-learn ColumnTransformer object ready to be fitted.
@@ -29,20 +55,26 @@ def create_preprocessing_pipeline(
         ('scaler', StandardScaler() if config.scaling_strategy == 'standard_scaler' else None)
     ])
 
-    # Pipeline for categorical features:
-    categorical_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy=config.categorical_imputation)),
-        # --- THIS IS THE FIX ---
-        # Added sparse_output=False to prevent the ValueError with pandas output
-        ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
-    ])
+    # Pipelines for categorical features, one per encoding in use:
+    if categorical_cardinality is None:
+        categorical_cardinality = {column: 0 for column in categorical_features}
+    encodings = choose_categorical_encodings(
+        {column: categorical_cardinality.get(column, 0) for column in categorical_features}, config
+    )
+    categorical_transformers = []
+    for encoding in dict.fromkeys(encodings.values()):
+        columns = [column for column in categorical_features if encodings[column] == encoding]
+        # One-hot keeps the original 'cat' name so existing feature names are unchanged
+        name = 'cat' if encoding == 'onehot' else f'cat_{encoding}'
+        categorical_transformers.append((name, Pipeline(steps=[
+            ('as_object', FunctionTransformer(_as_object, feature_names_out='one-to-one')),
+            ('imputer', SimpleImputer(strategy=config.categorical_imputation)),
+            (encoding, _categorical_encoder(encoding, config))
+        ]), columns))
 
     # --- Combine transformers into a single preprocessor object ---
     preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', numeric_transformer, numeric_features),
-            ('cat', categorical_transformer, categorical_features)
-        ],
+        transformers=[('num', numeric_transformer, numeric_features), *categorical_transformers],
         remainder='passthrough' # Keep other columns if any
     )
 
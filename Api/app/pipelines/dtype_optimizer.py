@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+
+def _is_boolean_object(series: pd.Series) -> bool:
+    """True for object columns holding only Python/NumPy booleans and no missing values."""
+    if series.isna().any():
+        return False
+    return series.map(lambda v: isinstance(v, (bool, np.bool_))).all()
+
+
+def _float32_is_lossless(series: pd.Series) -> bool:
+    as_float32 = series.astype(np.float32)
+    same = as_float32.astype(np.float64) == series
+    return bool((same | series.isna()).all())
+
+
+def optimize_dtypes(df: pd.DataFrame, max_category_ratio: float = 0.5) -> tuple:
+    """
+    Shrinks a freshly parsed DataFrame without changing any value.
+
+    - object columns with only booleans become `bool`
+    - object columns whose unique/row ratio is at most `max_category_ratio` become `category`
+    - integer columns are downcast to the smallest signed integer type that fits
+    - float columns become float32 when every value survives the round trip exactly
+
+    Returns:
+        Tuple of (optimized DataFrame, memory report with before/after bytes and the
+        dtype change of every converted column).
+    """
+    bytes_before = int(df.memory_usage(deep=True).sum())
+    optimized = {}
+    changes = {}
+    n_rows = max(len(df), 1)
+
+    for col in df.columns:
+        series = df[col]
+        new_series = series
+        if series.dtype == object:
+            if _is_boolean_object(series):
+                new_series = series.astype(bool)
+            elif series.nunique() / n_rows <= max_category_ratio:
+                new_series = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+            new_series = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series) and series.dtype != np.float32 and _float32_is_lossless(series):
+            new_series = series.astype(np.float32)
+
+        if new_series.dtype != series.dtype:
+            changes[str(col)] = {"from": str(series.dtype), "to": str(new_series.dtype)}
+        optimized[col] = new_series
+
+    result = pd.DataFrame(optimized, index=df.index)
+    bytes_after = int(result.memory_usage(deep=True).sum())
+    report = {
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "reduction_pct": round(100.0 * (1 - bytes_after / bytes_before), 2) if bytes_before else 0.0,
+        "converted_columns": changes,
+    }
+    return result, report
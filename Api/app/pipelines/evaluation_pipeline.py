@@ -0,0 +1,160 @@
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+from sklearn.model_selection import KFold, ParameterGrid, StratifiedKFold
+
+from app.pipelines.data_pipeline import create_preprocessing_pipeline
+from app.pipelines.parallelism import CpuUsageMeter, MemoryMeter, dispatch_overhead, limited_threads, resolve_cores, split_cores
+from app.pipelines.shared_matrices import SharedMatrices
+from app.pipelines.training_pipeline import PARAM_GRIDS, _build_model, _holdout_split, _prepare_training_data, _prune_training_features
+from app.schemas.model import PreprocessingConfig
+
+CV_METRICS = ["accuracy", "precision", "recall", "f1-score"]
+
+
+def _make_splitter(y_encoded: np.ndarray, n_folds: int):
+    """Stratified folds when every class has at least `n_folds` rows, plain shuffled folds otherwise."""
+    if np.bincount(y_encoded).min() >= n_folds:
+        return StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42)
+    print("Stratified k-fold not possible for this target. Falling back to a standard k-fold.")
+    return KFold(n_splits=n_folds, shuffle=True, random_state=42)
+
+
+def _preprocess_fold(X: pd.DataFrame, y_encoded: np.ndarray, train_idx, valid_idx, config: PreprocessingConfig) -> dict:
+    """Prunes features and fits the preprocessing pipeline on one fold's training rows, then transforms both sides once."""
+    X_train, X_valid, _ = _prune_training_features(X.iloc[train_idx], X.iloc[valid_idx], config)
+    numeric_cols = X_train.select_dtypes(include=np.number).columns.tolist()
+    categorical_cols = X_train.select_dtypes(exclude=np.number).columns.tolist()
+    preprocessor = create_preprocessing_pipeline(numeric_cols, categorical_cols, config,
+                                                 categorical_cardinality=X_train[categorical_cols].nunique().to_dict())
+    return {
+        "X_train": np.asarray(preprocessor.fit_transform(X_train, y_encoded[train_idx]), dtype=np.float64),
+        "X_valid": np.asarray(preprocessor.transform(X_valid), dtype=np.float64),
+        "y_train": y_encoded[train_idx],
+        "y_valid": y_encoded[valid_idx],
+    }
+
+
+def _score_fold(model_name: str, num_classes: int, params: dict, fold: dict, n_threads: int = 1) -> dict:
+    """
+    Fits one (model, candidate) on one cached fold and scores it on the held-out
+    rows. Fit errors propagate, so a broken model fails the job instead of
+    reporting NaN scores.
+    """
+    start = time.perf_counter()
+    model = _build_model(model_name, num_classes, params, n_threads=n_threads)
+    model.fit(fold["X_train"], fold["y_train"])
+    y_pred = model.predict(fold["X_valid"])
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        fold["y_valid"], y_pred, average="weighted", zero_division=0
+    )
+    return {
+        "accuracy": accuracy_score(fold["y_valid"], y_pred),
+        "precision": precision, "recall": recall, "f1-score": f1,
+        "compute_seconds": time.perf_counter() - start,
+    }
+
+
+def _summarize(fold_scores: list) -> dict:
+    summary = {"mean": {}, "std": {}}
+    for metric in CV_METRICS:
+        values = np.array([score[metric] for score in fold_scores], dtype=float)
+        summary["mean"][metric] = float(values.mean())
+        summary["std"][metric] = float(values.std())
+    return summary
+
+
+def run_cross_validation(
+    df: pd.DataFrame,
+    target_column: str,
+    model_names: list,
+    preprocessing_config: PreprocessingConfig,
+    n_folds: int = 5,
+    hyperparameter_tuning: bool = False,
+    n_jobs: int = -1,
+    test_size: float = None
+) -> dict:
+    """
+    Runs a k-fold evaluation of several models in one pass.
+
+    Preprocessing is fitted once per fold and the transformed matrices are reused by
+    every model and every hyperparameter candidate. All (model, candidate, fold) fits
+    are then dispatched together to a single parallel pool, which maps the fold
+    matrices from shared memory-mapped files instead of receiving pickled copies.
+    `n_jobs` is the core budget: pool processes times threads per fit never exceed it.
+    With `test_size`, the rows `run_training_pipeline` holds out for its test set
+    (same split) are left out, so neither the scores nor the `best_params` handed to
+    the holdout model have seen them.
+
+    Returns:
+        Dict keyed by model name with `n_folds`, per-metric `mean`/`std`, the
+        `best_params` picked by mean accuracy (None when tuning is off), and the
+        `cpu_budget` usage and `parallel_dispatch` memory/overhead report of the
+        shared fitting pass.
+    """
+    cores = resolve_cores(n_jobs)
+    X, y_encoded, label_encoder = _prepare_training_data(df.copy(), target_column)
+    num_classes = len(label_encoder.classes_)
+    if test_size:
+        X, _, y_encoded, _ = _holdout_split(X, y_encoded, test_size)
+    splitter = _make_splitter(y_encoded, n_folds)
+
+    # The fold pass stays within the core budget too: its workers' BLAS/OpenMP pools are capped
+    fold_outer, fold_inner = split_cores(cores, n_folds)
+    with limited_threads(fold_outer, fold_inner):
+        folds = Parallel(n_jobs=fold_outer)(
+            delayed(_preprocess_fold)(X, y_encoded, train_idx, valid_idx, preprocessing_config)
+            for train_idx, valid_idx in splitter.split(X, y_encoded)
+        )
+
+    candidates = {}
+    for model_name in model_names:
+        if hyperparameter_tuning and model_name in PARAM_GRIDS:
+            candidates[model_name] = list(ParameterGrid(PARAM_GRIDS[model_name]))
+        else:
+            candidates[model_name] = [{}]
+
+    tasks = [
+        (model_name, c, f)
+        for model_name, params_list in candidates.items()
+        for c in range(len(params_list))
+        for f in range(len(folds))
+    ]
+    outer, inner = split_cores(cores, len(tasks))
+    with SharedMatrices() as shared, MemoryMeter() as memory, \
+            limited_threads(outer, inner), CpuUsageMeter(cores, outer, inner) as cpu_usage:
+        folds = [{key: shared.share(f"fold{f}_{key}", array) for key, array in fold.items()}
+                 for f, fold in enumerate(folds)]
+        dispatch_start = time.perf_counter()
+        scores = Parallel(n_jobs=outer)(
+            delayed(_score_fold)(model_name, num_classes, candidates[model_name][c], folds[f], inner)
+            for model_name, c, f in tasks
+        )
+        dispatch_seconds = time.perf_counter() - dispatch_start
+    parallel_dispatch = {
+        "shared_matrices": shared.report(),
+        **memory.report(),
+        **dispatch_overhead(dispatch_seconds, outer, sum(score["compute_seconds"] for score in scores)),
+    }
+
+    fold_scores = {}
+    for (model_name, c, _), score in zip(tasks, scores):
+        fold_scores.setdefault((model_name, c), []).append(score)
+
+    results = {}
+    for model_name, params_list in candidates.items():
+        summaries = [_summarize(fold_scores[(model_name, c)]) for c in range(len(params_list))]
+        best = max(range(len(params_list)), key=lambda c: summaries[c]["mean"]["accuracy"])
+        results[model_name] = {
+            "n_folds": len(folds),
+            "mean": summaries[best]["mean"],
+            "std": summaries[best]["std"],
+            "best_params": params_list[best] if hyperparameter_tuning and model_name in PARAM_GRIDS else None,
+            "candidates_evaluated": len(params_list),
+            "cpu_budget": cpu_usage.report(),
+            "parallel_dispatch": parallel_dispatch,
+        }
+    return results
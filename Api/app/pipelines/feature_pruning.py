@@ -0,0 +1,156 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+# A unique integer column without an index-like name is only treated as a row
+# index on data at least this long, and when its values fill at least this share
+# of their range (a row index keeps ~80% of its range after a holdout split).
+# On small data a unique run of integers is as likely to be a real ordinal.
+ID_MIN_ROWS = 1000
+ID_MIN_DENSITY = 0.5
+
+
+def _drop_reason(column: str, reason: str, detail: str = None) -> dict:
+    entry = {"column": str(column), "reason": reason}
+    if detail is not None:
+        entry["detail"] = detail
+    return entry
+
+
+def _high_cardinality_text_columns(df: pd.DataFrame, ratio: float) -> list:
+    text_cols = df.select_dtypes(include=['object', 'category']).columns
+    if len(text_cols) == 0:
+        return []
+    unique_ratio = df[text_cols].nunique() / len(df)
+    return unique_ratio.index[unique_ratio > ratio].tolist()
+
+
+def _constant_columns(df: pd.DataFrame) -> list:
+    counts = df.nunique(dropna=False)
+    return counts.index[counts <= 1].tolist()
+
+
+def _id_like_columns(df: pd.DataFrame) -> list:
+    """
+    Unique integer columns under an index-like name (such as the unnamed first column
+    pandas writes with `to_csv`), or, on at least ID_MIN_ROWS rows, unique integers
+    densely covering their range (a row index, possibly split).
+    """
+    int_cols = df.select_dtypes(include='integer').columns
+    if len(int_cols) == 0:
+        return []
+    ints = df[int_cols]
+    n_rows = len(df)
+    is_unique = ints.nunique() == n_rows
+    is_dense = n_rows / (ints.max() - ints.min() + 1) >= ID_MIN_DENSITY
+    names = pd.Series(int_cols, index=int_cols).astype(str).str.strip().str.lower()
+    index_like_name = names.str.startswith("unnamed") | names.isin(["id", "index", "row_id"])
+    mask = is_unique & (index_like_name | (is_dense & (n_rows >= ID_MIN_ROWS)))
+    return mask.index[mask].tolist()
+
+
+def _duplicate_columns(df: pd.DataFrame) -> dict:
+    """Returns {duplicate column: first identical column}, found by hashing column contents."""
+    seen = {}
+    duplicates = {}
+    for col in df.columns:
+        row_hashes = pd.util.hash_pandas_object(df[col], index=False).to_numpy()
+        digest = (str(df[col].dtype), hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest())
+        original = seen.get(digest)
+        # Confirm equality so a hash collision can never drop a distinct column.
+        if original is not None and df[col].equals(df[original]):
+            duplicates[col] = original
+        else:
+            seen.setdefault(digest, col)
+    return duplicates
+
+
+def iter_correlated_pairs(X: np.ndarray, threshold: float, block_size: int = 256):
+    """
+    Yields (i, j, r) for column pairs i < j with |pearson r| >= threshold.
+
+    The correlation matrix is never materialized: columns are standardized once and
+    the Gram matrix is computed block by block, so memory stays at
+    O(n_rows * n_cols + block_size ** 2).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n_rows, n_cols = X.shape
+    if n_rows < 2 or n_cols < 2:
+        return
+    means = np.nanmean(X, axis=0)
+    stds = np.nanstd(X, axis=0)
+    stds[stds == 0] = 1.0
+    Z = (X - means) / stds
+    Z[np.isnan(Z)] = 0.0
+
+    for start_i in range(0, n_cols, block_size):
+        block_i = Z[:, start_i:start_i + block_size]
+        for start_j in range(start_i, n_cols, block_size):
+            block_j = Z[:, start_j:start_j + block_size]
+            corr = block_i.T @ block_j / n_rows
+            rows, cols = np.nonzero(np.abs(corr) >= threshold)
+            for r, c in zip(rows, cols):
+                i, j = start_i + r, start_j + c
+                if i < j:
+                    yield i, j, float(corr[r, c])
+
+
+def prune_features(
+    df: pd.DataFrame,
+    target_column: str = None,
+    collinearity_threshold: float = 0.98,
+    high_cardinality_ratio: float = 0.95,
+    full_pruning: bool = True
+):
+    """
+    Drops feature columns that only cost fit time before any model sees them.
+
+    Always removes free-text columns with more than `high_cardinality_ratio` unique
+    values. With `full_pruning` it also removes constant columns, ID-like integers,
+    exact duplicates and numerics that are near-perfectly correlated with an earlier
+    numeric column.
+
+    Call it on training rows only and drop the same columns from held-out rows, so
+    no decision is based on them. `target_column` is kept as is; leave it None
+    when `df` holds only features.
+
+    Returns:
+        Tuple of (pruned DataFrame, report dict listing every dropped column and why).
+    """
+    features = df.drop(columns=[target_column]) if target_column is not None else df
+    n_columns_before = features.shape[1]
+    dropped = []
+
+    def drop(columns, reason, details=None):
+        nonlocal features
+        if not columns:
+            return
+        for col in columns:
+            dropped.append(_drop_reason(col, reason, details.get(col) if details else None))
+        features = features.drop(columns=columns)
+
+    drop(_high_cardinality_text_columns(features, high_cardinality_ratio), "high_cardinality_text")
+
+    if full_pruning and len(features) > 1:
+        drop(_constant_columns(features), "constant")
+        drop(_id_like_columns(features), "id_like")
+
+        duplicates = _duplicate_columns(features)
+        drop(list(duplicates), "duplicate", {col: f"identical to '{orig}'" for col, orig in duplicates.items()})
+
+        numeric_cols = features.select_dtypes(include=np.number).columns
+        collinear = {}
+        for i, j, r in sorted(iter_correlated_pairs(features[numeric_cols].to_numpy(), collinearity_threshold)):
+            keep, candidate = numeric_cols[i], numeric_cols[j]
+            if keep not in collinear and candidate not in collinear:
+                collinear[candidate] = f"|r|={abs(r):.4f} with '{keep}'"
+        drop(list(collinear), "collinear", collinear)
+
+    report = {
+        "n_columns_before": n_columns_before,
+        "n_columns_after": features.shape[1],
+        "dropped_columns": dropped,
+    }
+    if target_column is not None:
+        features[target_column] = df[target_column]
+    return features, report
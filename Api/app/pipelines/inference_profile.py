@@ -0,0 +1,102 @@
+import os
+import time
+import tracemalloc
+from typing import Callable
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Serving-cost measurements attached to every trained model, so models can be
+# compared on latency and footprint as well as accuracy.
+SINGLE_ROW_REPEATS = 50
+BATCH_ROWS = 1000
+BATCH_REPEATS = 10
+# Each latency profile stops early once it has used this much wall time.
+TIME_BUDGET_SECONDS = 4.0
+
+LATENCY_METRICS = ["single_row_p50_ms", "single_row_p99_ms", "batch_1k_p50_ms", "batch_1k_p99_ms"]
+
+
+def _timed_runs(fn: Callable, inputs: Callable, repeats: int, budget: float) -> list:
+    samples = []
+    deadline = time.perf_counter() + budget
+    for i in range(repeats):
+        rows = inputs(i)
+        start = time.perf_counter()
+        fn(rows)
+        samples.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return samples
+
+
+def _summary(samples: list) -> dict:
+    ms = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 3), "p99_ms": round(float(np.percentile(ms, 99)), 3),
+            "samples": len(samples)}
+
+
+def profile_latency(predict_fn: Callable, X: pd.DataFrame) -> dict:
+    """
+    Times the full serving path (`predict_fn` on raw rows: preprocessing, model,
+    label decoding) for single rows and for batches of BATCH_ROWS rows.
+    """
+    if X.empty:
+        return None
+    predict_fn(X.iloc[:1])  # warm-up: lazy initialisation and caches
+    single = _timed_runs(predict_fn, lambda i: X.iloc[[i % len(X)]], SINGLE_ROW_REPEATS, TIME_BUDGET_SECONDS / 2)
+    batch_rows = X.sample(BATCH_ROWS, replace=len(X) < BATCH_ROWS, random_state=0)
+    batch = _timed_runs(predict_fn, lambda i: batch_rows, BATCH_REPEATS, TIME_BUDGET_SECONDS / 2)
+    batch_summary = _summary(batch)
+    batch_summary["rows_per_second"] = round(BATCH_ROWS / (batch_summary["p50_ms"] / 1000), 1) if batch_summary["p50_ms"] else None
+    return {"single_row": _summary(single), "batch_1k": batch_summary}
+
+
+def profile_artifacts(paths: list) -> dict:
+    """
+    Size on disk, cold load time and in-memory footprint of saved model artifacts.
+    The footprint is what tracemalloc sees retained after loading: Python objects and
+    numpy buffers (native booster memory is only partly visible to it).
+    """
+    artifact_bytes = sum(os.path.getsize(path) for path in paths)
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    loaded = [joblib.load(path) for path in paths]
+    load_seconds = time.perf_counter() - start
+    footprint = tracemalloc.get_traced_memory()[0] - baseline
+    if not already_tracing:
+        tracemalloc.stop()
+    del loaded
+    return {
+        "artifact_bytes": artifact_bytes,
+        "load_seconds": round(load_seconds, 4),
+        "memory_footprint_bytes": max(0, footprint),
+    }
+
+
+def latency_value(profile: dict, metric: str):
+    """Reads e.g. 'batch_1k_p99_ms' from a profile produced by `profile_latency`."""
+    if not profile or metric not in LATENCY_METRICS:
+        return None
+    scope, _, stat = metric.rpartition("_p")
+    return (profile.get(scope) or {}).get(f"p{stat}")
+
+
+def pareto_front(entries: list, score_key: str, cost_key: str) -> list:
+    """
+    Names of entries not dominated by any other: no other entry is at least as
+    accurate and at least as cheap while strictly better on one of the two.
+    Entries missing either value are left out.
+    """
+    candidates = [e for e in entries if e.get(score_key) is not None and e.get(cost_key) is not None]
+    candidates.sort(key=lambda e: (e[cost_key], -e[score_key]))
+    front, best_score = [], -np.inf
+    for entry in candidates:
+        if entry[score_key] > best_score:
+            front.append(entry["model_name"])
+            best_score = entry[score_key]
+    return front
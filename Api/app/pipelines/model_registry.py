@@ -0,0 +1,100 @@
+import importlib
+from collections.abc import Mapping
+
+# Each entry is (module path, class name, default constructor kwargs).
+# Nothing here is imported until a model is actually requested, so workers that
+# only serve uploads and previews never pay for xgboost/lightgbm/catboost/shap.
+MODEL_SPECS = {
+    "random_forest": ("sklearn.ensemble", "RandomForestClassifier", {"random_state": 42}),
+    "xgboost": ("xgboost", "XGBClassifier", {"random_state": 42, "use_label_encoder": False, "eval_metric": "mlogloss"}),
+    "lightgbm": ("lightgbm", "LGBMClassifier", {"random_state": 42, "verbose": -1}),
+    "catboost": ("catboost", "CatBoostClassifier", {"random_state": 42, "verbose": 0}),
+    "logistic_regression": ("sklearn.linear_model", "LogisticRegression", {"max_iter": 1000, "random_state": 42}),
+}
+
+# Constructor parameter that sets the number of threads a single fit may use.
+# logistic_regression (liblinear) is single-threaded apart from BLAS, which is
+# capped with threadpoolctl instead.
+THREAD_PARAMS = {
+    "random_forest": "n_jobs",
+    "xgboost": "n_jobs",
+    "lightgbm": "n_jobs",
+    "catboost": "thread_count",
+}
+
+# SHAP explainer class used for each model family.
+EXPLAINER_SPECS = {
+    "random_forest": "TreeExplainer",
+    "xgboost": "TreeExplainer",
+    "lightgbm": "TreeExplainer",
+    "catboost": "TreeExplainer",
+    "logistic_regression": "LinearExplainer",
+}
+
+# Modules imported by `preload()`, in the order they are loaded.
+HEAVY_MODULES = ["sklearn.ensemble", "sklearn.linear_model", "xgboost", "lightgbm", "catboost", "shap"]
+
+
+def _import_module(module_path: str):
+    if module_path == "shap":
+        # shap pulls in matplotlib; force the non-interactive backend first.
+        import matplotlib
+        matplotlib.use('Agg')
+    return importlib.import_module(module_path)
+
+
+class LazyModelRegistry(Mapping):
+    """
+    Read-only mapping of model name -> zero-argument factory.
+
+    The underlying library is imported the first time a factory is resolved
+    and cached afterwards, so `MODELS[name]()` behaves like the old eager dict.
+    """
+
+    def __init__(self, specs: dict):
+        self._specs = specs
+        self._factories = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._factories:
+            module_path, class_name, kwargs = self._specs[name]
+            model_class = getattr(_import_module(module_path), class_name)
+            self._factories[name] = lambda: model_class(**kwargs)
+        return self._factories[name]
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __len__(self):
+        return len(self._specs)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._factories
+
+
+MODELS = LazyModelRegistry(MODEL_SPECS)
+
+
+def get_explainer_class(model_name: str):
+    """Returns the SHAP explainer class for a model, importing shap on first use."""
+    explainer_name = EXPLAINER_SPECS.get(model_name)
+    if explainer_name is None:
+        return None
+    return getattr(_import_module("shap"), explainer_name)
+
+
+def preload() -> list:
+    """
+    Eagerly imports every heavy ML library.
+
+    Meant to be called once in the gunicorn master (see gunicorn.conf.py) so the
+    imported pages are shared copy-on-write by all forked workers.
+    """
+    loaded = []
+    for module_path in HEAVY_MODULES:
+        try:
+            _import_module(module_path)
+            loaded.append(module_path)
+        except ImportError as e:
+            print(f"Preload skipped {module_path}: {e}")
+    return loaded
@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from joblib import parallel_config
+from threadpoolctl import threadpool_limits
+
+# Helpers that keep nested parallelism inside a fixed core budget: `outer` joblib
+# workers (GridSearchCV candidates, CV folds) times `inner` threads per fit
+# (booster thread pools, BLAS/OpenMP) never exceeds the cores a job was given.
+
+
+def resolve_cores(n_jobs: int = None) -> int:
+    """Core budget from a joblib-style n_jobs: None/-1 is every core, -2 all but one, etc."""
+    total = os.cpu_count() or 1
+    if n_jobs is None:
+        return total
+    if n_jobs < 0:
+        return max(1, total + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def split_cores(cores: int, n_tasks: int) -> tuple:
+    """
+    Splits a core budget into (outer processes, threads per fit).
+
+    Independent fits parallelize better than threads within one fit, so tasks get
+    as many processes as they can use and any cores left over become threads.
+    """
+    cores = max(1, int(cores))
+    outer = max(1, min(cores, n_tasks))
+    return outer, max(1, cores // outer)
+
+
+# threadpoolctl limits are process-wide, so jobs running side by side in one
+# worker share them: while any job is inside `limited_threads`, the lowest active
+# `inner` applies, and the original limits come back when the last job leaves.
+_limits_lock = threading.Lock()
+_active_limits = []
+_original_limits = None
+
+
+def _apply_process_limit():
+    global _original_limits
+    if not _active_limits:
+        _original_limits.restore_original_limits()
+        _original_limits = None
+    elif _original_limits is None:
+        _original_limits = threadpool_limits(limits=min(_active_limits))
+    else:
+        threadpool_limits(limits=min(_active_limits))
+
+
+@contextmanager
+def limited_threads(outer: int, inner: int):
+    """
+    Caps native thread pools at `inner` threads in joblib/loky workers started while
+    the context is active (joblib's config is per thread, so each job gets its own),
+    and in this process at the lowest `inner` among the jobs currently inside it.
+    """
+    with _limits_lock:
+        _active_limits.append(inner)
+        _apply_process_limit()
+    try:
+        with parallel_config("loky", n_jobs=outer, inner_max_num_threads=inner):
+            yield
+    finally:
+        with _limits_lock:
+            _active_limits.remove(inner)
+            _apply_process_limit()
+
+
+def _process_stats() -> dict:
+    """{pid: (ppid, cpu seconds)} for every process in /proc; raises OSError without /proc."""
+    ticks = os.sysconf("SC_CLK_TCK")
+    stats = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            # After the command name: state, ppid, ..., utime (12th), stime (13th)
+            stats[int(entry)] = (int(fields[1]), (int(fields[11]) + int(fields[12])) / ticks)
+    return stats
+
+
+def _process_tree(stats: dict) -> list:
+    """This process and all its descendants (loky workers) among `stats`."""
+    children = {}
+    for pid, (ppid, _) in stats.items():
+        children.setdefault(ppid, []).append(pid)
+    tree, stack = [], [os.getpid()]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def _process_tree_cpu_seconds() -> float:
+    """
+    CPU seconds used by this process and all its descendants (loky workers), read
+    from /proc. Falls back to this process only where /proc is not available.
+    """
+    try:
+        stats = _process_stats()
+    except OSError:
+        return time.process_time()
+    if os.getpid() not in stats:
+        return time.process_time()
+    return sum(stats[pid][1] for pid in _process_tree(stats))
+
+
+def _process_tree_pss_bytes() -> int:
+    """
+    Proportional set size of this process tree: pages shared between processes
+    (memory-mapped matrices, copy-on-write) are split between them rather than
+    counted once per worker as RSS would. None where /proc is not available.
+    """
+    try:
+        pids = _process_tree(_process_stats())
+    except OSError:
+        return None
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue  # worker exited
+    return total
+
+
+class CpuUsageMeter:
+    """
+    Measures wall time and CPU time of a block and compares them to the cores it
+    was allotted. Concurrent jobs in the same worker process are counted together.
+    """
+
+    def __init__(self, allotted_cores: int, outer: int, inner: int):
+        self.allotted_cores = allotted_cores
+        self.outer = outer
+        self.inner = inner
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def __enter__(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = _process_tree_cpu_seconds()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_seconds += time.perf_counter() - self._wall_start
+        self.cpu_seconds += max(0.0, _process_tree_cpu_seconds() - self._cpu_start)
+        return False
+
+    def report(self) -> dict:
+        used_cores = self.cpu_seconds / self.wall_seconds if self.wall_seconds else 0.0
+        return {
+            "allotted_cores": self.allotted_cores,
+            "parallel_fits": self.outer,
+            "threads_per_fit": self.inner,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "avg_cores_used": round(used_cores, 2),
+            "utilization_pct": round(100.0 * used_cores / self.allotted_cores, 1),
+        }
+
+
+class MemoryMeter:
+    """
+    Samples the memory of this process tree (PSS, see `_process_tree_pss_bytes`)
+    in a background thread while a block runs and reports the peak, including
+    memory held by parallel workers.
+    """
+
+    def __init__(self, interval_seconds: float = 0.2):
+        self.interval_seconds = interval_seconds
+        self.baseline_bytes = None
+        self.peak_bytes = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        pss = _process_tree_pss_bytes()
+        if pss is not None:
+            self.peak_bytes = max(self.peak_bytes or 0, pss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    def __enter__(self):
+        self.baseline_bytes = _process_tree_pss_bytes()
+        self.peak_bytes = self.baseline_bytes
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+    def report(self) -> dict:
+        if self.baseline_bytes is None:
+            return {"peak_pss_bytes": None, "baseline_pss_bytes": None, "peak_increase_bytes": None}
+        return {
+            "peak_pss_bytes": self.peak_bytes,
+            "baseline_pss_bytes": self.baseline_bytes,
+            "peak_increase_bytes": max(0, self.peak_bytes - self.baseline_bytes),
+        }
+
+
+def dispatch_overhead(wall_seconds: float, workers: int, compute_seconds: float) -> dict:
+    """
+    Worker time not spent fitting or scoring: serializing and shipping arguments,
+    starting workers and waiting for stragglers.
+    """
+    available = wall_seconds * workers
+    overhead = max(0.0, available - compute_seconds)
+    return {
+        "compute_seconds": round(compute_seconds, 3),
+        "dispatch_overhead_seconds": round(overhead, 3),
+        "dispatch_overhead_pct": round(100.0 * overhead / available, 1) if available else 0.0,
+    }
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+# Training matrices handed to parallel workers are written once to memory-mapped
+# files, in RAM-backed /dev/shm when it has room and in the temp directory
+# otherwise. joblib pickles a np.memmap as a reference to its file, so every
+# worker (grid search candidate, CV fold) maps the same pages instead of
+# receiving and holding its own copy.
+SHM_ROOT = "/dev/shm"
+
+
+class SharedMatrices:
+    """
+    Per-job set of read-only memory-mapped arrays, removed when the context exits.
+
+    Used as `with SharedMatrices() as shared: X = shared.share("X_train", X)`; the
+    returned np.memmap can be passed to GridSearchCV or joblib tasks directly.
+    """
+
+    def __init__(self, root: str = None):
+        self._root = root
+        self.directory = None
+        self.shared_bytes = 0
+        self.write_seconds = 0.0
+        self.arrays = 0
+
+    def _directory_for(self, nbytes: int) -> str:
+        if self.directory is None:
+            root = self._root
+            if root is None:
+                use_shm = os.path.isdir(SHM_ROOT) and shutil.disk_usage(SHM_ROOT).free > 2 * nbytes
+                root = SHM_ROOT if use_shm else tempfile.gettempdir()
+            self.directory = os.path.join(root, f"automl-job-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+            os.makedirs(self.directory)
+        return self.directory
+
+    def share(self, name: str, array) -> np.memmap:
+        """Writes `array` (ndarray or DataFrame, made C-contiguous) and returns a read-only memmap of it."""
+        array = np.ascontiguousarray(array)
+        if array.dtype == object:
+            raise TypeError(f"Cannot share object array '{name}' zero-copy.")
+        start = time.perf_counter()
+        path = os.path.join(self._directory_for(array.nbytes), f"{name}.dat")
+        if array.size == 0:
+            return array  # zero-length files cannot be memory-mapped
+        writer = np.memmap(path, dtype=array.dtype, mode="w+", shape=array.shape)
+        writer[...] = array
+        writer.flush()
+        del writer
+        self.shared_bytes += array.nbytes
+        self.arrays += 1
+        self.write_seconds += time.perf_counter() - start
+        return np.memmap(path, dtype=array.dtype, mode="r", shape=array.shape)
+
+    def close(self):
+        # Workers that still map a file keep its pages until they drop it
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def report(self) -> dict:
+        backing = None
+        if self.directory is not None:
+            backing = "shared_memory" if self.directory.startswith(SHM_ROOT) else "disk"
+        return {
+            "arrays": self.arrays,
+            "shared_bytes": self.shared_bytes,
+            "write_seconds": round(self.write_seconds, 4),
+            "backing": backing,
+        }
@@ -1,21 +1,21 @@
-import matplotlib
-matplotlib.use('Agg')
 import pandas as pd
-import shap
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import train_test_split, GridSearchCV, ParameterGrid
 from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import LabelEncoder
-import xgboost as xgb
-import lightgbm as lgb
-import catboost as cb
 import os
 import numpy as np
 import re
 import json
+import time
+from typing import Callable
 
 from app.pipelines.data_pipeline import create_preprocessing_pipeline
+from app.pipelines.categorical_encoders import choose_categorical_encodings
+from app.pipelines.feature_pruning import prune_features
+from app.pipelines.inference_profile import profile_latency
+from app.pipelines.model_registry import MODELS, THREAD_PARAMS, get_explainer_class
+from app.pipelines.parallelism import CpuUsageMeter, MemoryMeter, dispatch_overhead, limited_threads, resolve_cores, split_cores
+from app.pipelines.shared_matrices import SharedMatrices
 from app.schemas.model import PreprocessingConfig
 
 def _clean_for_json(obj):
@@ -31,14 +31,6 @@ def _clean_for_json(obj):
         return obj.tolist()
     return obj
 
-MODELS = {
-    "random_forest": lambda: RandomForestClassifier(random_state=42),
-    "xgboost": lambda: xgb.XGBClassifier(random_state=42, use_label_encoder=False, eval_metric='mlogloss'),
-    "lightgbm": lambda: lgb.LGBMClassifier(random_state=42, verbose=-1),
-    "catboost": lambda: cb.CatBoostClassifier(random_state=42, verbose=0),
-    "logistic_regression": lambda: LogisticRegression(max_iter=1000, random_state=42),
-}
-
 PARAM_GRIDS = {
     "random_forest": {'n_estimators': [100, 200], 'max_depth': [10, 20, None]},
     "logistic_regression": {'C': [0.1, 1.0, 10.0], 'solver': ['liblinear']},
@@ -47,27 +39,44 @@ PARAM_GRIDS = {
     "catboost": {'iterations': [100, 200], 'depth': [4, 6]}
 }
 
+# Keys of the pipeline result that ModelService persists next to the model so raw
+# rows can be scored later with exactly the preprocessing used in training.
+INFERENCE_ARTIFACT_KEYS = ["preprocessor", "label_encoder", "feature_columns"]
+
 def _sanitize_feature_names(df: pd.DataFrame) -> pd.DataFrame:
     new_columns = {}
+    seen = set()
     for col in df.columns:
         sanitized_col = re.sub(r'[^A-Za-z0-9_]+', '_', str(col))
         if re.match(r'^\d', sanitized_col):
             sanitized_col = f'col_{sanitized_col}'
-        new_columns[col] = sanitized_col
+        # Different categories can collapse to the same name (e.g. "a-b" and "a b");
+        # boosters require unique feature names, so suffix the later ones.
+        candidate, suffix = sanitized_col, 1
+        while candidate in seen:
+            candidate = f'{sanitized_col}_{suffix}'
+            suffix += 1
+        seen.add(candidate)
+        new_columns[col] = candidate
     return df.rename(columns=new_columns)
 
+def _finalize_features(X_processed: pd.DataFrame) -> pd.DataFrame:
+    """Model-ready matrix from the preprocessor output; shared by training and prediction."""
+    return _sanitize_feature_names(X_processed).astype(np.float64)
+
 def _get_confusion_matrix_data(y_test_encoded, y_pred_encoded, class_labels, present_labels):
     cm = confusion_matrix(y_test_encoded, y_pred_encoded, labels=present_labels)
     return {"labels": class_labels, "matrix": cm.tolist()}
 
 def _get_shap_summary_data(model, X_test_processed, model_name):
     try:
-        if model_name in ["random_forest", "xgboost", "lightgbm", "catboost"]:
-            explainer = shap.TreeExplainer(model)
-        elif model_name == "logistic_regression":
-            explainer = shap.LinearExplainer(model, X_test_processed)
-        else:
+        explainer_class = get_explainer_class(model_name)
+        if explainer_class is None:
             return None
+        if model_name == "logistic_regression":
+            explainer = explainer_class(model, X_test_processed)
+        else:
+            explainer = explainer_class(model)
         shap_values = explainer.shap_values(X_test_processed)
         feature_names = X_test_processed.columns.tolist()
         if isinstance(shap_values, list):
@@ -79,24 +88,13 @@ def _get_shap_summary_data(model, X_test_processed, model_name):
         print(f"SHAP calculation failed for {model_name}: {e}")
         return None
 
-def run_training_pipeline(
-    df: pd.DataFrame,
-    target_column: str,
-    model_name: str,
-    preprocessing_config: PreprocessingConfig,
-    test_size: float,
-    plots_dir: str,
-    hyperparameter_tuning: bool = False
-) -> dict:
-
-    high_cardinality_cols = []
-    for col in df.select_dtypes(include=['object', 'category']).columns:
-        if col != target_column and df[col].nunique() / len(df) > 0.95:
-            high_cardinality_cols.append(col)
-    
-    if high_cardinality_cols:
-        df = df.drop(columns=high_cardinality_cols)
+def _prepare_training_data(df: pd.DataFrame, target_column: str):
+    """
+    Shared feature/target preparation used by both the holdout and the k-fold evaluation.
 
+    Returns:
+        Tuple of (X, y_encoded, label_encoder).
+    """
     if df[target_column].isnull().any():
         df.dropna(subset=[target_column], inplace=True)
         df.reset_index(drop=True, inplace=True)
@@ -106,42 +104,163 @@ def run_training_pipeline(
     
     label_encoder = LabelEncoder()
     y_encoded = label_encoder.fit_transform(y)
-    num_classes = len(label_encoder.classes_)
-    
+    return X, y_encoded, label_encoder
+
+def _holdout_split(X: pd.DataFrame, y_encoded: np.ndarray, test_size: float) -> tuple:
+    """The train/test split of `run_training_pipeline`, stratified when possible: (X_train, X_test, y_train, y_test)."""
     try:
-        X_train, X_test, y_train_encoded, y_test_encoded = train_test_split(
-            X, y_encoded, test_size=test_size, random_state=42, stratify=y_encoded)
+        return train_test_split(X, y_encoded, test_size=test_size, random_state=42, stratify=y_encoded)
     except ValueError:
         print("Stratified split failed. Falling back to a standard split.")
-        X_train, X_test, y_train_encoded, y_test_encoded = train_test_split(
-            X, y_encoded, test_size=test_size, random_state=42
-        )
+        return train_test_split(X, y_encoded, test_size=test_size, random_state=42)
+
+def _prune_training_features(X_train: pd.DataFrame, X_held_out: pd.DataFrame, preprocessing_config: PreprocessingConfig):
+    """
+    Feature pruning decided on the training rows alone; the held-out rows drop the
+    same columns. Returns (X_train, X_held_out, feature_pruning_report).
+    """
+    X_train, pruning_report = prune_features(
+        X_train,
+        collinearity_threshold=preprocessing_config.collinearity_threshold,
+        full_pruning=preprocessing_config.feature_pruning
+    )
+    return X_train, X_held_out[X_train.columns], pruning_report
+
+def _build_model(model_name: str, num_classes: int, params: dict = None, n_threads: int = None):
+    base_model = MODELS[model_name]()
+    if n_threads and model_name in THREAD_PARAMS:
+        # Without this boosters default to every core, whatever else is running
+        base_model.set_params(**{THREAD_PARAMS[model_name]: n_threads})
+    # --- THIS IS THE ROBUST XGBOOST FIX ---
+    if model_name == "xgboost" and num_classes > 2:
+        # Explicitly set the number of classes for multiclass XGBoost
+        # (binary:logistic rejects num_class)
+        base_model.set_params(num_class=num_classes)
+    if params:
+        base_model.set_params(**params)
+    return base_model
+
+def _resumable_grid_search(base_model, param_grid: dict, X, y, n_jobs: int, state_path: str = None,
+                           on_checkpoint: Callable = None) -> dict:
+    """
+    Exhaustive 3-fold search like GridSearchCV, run in batches of `n_jobs`
+    candidates. After each batch the candidate scores are written to `state_path`
+    (and `on_checkpoint` is called), and candidates already recorded there are not
+    evaluated again, so an interrupted search resumes where it stopped.
+
+    Returns best_params plus the wall and fit/score seconds spent in this run and
+    the number of candidates taken from the saved state.
+    """
+    candidates = list(ParameterGrid(param_grid))
+    state = {"candidates": {}}
+    if state_path and os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+    key = lambda params: json.dumps(params, sort_keys=True, default=str)
+    pending = [params for params in candidates if key(params) not in state["candidates"]]
+    resumed = len(candidates) - len(pending)
+
+    search_seconds, compute_seconds = 0.0, 0.0
+    batch_size = max(1, n_jobs)
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        grid_search = GridSearchCV(base_model, [{name: [value] for name, value in params.items()} for params in batch],
+                                   cv=3, scoring='accuracy', n_jobs=n_jobs, error_score='raise', refit=False)
+        search_start = time.perf_counter()
+        grid_search.fit(X, y)
+        search_seconds += time.perf_counter() - search_start
+        results = grid_search.cv_results_
+        for i, params in enumerate(results['params']):
+            state["candidates"][key(params)] = {"params": params, "score": float(results['mean_test_score'][i])}
+        compute_seconds += float(np.sum(results['mean_fit_time'] + results['mean_score_time'])) * grid_search.n_splits_
+        if state_path:
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+            with open(f"{state_path}.part", 'w') as f:
+                json.dump(state, f, default=str)
+            os.replace(f"{state_path}.part", state_path)
+            if on_checkpoint:
+                on_checkpoint()
+
+    # Ties go to the earliest candidate in grid order, as in GridSearchCV
+    best = max(candidates, key=lambda params: (state["candidates"][key(params)]["score"], -candidates.index(params)))
+    return {
+        "best_params": best,
+        "search_seconds": search_seconds,
+        "compute_seconds": compute_seconds,
+        "resumed_candidates": resumed,
+    }
+
+def run_training_pipeline(
+    df: pd.DataFrame,
+    target_column: str,
+    model_name: str,
+    preprocessing_config: PreprocessingConfig,
+    test_size: float,
+    plots_dir: str,
+    hyperparameter_tuning: bool = False,
+    model_params: dict = None,
+    n_jobs: int = -1,
+    profile_inference: bool = True,
+    search_state_path: str = None,
+    on_search_checkpoint: Callable = None
+) -> dict:
+    """
+    Trains one model on a holdout split and returns its metrics, plots and details.
+
+    `model_params` fixes the hyperparameters up front (e.g. the best candidate found
+    by the k-fold evaluation), in which case no grid search is run. `n_jobs` is the
+    core budget for the whole fit: grid search processes times threads per fit stay
+    within it, and `details["cpu_budget"]` reports how much of it was used. Grid
+    search workers share the training matrix through memory-mapped files;
+    `details["parallel_dispatch"]` reports peak memory and dispatch overhead. With
+    `search_state_path`, the grid search records evaluated candidates there and
+    skips those already recorded (see `_resumable_grid_search`). With
+    `profile_inference`, `details["inference_profile"]` holds single-row and 1k-row
+    prediction latencies of the full serving path.
+    """
+    X, y_encoded, label_encoder = _prepare_training_data(df, target_column)
+    num_classes = len(label_encoder.classes_)
+
+    X_train, X_test, y_train_encoded, y_test_encoded = _holdout_split(X, y_encoded, test_size)
+    X_train, X_test, pruning_report = _prune_training_features(X_train, X_test, preprocessing_config)
 
     numeric_cols = X_train.select_dtypes(include=np.number).columns.tolist()
     categorical_cols = X_train.select_dtypes(exclude=np.number).columns.tolist()
     
-    preprocessor = create_preprocessing_pipeline(numeric_cols, categorical_cols, preprocessing_config)
+    categorical_cardinality = X_train[categorical_cols].nunique().to_dict()
+    preprocessor = create_preprocessing_pipeline(numeric_cols, categorical_cols, preprocessing_config,
+                                                 categorical_cardinality=categorical_cardinality)
     preprocessor.set_output(transform="pandas")
     
-    X_train_processed = preprocessor.fit_transform(X_train)
+    X_train_processed = preprocessor.fit_transform(X_train, y_train_encoded)
     X_test_processed = preprocessor.transform(X_test)
     
-    X_train_processed = _sanitize_feature_names(X_train_processed).astype(np.float64)
-    X_test_processed = _sanitize_feature_names(X_test_processed).astype(np.float64)
+    X_train_processed = _finalize_features(X_train_processed)
+    X_test_processed = _finalize_features(X_test_processed)
 
-    # --- THIS IS THE ROBUST XGBOOST FIX ---
-    base_model = MODELS[model_name]()
-    if model_name == "xgboost":
-        # Explicitly set the number of classes for XGBoost
-        base_model.set_params(num_class=num_classes)
+    cores = resolve_cores(n_jobs)
+    tune = hyperparameter_tuning and not model_params and model_name in PARAM_GRIDS
+    if tune:
+        outer, inner = split_cores(cores, len(ParameterGrid(PARAM_GRIDS[model_name])) * 3)
+    else:
+        outer, inner = 1, cores
+    base_model = _build_model(model_name, num_classes, model_params, n_threads=inner)
     
     model = base_model
-    if hyperparameter_tuning and model_name in PARAM_GRIDS:
-        grid_search = GridSearchCV(base_model, PARAM_GRIDS[model_name], cv=3, scoring='accuracy', n_jobs=-1, error_score='raise')
-        grid_search.fit(X_train_processed, y_train_encoded)
-        model = grid_search.best_estimator_
-    else:
-        model.fit(X_train_processed, y_train_encoded)
+    search = None
+    with SharedMatrices() as shared, MemoryMeter() as memory, \
+            limited_threads(outer, inner), CpuUsageMeter(cores, outer, inner) as cpu_usage:
+        if tune:
+            # Workers map the training matrix instead of each receiving a pickled copy
+            X_shared = shared.share("X_train", X_train_processed.to_numpy(dtype=np.float64))
+            y_shared = shared.share("y_train", y_train_encoded)
+            search = _resumable_grid_search(base_model, PARAM_GRIDS[model_name], X_shared, y_shared, outer,
+                                            state_path=search_state_path, on_checkpoint=on_search_checkpoint)
+            # Refit in this process on the named features, so the model keeps its feature names
+            model = _build_model(model_name, num_classes, search["best_params"], n_threads=inner)
+            model.fit(X_train_processed, y_train_encoded)
+        else:
+            model.fit(X_train_processed, y_train_encoded)
     
     y_pred_encoded = model.predict(X_test_processed)
     
@@ -170,14 +289,38 @@ def run_training_pipeline(
         "shap_summary": _get_shap_summary_data(model, X_test_processed, model_name)
     }
 
+    def serve(rows: pd.DataFrame):
+        # Same path as PredictionService: preprocessing, model, label decoding
+        y = model.predict(_finalize_features(preprocessor.transform(rows)))
+        return label_encoder.inverse_transform(np.asarray(y).ravel().astype(int))
+
     details = {
         "model_parameters": {k: str(v) for k, v in model.get_params().items()},
         "preprocessing_config": preprocessing_config.dict(),
         "n_features_used": X_train_processed.shape[1],
+        "feature_pruning": pruning_report,
+        "categorical_encoding": {
+            column: {"encoding": encoding, "n_unique": int(categorical_cardinality[column])}
+            for column, encoding in choose_categorical_encodings(categorical_cardinality, preprocessing_config).items()
+        },
+        "cpu_budget": cpu_usage.report(),
+        "parallel_dispatch": {
+            "shared_matrices": shared.report(),
+            **memory.report(),
+            **(dispatch_overhead(search["search_seconds"], outer, search["compute_seconds"]) if tune else {}),
+        },
+        "grid_search": {
+            "candidates": len(ParameterGrid(PARAM_GRIDS[model_name])),
+            "resumed_candidates": search["resumed_candidates"],
+            "best_params": search["best_params"],
+        } if tune else None,
+        "inference_profile": profile_latency(serve, X_test) if profile_inference else None,
         "target_column": target_column,
         "target_classes": label_encoder.classes_.tolist()
     }
     return _clean_for_json({
         "model": model, "metrics": metrics,
-        "plots": plots, "details": details
+        "plots": plots, "details": details,
+        "preprocessor": preprocessor, "label_encoder": label_encoder,
+        "feature_columns": X_train.columns.tolist()
     })
\ No newline at end of file
@@ -1,11 +1,23 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal
 
 # Defines the configuration for data preprocessing steps
 class PreprocessingConfig(BaseModel):
     numeric_imputation: str = "median"
     categorical_imputation: str = "most_frequent"
     scaling_strategy: str = "standard_scaler"
+    # Drop constant, duplicate, ID-like and near-collinear columns before fitting
+    feature_pruning: bool = True
+    collinearity_threshold: float = Field(0.98, gt=0.0, le=1.0)
+    # "auto" one-hot encodes categoricals up to `high_cardinality_threshold` distinct
+    # values and uses `high_cardinality_encoding` above it; the other values apply
+    # one encoding to every categorical column
+    categorical_encoding: Literal["auto", "onehot", "target", "frequency", "hashing"] = "auto"
+    high_cardinality_threshold: int = Field(50, ge=2)
+    high_cardinality_encoding: Literal["target", "frequency", "hashing"] = "target"
+    # Out-of-fold folds for target encoding and output columns per hashed feature
+    target_encoding_folds: int = Field(5, ge=2, le=10)
+    hashing_buckets: int = Field(32, ge=2, le=1024)
 
 # Defines the structure of a request to start a training job
 class TrainingRequest(BaseModel):
@@ -14,6 +26,9 @@ class TrainingRequest(BaseModel):
     models: List[str]
     test_size: float = Field(0.2, ge=0.1, le=0.5)
     hyperparameter_tuning: bool = False
+    # When set, models are also scored with parallel k-fold CV (mean/std per metric);
+    # with tuning enabled the CV also replaces the per-model grid search.
+    cv_folds: Optional[int] = Field(None, ge=2, le=10)
     preprocessing_config: PreprocessingConfig = Field(default_factory=PreprocessingConfig)
 
 # Defines the structure of a request to predict using a trained model
@@ -21,6 +36,16 @@ class PredictionRequest(BaseModel):
     model_id: str
     data: List[dict]
 
+# Defines a request to score every row of an uploaded file
+class BatchPredictionRequest(BaseModel):
+    model_id: str
+    file_id: str
+    chunk_size: int = Field(10000, ge=1, le=1_000_000)
+    output_format: Literal["csv", "ndjson"] = "csv"
+    # "stream" sends predictions back in the response, "file" writes a downloadable
+    # result file in the background and returns a task ID to poll
+    delivery: Literal["stream", "file"] = "stream"
+
 # Defines the structure of a response that returns a task ID
 class TaskResponse(BaseModel):
     task_id: str
@@ -39,4 +64,28 @@ class StatusResponse(BaseModel):
     status: str
     progress: Optional[str] = None
     results: Optional[Dict[str, ModelResult]] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+    # Name of the result file for batch prediction tasks
+    output_file: Optional[str] = None
+
+# One model of a finished training job, ranked by accuracy against serving cost
+class LeaderboardEntry(BaseModel):
+    model_name: str
+    model_id: str
+    accuracy: Optional[float] = None
+    cv_accuracy: Optional[float] = None
+    latency_ms: Optional[float] = None
+    artifact_bytes: Optional[int] = None
+    memory_footprint_bytes: Optional[int] = None
+    on_pareto_front: bool = False
+
+# Accuracy-vs-latency view across the models of a training job
+class LeaderboardResponse(BaseModel):
+    task_id: str
+    latency_metric: str
+    min_accuracy: Optional[float] = None
+    entries: List[LeaderboardEntry]
+    # Models no other model beats on both accuracy and latency, fastest first
+    pareto_front: List[str]
+    # Fastest model meeting min_accuracy (or the most accurate if none does)
+    recommended: Optional[str] = None
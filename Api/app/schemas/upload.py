@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class UploadResponse(BaseModel):
     """
@@ -12,4 +12,5 @@ class UploadResponse(BaseModel):
     # Add the missing field for column data types
     column_dtypes: Dict[str, str] = Field(..., description="Data types of each column.")
     sample_data: List[Dict[str, Any]] = Field(..., description="A small sample of the data (e.g., first 5 rows).")
+    memory_report: Optional[Dict[str, Any]] = Field(None, description="In-memory size before/after dtype optimization and the columns converted.")
 
@@ -1,7 +1,13 @@
 import pandas as pd
 import numpy as np
+import json
 import math
+import os
+import uuid
 from fastapi import Depends
+from app.core.config import settings
+from app.core.http_cache import make_etag
+from app.pipelines.correlation_analysis import compute_correlations
 from app.services.file_service import FileService
 from app.schemas.analysis import AnalysisResponse, ColumnStats
 
@@ -32,6 +38,23 @@ def clean_for_json(obj):
     return obj
 
 
+def infs_to_nan(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Treats ±inf as missing in float columns. Empty and "NaN" fields are already
+    read as missing by the loader (see upload_schema.NA_TOKENS).
+    """
+    float_cols = df.select_dtypes(include="floating").columns
+    if len(float_cols) == 0:
+        return df
+    df = df.copy(deep=False)
+    df[float_cols] = df[float_cols].replace([np.inf, -np.inf], np.nan)
+    return df
+
+
+# Correlation results kept next to the upload (and evicted with it)
+CORRELATIONS_CACHE_FILENAME = ".correlations.json"
+
+
 class AnalysisService:
     def __init__(self, file_service: FileService = Depends()):
         self.file_service = file_service
@@ -41,25 +64,26 @@ class AnalysisService:
         Retrieves a DataFrame using the file_id and returns a clean, JSON-safe preview.
         """
         try:
-            df = self.file_service.get_dataframe(file_id)
-            if df is None:
+            total_rows = self.file_service.get_row_count(file_id)
+            preview_df = self.file_service.get_dataframe(file_id, nrows=num_rows)
+            if preview_df is None:
                 raise FileNotFoundError(f"No data found for file_id: {file_id}")
 
-            preview_df = df.head(num_rows)
-            preview_df = preview_df.replace([np.inf, -np.inf, "", " ", "NaN", "nan"], np.nan)
-            
             columns = preview_df.columns.tolist()
             column_types = {col: str(preview_df[col].dtype) for col in columns}
 
             def sanitize_value(val):
                 if pd.isna(val) or val in [np.inf, -np.inf]:
                     return None
-                if isinstance(val, (np.float32, np.float64)):
+                # Columns may be downcast (int8, float32, ...) by the loader
+                if isinstance(val, np.floating):
                     if math.isnan(val) or math.isinf(val):
                         return None
                     return float(val)
-                if isinstance(val, (np.int32, np.int64)):
+                if isinstance(val, np.integer):
                     return int(val)
+                if isinstance(val, np.bool_):
+                    return bool(val)
                 return val
 
             json_safe_data = [
@@ -68,7 +92,7 @@ class AnalysisService:
             ]
             
             return {
-                "total_rows": df.shape[0],
+                "total_rows": total_rows,
                 "column_types": column_types,
                 "columns": columns,
                 "data": json_safe_data
@@ -81,12 +105,14 @@ class AnalysisService:
         Generates data for visualization based on selected columns.
         """
         try:
-            df = self.file_service.get_dataframe(file_id)
+            available = self.file_service.get_columns(file_id)
+            if col1 not in available or (col2 and col2 not in available):
+                raise ValueError("Invalid column name(s) provided.")
+
+            # Only the (at most two) charted columns are loaded
+            df = self.file_service.get_dataframe(file_id, columns=[col1, col2] if col2 else [col1])
             if df is None:
                 raise FileNotFoundError(f"No data found for file_id: {file_id}")
-            
-            if col1 not in df.columns or (col2 and col2 not in df.columns):
-                raise ValueError("Invalid column name(s) provided.")
 
             response = {"column_1": {}, "scatter_data": None}
 
@@ -131,6 +157,41 @@ class AnalysisService:
         except Exception as e:
             raise RuntimeError(f"An unexpected error occurred during visualization data generation: {e}")
 
+    def get_correlations(self, file_id: str, df: pd.DataFrame = None) -> dict:
+        """
+        Correlation and categorical association overview of a dataset (see
+        `compute_correlations`). Computed once per dataset content and cached in the
+        upload directory, so later reports and heatmaps skip the computation.
+        """
+        cache_key = make_etag(self.file_service.dataset_fingerprint(file_id), "correlations")
+        cache_path = os.path.join(settings.UPLOADS_DIR, file_id, CORRELATIONS_CACHE_FILENAME)
+        try:
+            with open(cache_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("key") == cache_key:
+                return cached["correlations"]
+        except (OSError, ValueError):
+            pass
+
+        try:
+            if df is None:
+                df = self.file_service.get_dataframe(file_id)
+                df = infs_to_nan(df)
+            correlations = clean_for_json(compute_correlations(df))
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred during correlation analysis: {e}")
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"key": cache_key, "correlations": correlations}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not cache correlations for {file_id}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return correlations
+
     def generate_eda_report(self, file_id: str, target_column: str = None) -> dict:
         """
         Generates a comprehensive EDA report, including specific analysis on the target column if provided.
@@ -140,7 +201,7 @@ class AnalysisService:
             if df is None:
                 raise FileNotFoundError(f"No data found for file_id: {file_id}")
 
-            df = df.replace([np.inf, -np.inf, "", " ", "NaN", "nan"], np.nan)
+            df = infs_to_nan(df)
 
             row_count, col_count = df.shape
             duplicate_rows = int(df.duplicated().sum())
@@ -176,7 +237,7 @@ class AnalysisService:
                     }
             # --- END NEW SECTION ---
 
-            visualizations = {}
+            visualizations = {"correlations": self.get_correlations(file_id, df)}
             
             result = AnalysisResponse(
                 file_id=file_id,
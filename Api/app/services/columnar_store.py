@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+
+# Binary columnar copy of an upload: one .npy file per column plus schema.json.
+# Every column file can be memory-mapped, so loads skip parsing entirely and all
+# worker processes reading the same dataset share the OS page cache.
+STORE_DIRNAME = ".columnar"
+SCHEMA_FILENAME = "schema.json"
+FORMAT_VERSION = 1
+
+
+class UnsupportedColumnError(ValueError):
+    """Raised when a column cannot be represented losslessly in the columnar format."""
+
+
+def _json_safe_categories(values) -> list:
+    categories = []
+    for value in values:
+        if isinstance(value, np.generic):
+            value = value.item()
+        if not isinstance(value, (str, int, float, bool)):
+            raise UnsupportedColumnError(f"Category value of type {type(value).__name__} is not supported.")
+        categories.append(value)
+    return categories
+
+
+def _encode_column(series: pd.Series):
+    """Returns (schema entry, ndarray to save) for one column."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {"kind": "category", "categories": _json_safe_categories(dtype.categories),
+                "ordered": bool(dtype.ordered)}, series.cat.codes.to_numpy()
+    if dtype == object:
+        # Dictionary-encode free text; -1 marks missing values.
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        codes = pd.to_numeric(pd.Series(codes), downcast='integer').to_numpy()
+        return {"kind": "string", "categories": _json_safe_categories(uniques)}, codes
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return {"kind": "datetime", "dtype": str(dtype)}, series.to_numpy().view(np.int64)
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        return {"kind": "numeric", "dtype": str(dtype)}, series.to_numpy()
+    raise UnsupportedColumnError(f"Column dtype {dtype} is not supported.")
+
+
+def _decode_column(entry: dict, array: np.ndarray):
+    kind = entry["kind"]
+    if kind == "numeric":
+        return array
+    if kind == "datetime":
+        return array.view(entry["dtype"])
+    categorical_dtype = pd.CategoricalDtype(entry["categories"], ordered=entry.get("ordered", False))
+    values = pd.Categorical.from_codes(array, dtype=categorical_dtype)
+    if kind == "string":
+        return np.asarray(values.astype(object))
+    return values
+
+
+def store_path(upload_dir: str) -> str:
+    return os.path.join(upload_dir, STORE_DIRNAME)
+
+
+def has_columnar_store(upload_dir: str) -> bool:
+    # schema.json is written last, so its presence marks a complete store.
+    return os.path.exists(os.path.join(store_path(upload_dir), SCHEMA_FILENAME))
+
+
+def write_columnar_store(df: pd.DataFrame, upload_dir: str) -> bool:
+    """
+    Writes `df` as a columnar store inside `upload_dir`.
+
+    The store is built in a temporary directory and renamed into place, so readers
+    never observe a half-written store. Returns False (and writes nothing) when a
+    column cannot be stored losslessly; callers then keep parsing the original file.
+    """
+    target = store_path(upload_dir)
+    if has_columnar_store(upload_dir):
+        return True
+    staging = f"{target}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(staging)
+    try:
+        columns = []
+        for position, col in enumerate(df.columns):
+            entry, array = _encode_column(df[col])
+            entry.update({"name": col.item() if isinstance(col, np.generic) else col, "file": f"{position}.npy"})
+            np.save(os.path.join(staging, entry["file"]), np.ascontiguousarray(array), allow_pickle=False)
+            columns.append(entry)
+        schema = {"version": FORMAT_VERSION, "row_count": len(df), "columns": columns}
+        with open(os.path.join(staging, SCHEMA_FILENAME), 'w') as f:
+            json.dump(schema, f)
+        os.rename(staging, target)
+        return True
+    except UnsupportedColumnError as e:
+        print(f"Columnar store skipped for {upload_dir}: {e}")
+        return False
+    except OSError:
+        # Another worker finished the same store first.
+        if has_columnar_store(upload_dir):
+            return True
+        raise
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+def read_schema(upload_dir: str) -> dict:
+    with open(os.path.join(store_path(upload_dir), SCHEMA_FILENAME), 'r') as f:
+        return json.load(f)
+
+
+def read_columnar_store(upload_dir: str, columns: list = None) -> pd.DataFrame:
+    """
+    Loads a DataFrame from the columnar store without parsing or copying numeric data.
+
+    Numeric, boolean, datetime and categorical-code columns are memory-mapped
+    copy-on-write, so writes stay private to this process and never reach disk.
+    """
+    directory = store_path(upload_dir)
+    schema = read_schema(upload_dir)
+    entries = schema["columns"]
+    if columns is not None:
+        by_name = {entry["name"]: entry for entry in entries}
+        missing = [col for col in columns if col not in by_name]
+        if missing:
+            raise ValueError(f"Columns not found: {missing}")
+        entries = [by_name[col] for col in columns]
+
+    # Zero-length arrays cannot be memory-mapped.
+    mmap_mode = 'c' if schema["row_count"] else None
+    data = {}
+    for entry in entries:
+        array = np.load(os.path.join(directory, entry["file"]), mmap_mode=mmap_mode, allow_pickle=False)
+        # Plain ndarray view over the mapping, so results of pandas ops are not np.memmap
+        array = array.view(np.ndarray)
+        data[entry["name"]] = _decode_column(entry, array)
+    df = pd.DataFrame(data, columns=[entry["name"] for entry in entries], copy=False)
+    if not entries:
+        df = pd.DataFrame(index=pd.RangeIndex(schema["row_count"]))
+    return df
@@ -0,0 +1,93 @@
+import fcntl
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.processes import pid_alive
+
+
+class CpuGovernor:
+    """
+    Hands out core budgets to training jobs across all worker processes.
+
+    Each running job holds a lease of some cores, recorded as a marker file under
+    STORAGE_DIR/.cpu_leases (`{pid}-{id}@{cores}`), so every gunicorn worker sees the
+    same ledger. A new job gets the free cores (at most CPU_MAX_CORES_PER_JOB); when
+    none are free it waits up to CPU_LEASE_WAIT_SECONDS and then runs on a single
+    core rather than starving. Leases of dead processes are reclaimed.
+    """
+
+    @property
+    def lease_dir(self) -> Path:
+        return settings.STORAGE_DIR / ".cpu_leases"
+
+    @property
+    def total_cores(self) -> int:
+        return settings.CPU_TOTAL_CORES or os.cpu_count() or 1
+
+    @property
+    def max_cores_per_job(self) -> int:
+        return min(settings.CPU_MAX_CORES_PER_JOB or self.total_cores, self.total_cores)
+
+    def _active_leases(self) -> list:
+        leases = []
+        for path in self.lease_dir.glob("*@*"):
+            owner, cores = path.name.rsplit("@", 1)
+            if pid_alive(int(owner.split("-")[0])):
+                leases.append((path, int(cores)))
+            else:
+                path.unlink(missing_ok=True)
+        return leases
+
+    def _try_acquire(self, requested: int, label: str, force: bool = False):
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lease_dir / ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            free = self.total_cores - sum(cores for _, cores in self._active_leases())
+            if free < 1 and not force:
+                return None
+            cores = max(1, min(requested, free))
+            path = self.lease_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}@{cores}"
+            path.write_text(label)
+            return path, cores
+
+    def acquire(self, requested: int = None, label: str = "") -> tuple:
+        """Blocks until cores are available; returns (lease token, granted cores)."""
+        requested = min(requested or self.max_cores_per_job, self.max_cores_per_job)
+        deadline = time.monotonic() + settings.CPU_LEASE_WAIT_SECONDS
+        while True:
+            lease = self._try_acquire(requested, label, force=time.monotonic() >= deadline)
+            if lease is not None:
+                return lease
+            time.sleep(0.5)
+
+    def release(self, token: Path):
+        token.unlink(missing_ok=True)
+
+    @contextmanager
+    def lease(self, requested: int = None, label: str = ""):
+        token, cores = self.acquire(requested, label)
+        try:
+            yield cores
+        finally:
+            self.release(token)
+
+    def snapshot(self) -> dict:
+        leases = self._active_leases() if self.lease_dir.exists() else []
+        leased = sum(cores for _, cores in leases)
+        return {
+            "total_cores": self.total_cores,
+            "max_cores_per_job": self.max_cores_per_job,
+            "leased_cores": leased,
+            "free_cores": max(0, self.total_cores - leased),
+            "leases": [
+                {"pid": int(path.name.split("-")[0]), "cores": cores, "job": path.read_text()}
+                for path, cores in leases
+            ],
+        }
+
+
+cpu_governor = CpuGovernor()
@@ -1,15 +1,33 @@
 import pandas as pd
+import hashlib
 import uuid
 import os
 import aiofiles
-from fastapi import UploadFile
+from pathlib import Path
+from fastapi import UploadFile, BackgroundTasks
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 from app.schemas.upload import UploadResponse
+from app.pipelines.dtype_optimizer import optimize_dtypes
+from app.services.columnar_store import has_columnar_store, read_columnar_store, read_schema, write_columnar_store
+from app.services.shared_dataset_cache import shared_dataset_cache
+from app.services.storage_backend import ensure_local, get_storage_backend, list_keys
+from app.services.storage_lifecycle import storage_lifecycle
+from app.services.upload_schema import csv_read_options, infer_schema, load_schema, pinned_read_options, save_schema
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def upload_key(file_id: str, filename: str) -> str:
+    return f"uploads/{file_id}/{filename}"
+
 
 class FileService:
-    async def save_and_summarize_file(self, file: UploadFile) -> UploadResponse:
+    async def save_and_summarize_file(self, file: UploadFile, background_tasks: BackgroundTasks = None) -> UploadResponse:
         """
         Saves an uploaded file and returns a summary including column data types.
+        When `background_tasks` is given, the columnar store used by later loads is
+        written after the response is sent.
         """
         file_id = str(uuid.uuid4())
         file_location = os.path.join(settings.UPLOADS_DIR, file_id)
@@ -18,21 +36,28 @@ class FileService:
         file_path = os.path.join(file_location, file.filename)
 
         try:
+            # Evict cold entries first if this upload would push storage over quota
+            reserved = file.size or 0
+            await run_in_threadpool(storage_lifecycle.ensure_capacity, reserved)
+            written = 0
             async with aiofiles.open(file_path, 'wb') as out_file:
-                content = await file.read()
-                await out_file.write(content)
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    written += len(chunk)
+                    if written > reserved:
+                        # Size not announced (or understated): make room as the bytes arrive
+                        await run_in_threadpool(storage_lifecycle.ensure_capacity, written - reserved)
+                        reserved = written
+                    await out_file.write(chunk)
+            backend = get_storage_backend()
+            if not backend.is_local:
+                await backend.upload_file(upload_key(file_id, file.filename), Path(file_path))
         except Exception as e:
             raise IOError(f"Could not save file: {e}")
 
-        try:
-            if file.filename.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-        except Exception as e:
-            raise ValueError(f"Could not read or parse the file: {e}")
-
-        dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
+        # Parsing is CPU-bound; keep it off the event loop
+        df, dtypes, optimized_df, memory_report = await run_in_threadpool(self._parse_upload, file_path)
+        if background_tasks is not None:
+            background_tasks.add_task(write_columnar_store, optimized_df, file_location)
 
         summary = UploadResponse(
             file_id=file_id,
@@ -40,33 +65,204 @@ class FileService:
             row_count=len(df),
             columns=df.columns.tolist(),
             column_dtypes=dtypes,
-            sample_data=df.head().to_dict(orient='records')
+            sample_data=df.head().to_dict(orient='records'),
+            memory_report=memory_report
         )
 
         return summary
 
-    def get_dataframe(self, file_id: str) -> pd.DataFrame:
+    def _parse_upload(self, file_path: str):
+        try:
+            if file_path.endswith('.csv'):
+                df = pd.read_csv(file_path, **csv_read_options())
+            else:
+                df = pd.read_excel(file_path)
+        except Exception as e:
+            raise ValueError(f"Could not read or parse the file: {e}")
+
+        optimized_df, memory_report = optimize_dtypes(df)
+        # Reported as later reads return them (see `get_dataframe`), not as first parsed
+        dtypes = {col: str(dtype) for col, dtype in optimized_df.dtypes.items()}
+        if file_path.endswith('.csv'):
+            # The only inference pass: later parses reuse these dtypes
+            save_schema(infer_schema(optimized_df), os.path.dirname(file_path))
+        return df, dtypes, optimized_df, memory_report
+
+    def _read_csv(self, file_path: str, **kwargs) -> tuple:
         """
-        Loads the saved data file for a given file_id into a pandas DataFrame.
+        Parses a CSV upload with the dtypes pinned by its saved schema (C parser, no
+        inference pass), or with inference when it has none. Returns (DataFrame,
+        whether the schema was used).
         """
+        schema = load_schema(os.path.dirname(file_path))
+        if schema is not None:
+            usecols = kwargs.get("usecols")
+            if usecols is not None:
+                names = {entry["name"] for entry in schema["columns"]}
+                missing = [col for col in usecols if col not in names]
+                if missing:
+                    raise ValueError(f"Columns not found: {missing}")
+            try:
+                return pd.read_csv(file_path, **pinned_read_options(schema), **kwargs), True
+            except (ValueError, TypeError) as e:
+                print(f"Saved schema does not match {file_path}, inferring dtypes: {e}")
+        return pd.read_csv(file_path, **csv_read_options(), **kwargs), False
+
+    def _find_data_file(self, file_id: str) -> str:
         file_location = os.path.join(settings.UPLOADS_DIR, file_id)
+        if not os.path.exists(file_location) and not get_storage_backend().is_local:
+            # Not uploaded through this instance, or evicted locally: fetch it back
+            for key in list_keys(f"uploads/{file_id}/"):
+                if key.endswith(('.csv', '.xlsx', '.xls')):
+                    return str(ensure_local(key))
         if not os.path.exists(file_location):
             raise FileNotFoundError(f"Directory for file_id {file_id} not found.")
 
-        file_path = None
         for filename in os.listdir(file_location):
             if filename.endswith(('.csv', '.xlsx', '.xls')):
-                file_path = os.path.join(file_location, filename)
-                break
+                return os.path.join(file_location, filename)
 
-        if not file_path:
-            raise FileNotFoundError(f"Data file not found in directory for file_id {file_id}.")
+        raise FileNotFoundError(f"Data file not found in directory for file_id {file_id}.")
 
+    def ensure_exists(self, file_id: str) -> str:
+        """
+        Local path of the upload's data file, fetched from the storage backend first
+        if needed. Raises FileNotFoundError for unknown uploads.
+        """
+        return self._find_data_file(file_id)
+
+    def dataset_fingerprint(self, file_id: str) -> str:
+        """
+        Cheap identity of an upload's content, used for HTTP ETags: file name, size and
+        modification time of the data file, without reading it.
+        """
+        file_path = self._find_data_file(file_id)
+        stat = os.stat(file_path)
+        identity = f"{file_id}:{os.path.basename(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def _load_stored(self, file_id: str, file_location: str, columns: list = None) -> pd.DataFrame:
+        """
+        Returns the dataset from the cross-worker shared memory cache, publishing the
+        columnar store there first if needed, or from the on-disk store. None when
+        no store exists yet. With `columns`, only those columns are mapped.
+        """
+        if not os.path.isdir(file_location):
+            return None  # evicted upload; `_find_data_file` reports it
+        try:
+            df = shared_dataset_cache.attach(file_id, columns=columns)
+            if df is None and shared_dataset_cache.publish(file_id, file_location):
+                df = shared_dataset_cache.attach(file_id, columns=columns)
+            if df is not None:
+                return df
+        except (OSError, ValueError) as e:
+            print(f"Shared dataset cache unavailable for {file_id}: {e}")
+        if has_columnar_store(file_location):
+            return read_columnar_store(file_location, columns=columns)
+        return None
+
+    def get_columns(self, file_id: str) -> list:
+        """Column names of a dataset, from the store schema or the file header only."""
+        file_location = os.path.join(settings.UPLOADS_DIR, file_id)
+        if has_columnar_store(file_location):
+            return [entry["name"] for entry in read_schema(file_location)["columns"]]
+        schema = load_schema(file_location)
+        if schema is not None:
+            return [entry["name"] for entry in schema["columns"]]
+        file_path = self._find_data_file(file_id)
+        try:
+            if file_path.endswith('.csv'):
+                return pd.read_csv(file_path, nrows=0).columns.tolist()
+            return pd.read_excel(file_path, nrows=0).columns.tolist()
+        except Exception as e:
+            raise ValueError(f"Could not read or parse the file at {file_path}: {e}")
+
+    def get_row_count(self, file_id: str) -> int:
+        """Number of rows, from the store schema; parses (and stores) the file if needed."""
+        file_location = os.path.join(settings.UPLOADS_DIR, file_id)
+        if has_columnar_store(file_location):
+            return read_schema(file_location)["row_count"]
+        return len(self.get_dataframe(file_id))
+
+    def get_dataframe(self, file_id: str, columns: list = None, nrows: int = None) -> pd.DataFrame:
+        """
+        Loads the saved data file for a given file_id into a pandas DataFrame.
+
+        Served zero-copy from shared memory (or the memory-mapped columnar store on
+        disk) when the dataset was loaded before by any worker. Otherwise the
+        original file is parsed, its dtypes shrunk losslessly (see
+        `optimize_dtypes`), and the store is written so the next load skips parsing.
+        CSVs are parsed with the dtypes saved at upload (see `upload_schema`), so
+        every read yields the same dtypes without inferring them again.
+
+        `columns` and `nrows` restrict the load to those columns (in that order) and
+        the first `nrows` rows. They are pushed down to the reader: only those
+        columns are mapped from the store, and a file without a store is parsed
+        only that far (`usecols`/`nrows`); such partial parses do not write a store.
+        Raises ValueError for unknown columns.
+        """
+        file_location = os.path.join(settings.UPLOADS_DIR, file_id)
+        storage_lifecycle.touch("uploads", file_id)
+        if columns is not None:
+            columns = list(dict.fromkeys(columns))
+        df = self._load_stored(file_id, file_location, columns=columns)
+        if df is not None:
+            return df.iloc[:nrows] if nrows is not None else df
+
+        file_path = self._find_data_file(file_id)
+        partial = columns is not None or nrows is not None
+        pinned = False
         try:
             if file_path.endswith('.csv'):
-                return pd.read_csv(file_path)
+                df, pinned = self._read_csv(file_path, usecols=columns, nrows=nrows)
             else:
-                return pd.read_excel(file_path)
+                df = pd.read_excel(file_path, usecols=columns, nrows=nrows)
+        except ValueError as e:
+            if columns is not None:
+                # e.g. "Usecols do not match columns"; report the names that are missing
+                missing = [col for col in columns if col not in self.get_columns(file_id)]
+                if missing:
+                    raise ValueError(f"Columns not found: {missing}")
+            raise ValueError(f"Could not read or parse the file at {file_path}: {e}")
         except Exception as e:
             raise ValueError(f"Could not read or parse the file at {file_path}: {e}")
 
+        if not pinned:
+            df, _ = optimize_dtypes(df)
+            if file_path.endswith('.csv') and not partial:
+                # Uploaded before schemas were saved
+                save_schema(infer_schema(df), file_location)
+        if partial:
+            return df[columns] if columns is not None else df
+        try:
+            if write_columnar_store(df, file_location):
+                shared_dataset_cache.publish(file_id, file_location)
+        except OSError as e:
+            print(f"Could not write columnar store for {file_id}: {e}")
+        return df
+
+    def iter_dataframe_chunks(self, file_id: str, chunk_size: int):
+        """
+        Yields a dataset in fixed-size row chunks without materializing it as a whole.
+
+        Slices of the shared or memory-mapped columnar store are views, so only the chunk being
+        processed is paged in. Without a store, CSVs are read incrementally with
+        `chunksize`; Excel files have no incremental reader and are sliced after loading.
+        """
+        file_location = os.path.join(settings.UPLOADS_DIR, file_id)
+        storage_lifecycle.touch("uploads", file_id)
+        df = self._load_stored(file_id, file_location)
+        if df is not None:
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size]
+            return
+
+        file_path = self._find_data_file(file_id)
+        if file_path.endswith('.csv'):
+            schema = load_schema(file_location)
+            options = pinned_read_options(schema) if schema is not None else csv_read_options()
+            yield from pd.read_csv(file_path, chunksize=chunk_size, **options)
+        else:
+            df = self.get_dataframe(file_id)
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size]
@@ -0,0 +1,159 @@
+import fcntl
+import json
+import os
+import shutil
+
+from app.schemas.model import TrainingRequest
+from app.services.prediction_service import inference_artifacts_key, model_key
+from app.services.storage_backend import ensure_local, get_storage_backend, list_keys, local_path, persist, run_sync
+
+# Checkpoints of running training jobs, so a job cut short by a crash or a
+# redeploy resumes instead of starting over. Per task, under checkpoints/{task_id}:
+#   job.json             - the request and dataset hash, written when the job is queued
+#   results/{model}.json - the ModelResult of every model finished (artifacts saved)
+#   cv.json              - cross-validation results, once computed
+#   search/{model}.json  - scores of the grid search candidates evaluated so far
+# The worker that owns a job holds an exclusive lock on owner.lock until the job
+# ends; the lock dies with the process, which is how interrupted jobs are found.
+# The lock is a local flock, so it only speaks for processes on this host: with a
+# remote backend, a host resumes only jobs whose checkpoint it wrote itself (its
+# STORAGE_DIR survives restarts), never jobs that may still run on other hosts.
+CHECKPOINTS_PREFIX = "checkpoints"
+
+
+def _key(task_id: str, *parts: str) -> str:
+    return "/".join([CHECKPOINTS_PREFIX, task_id, *parts])
+
+
+def _write_json(key: str, data: dict):
+    path = local_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".part")
+    with open(partial, 'w') as f:
+        json.dump(data, f)
+    os.replace(partial, path)
+    persist(key)
+
+
+def _read_json(key: str) -> dict:
+    try:
+        with open(ensure_local(key)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _list_keys(prefix: str) -> list:
+    """Keys under `prefix` (a directory-like key ending in '/')."""
+    if not get_storage_backend().is_local:
+        return list_keys(prefix)
+    # Walk only the checkpoint directory rather than all of storage
+    root = local_path(prefix)
+    keys = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            keys.append(f"{prefix}{os.path.relpath(os.path.join(directory, name), root)}".replace(os.sep, "/"))
+    return sorted(keys)
+
+
+def _try_lock(task_id: str):
+    """Open lock file holding the job's owner lock, or None if a live process owns it."""
+    path = local_path(_key(task_id, "owner.lock"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def start_job(task_id: str, request: TrainingRequest, dataset_hash: str):
+    """Records a newly queued job and returns its owner lock (keep it open until the job ends)."""
+    lock = _try_lock(task_id)
+    _write_json(_key(task_id, "job.json"), {"request": request.dict(), "dataset_hash": dataset_hash})
+    return lock
+
+
+def release(lock):
+    if lock is not None:
+        lock.close()
+
+
+def save_model_result(task_id: str, model_name: str, model_result: dict):
+    _write_json(_key(task_id, "results", f"{model_name}.json"), model_result)
+
+
+def completed_results(task_id: str) -> dict:
+    """ModelResults checkpointed so far whose artifacts still exist, by model name."""
+    results = {}
+    for key in _list_keys(_key(task_id, "results") + "/"):
+        result = _read_json(key)
+        if result is None:
+            continue
+        try:
+            ensure_local(model_key(result["model_id"]))
+            ensure_local(inference_artifacts_key(result["model_id"]))
+        except FileNotFoundError:
+            continue  # artifacts evicted since: train this model again
+        results[key.rsplit("/", 1)[1][:-len(".json")]] = result
+    return results
+
+
+def save_cv_results(task_id: str, cv_results: dict):
+    _write_json(_key(task_id, "cv.json"), cv_results)
+
+
+def load_cv_results(task_id: str) -> dict:
+    return _read_json(_key(task_id, "cv.json"))
+
+
+def search_state_path(task_id: str, model_name: str) -> str:
+    """Local file where the grid search of one model records evaluated candidates."""
+    key = _key(task_id, "search", f"{model_name}.json")
+    try:
+        return str(ensure_local(key))
+    except FileNotFoundError:
+        return str(local_path(key))
+
+
+def persist_search_state(task_id: str, model_name: str):
+    persist(_key(task_id, "search", f"{model_name}.json"))
+
+
+def clear(task_id: str):
+    """Removes a finished job's checkpoint, locally and from the backend."""
+    backend = get_storage_backend()
+    if not backend.is_local:
+        for key in _list_keys(_key(task_id) + "/"):
+            run_sync(backend.delete, key)
+    shutil.rmtree(local_path(_key(task_id)), ignore_errors=True)
+
+
+def claim_interrupted_jobs() -> list:
+    """
+    Jobs started on this host whose checkpoint exists but whose owner is gone, as
+    [(task_id, TrainingRequest, dataset_hash, owner lock)]. The lock is taken for the
+    caller, so each interrupted job is claimed by exactly one worker.
+    """
+    # Only local checkpoint directories: the owner lock of a job listed by the remote
+    # backend but started elsewhere would be free here even while it runs there
+    checkpoints_dir = local_path(CHECKPOINTS_PREFIX)
+    task_ids = set()
+    if checkpoints_dir.exists():
+        task_ids.update(path.name for path in checkpoints_dir.iterdir() if path.is_dir())
+
+    claimed = []
+    for task_id in sorted(task_ids):
+        lock = _try_lock(task_id)
+        if lock is None:
+            continue  # still running in another worker
+        job = _read_json(_key(task_id, "job.json"))
+        if job is None:
+            # Crashed between queuing and writing job.json: nothing to resume
+            lock.close()
+            clear(task_id)
+            continue
+        claimed.append((task_id, TrainingRequest(**job["request"]), job["dataset_hash"], lock))
+    return claimed
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent small prediction requests for the same model into one call.
+
+    Requests for a key wait at most `max_wait_ms` (or until `max_batch_rows` rows are
+    queued), then all queued frames are concatenated, scored by one vectorized
+    `predict_fn(key, frame)` call in the thread pool, and each caller receives its own
+    slice of the result. If a combined batch fails, its requests are retried one by
+    one so a single bad payload only fails its own caller.
+    """
+
+    def __init__(self, predict_fn: Callable, max_wait_ms: float, max_batch_rows: int, metrics_window: int = 1000):
+        self.predict_fn = predict_fn
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_rows = max_batch_rows
+        self._pending = {}
+        self._flush_tasks = set()
+        self._counters = {"requests": 0, "batches": 0, "rows": 0, "fallbacks": 0}
+        self._batch_requests = deque(maxlen=metrics_window)
+        self._batch_rows = deque(maxlen=metrics_window)
+        self._wait_ms = deque(maxlen=metrics_window)
+        self._predict_ms = deque(maxlen=metrics_window)
+
+    async def submit(self, key: str, df: pd.DataFrame) -> np.ndarray:
+        self._counters["requests"] += 1
+        if self.max_wait_ms <= 0:
+            return await self._run_batch(key, [(df, None, time.perf_counter())])
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, {"items": [], "rows": 0, "timer": None})
+        batch["items"].append((df, future, time.perf_counter()))
+        batch["rows"] += len(df)
+
+        if batch["rows"] >= self.max_batch_rows:
+            self._start_flush(key)
+        elif batch["timer"] is None:
+            batch["timer"] = loop.call_later(self.max_wait_ms / 1000, self._start_flush, key)
+        return await future
+
+    def _start_flush(self, key: str):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch["timer"] is not None:
+            batch["timer"].cancel()
+        task = asyncio.ensure_future(self._run_batch(key, batch["items"]))
+        # Keep a reference until the task finishes so it is not garbage-collected
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _run_batch(self, key: str, items: list):
+        flush_started = time.perf_counter()
+        self._wait_ms.extend((flush_started - enqueued) * 1000 for _, _, enqueued in items)
+        frames = [df for df, _, _ in items]
+        sizes = [len(df) for df in frames]
+
+        try:
+            combined = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            predictions = np.asarray(await run_in_threadpool(self.predict_fn, key, combined))
+            slices = np.split(predictions, np.cumsum(sizes)[:-1])
+            outcomes = [(s, None) for s in slices]
+        except Exception as batch_error:
+            if len(items) == 1:
+                outcomes = [(None, batch_error)]
+            else:
+                self._counters["fallbacks"] += 1
+                outcomes = []
+                for df in frames:
+                    try:
+                        outcomes.append((np.asarray(await run_in_threadpool(self.predict_fn, key, df)), None))
+                    except Exception as e:
+                        outcomes.append((None, e))
+
+        self._predict_ms.append((time.perf_counter() - flush_started) * 1000)
+        self._counters["batches"] += 1
+        self._counters["rows"] += sum(sizes)
+        self._batch_requests.append(len(items))
+        self._batch_rows.append(sum(sizes))
+
+        if items[0][1] is None:
+            # Unbatched call: hand the outcome straight back to the caller
+            result, error = outcomes[0]
+            if error is not None:
+                raise error
+            return result
+        for (_, future, _), (result, error) in zip(items, outcomes):
+            if future.done():
+                continue  # caller went away
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def metrics(self) -> dict:
+        def percentiles(values, qs):
+            if not values:
+                return {f"p{q}": None for q in qs}
+            return {f"p{q}": float(np.percentile(values, q)) for q in qs}
+
+        batches = self._counters["batches"]
+        return {
+            "window_ms": self.max_wait_ms,
+            "max_batch_rows": self.max_batch_rows,
+            **self._counters,
+            "avg_requests_per_batch": (self._counters["requests"] / batches) if batches else None,
+            "requests_per_batch": {**percentiles(self._batch_requests, (50, 95)), "max": max(self._batch_requests, default=None)},
+            "rows_per_batch": {**percentiles(self._batch_rows, (50, 95)), "max": max(self._batch_rows, default=None)},
+            "queue_wait_ms": percentiles(self._wait_ms, (50, 99)),
+            "predict_ms": percentiles(self._predict_ms, (50, 99)),
+        }
@@ -9,9 +9,17 @@ from fastapi import BackgroundTasks, Depends
 from pathlib import Path
 
 from app.core.config import settings
-from app.schemas.model import TrainingRequest, StatusResponse, ModelResult
-from app.pipelines.training_pipeline import run_training_pipeline
+from app.schemas.model import TrainingRequest, StatusResponse, ModelResult, LeaderboardEntry, LeaderboardResponse
+from app.pipelines.training_pipeline import run_training_pipeline, INFERENCE_ARTIFACT_KEYS
+from app.pipelines.evaluation_pipeline import run_cross_validation
+from app.pipelines.inference_profile import latency_value, pareto_front, profile_artifacts
+from app.services.cpu_governor import cpu_governor
 from app.services.file_service import FileService
+from app.services.prediction_service import inference_artifacts_key, inference_artifacts_path, model_key
+from app.services.storage_backend import ensure_local, persist
+from app.services.task_status import create_task_status, read_task_status, read_task_status_async, status_key, update_task_status
+from app.services.storage_lifecycle import storage_lifecycle
+from app.services import job_checkpoint, training_memo
 
 class ModelService:
     def __init__(self, file_service: FileService = Depends(FileService)):
@@ -19,39 +27,125 @@ class ModelService:
 
     def start_training_job(self, request: TrainingRequest, background_tasks: BackgroundTasks) -> str:
         task_id = str(uuid.uuid4())
-        status_file = settings.TASK_STATUS_DIR / f"{task_id}.json"
-        
-        initial_status = StatusResponse(
-            task_id=task_id,
-            status="queued",
-            progress="Training job has been queued."
-        )
-        with open(status_file, 'w') as f:
-            json.dump(initial_status.dict(), f, indent=4)
+        # Models already trained on identical data with an identical configuration
+        # are answered from the memo; only the rest is trained.
+        dataset_hash = training_memo.dataset_content_hash(self.file_service.ensure_exists(request.file_id))
+        cached_results = {}
+        for model_name in request.models:
+            result = training_memo.lookup(dataset_hash, request, model_name)
+            if result is not None:
+                cached_results[model_name] = result
 
-        background_tasks.add_task(self._run_training_in_background, task_id, request)
+        create_task_status(task_id, progress="Training job has been queued.")
+        if len(cached_results) == len(set(request.models)):
+            update_task_status(task_id, "completed", progress="All models served from previous training runs.",
+                               results=cached_results)
+            return task_id
+
+        # Keep the dataset on disk from now until the job finishes, even while queued
+        upload_pin = storage_lifecycle.pin("uploads", request.file_id)
+        # Recorded so the job can be resumed if this worker dies before it finishes
+        checkpoint_lock = job_checkpoint.start_job(task_id, request, dataset_hash)
+        background_tasks.add_task(
+            self._run_training_in_background, task_id, request, upload_pin, dataset_hash, cached_results, checkpoint_lock
+        )
         return task_id
 
-    def get_job_status(self, task_id: str) -> dict:
-        status_file = settings.TASK_STATUS_DIR / f"{task_id}.json"
-        if not status_file.exists():
+    def resume_interrupted_jobs(self) -> list:
+        """
+        Claims training jobs left unfinished by a dead worker or a redeploy and
+        re-queues them. Models checkpointed before the interruption (or memoized) are
+        reused; the rest are trained, with interrupted grid searches picking up their
+        saved candidate scores. Returns the argument tuples to run
+        `_run_training_in_background` with.
+        """
+        jobs = []
+        for task_id, request, dataset_hash, lock in job_checkpoint.claim_interrupted_jobs():
+            try:
+                ensure_local(status_key(task_id))
+            except FileNotFoundError:
+                pass
+            status = read_task_status(task_id)
+            if status is None or status.get("status") in ("completed", "failed"):
+                # Finished (or never recorded) but not cleaned up
+                job_checkpoint.clear(task_id)
+                job_checkpoint.release(lock)
+                continue
+
+            done = job_checkpoint.completed_results(task_id)
+            cached_results = dict(done)
+            for model_name in request.models:
+                if model_name not in cached_results:
+                    result = training_memo.lookup(dataset_hash, request, model_name)
+                    if result is not None:
+                        cached_results[model_name] = result
+            update_task_status(
+                task_id, "queued",
+                progress=f"Resuming interrupted job: {len(done)} of {len(set(request.models))} models already trained."
+            )
+            print(f"Resuming interrupted training job {task_id} ({len(done)} models checkpointed)")
+            upload_pin = storage_lifecycle.pin("uploads", request.file_id)
+            jobs.append((task_id, request, upload_pin, dataset_hash, cached_results, lock))
+        return jobs
+
+    async def get_job_status(self, task_id: str) -> dict:
+        status = await read_task_status_async(task_id)
+        if status is None:
             return StatusResponse(task_id=task_id, status="not_found", error="Task ID not found.").dict()
-        with open(status_file, 'r') as f:
-            return json.load(f)
+        return status
+
+    async def get_leaderboard(self, task_id: str, latency_metric: str, min_accuracy: float = None) -> dict:
+        """
+        Ranks the models of a completed job by accuracy and measured latency. Returns
+        None if the task has no results.
+        """
+        status = await read_task_status_async(task_id)
+        if not status or status.get("status") != "completed" or not status.get("results"):
+            return None
 
-    def _run_training_in_background(self, task_id: str, request: TrainingRequest):
-        status_file = settings.TASK_STATUS_DIR / f"{task_id}.json"
+        entries = []
+        for model_name, result in status["results"].items():
+            profile = result["details"].get("inference_profile") or {}
+            artifacts = profile.get("artifacts") or {}
+            cv = result["metrics"].get("cross_validation") or {}
+            entries.append(LeaderboardEntry(
+                model_name=model_name,
+                model_id=result["model_id"],
+                accuracy=(result["metrics"].get("overall_metrics") or {}).get("accuracy"),
+                cv_accuracy=(cv.get("mean") or {}).get("accuracy"),
+                latency_ms=latency_value(profile, latency_metric),
+                artifact_bytes=artifacts.get("artifact_bytes"),
+                memory_footprint_bytes=artifacts.get("memory_footprint_bytes"),
+            ).dict())
 
+        # CV accuracy is the steadier estimate when the job ran cross-validation
+        for entry in entries:
+            entry["score"] = entry["cv_accuracy"] if entry["cv_accuracy"] is not None else entry["accuracy"]
+        front = pareto_front(entries, "score", "latency_ms")
+        for entry in entries:
+            entry["on_pareto_front"] = entry["model_name"] in front
+
+        ranked = [e for e in entries if e["score"] is not None]
+        eligible = [e for e in ranked if min_accuracy is None or e["score"] >= min_accuracy]
+        if eligible:
+            recommended = min(eligible, key=lambda e: (e["latency_ms"] if e["latency_ms"] is not None else float("inf"), -e["score"]))
+        else:
+            recommended = max(ranked, key=lambda e: e["score"], default=None)
+
+        entries.sort(key=lambda e: (not e["on_pareto_front"], e["latency_ms"] if e["latency_ms"] is not None else float("inf")))
+        return LeaderboardResponse(
+            task_id=task_id,
+            latency_metric=latency_metric,
+            min_accuracy=min_accuracy,
+            entries=entries,
+            pareto_front=front,
+            recommended=recommended["model_name"] if recommended else None,
+        ).dict()
+
+    def _run_training_in_background(self, task_id: str, request: TrainingRequest, upload_pin: Path = None,
+                                    dataset_hash: str = None, cached_results: dict = None, checkpoint_lock=None):
         def update_status(status: str, progress: str = None, results: dict = None, error: str = None):
-            with open(status_file, 'r+') as f:
-                data = json.load(f)
-                data['status'] = status
-                if progress: data['progress'] = progress
-                if results: data['results'] = results
-                if error: data['error'] = error
-                f.seek(0)
-                json.dump(data, f, indent=4)
-                f.truncate()
+            update_task_status(task_id, status, progress=progress, results=results, error=error)
 
         try:
             update_status("running", progress="Loading data...")
@@ -59,37 +153,89 @@ class ModelService:
             if df is None:
                 raise FileNotFoundError(f"Could not load dataframe for file_id: {request.file_id}")
 
-            all_results = {}
-            total_models = len(request.models)
+            # Models finished before an interruption are not trained again
+            cached_results = {**(cached_results or {}), **job_checkpoint.completed_results(task_id)}
+            models_to_train = [m for m in dict.fromkeys(request.models) if m not in cached_results]
+
+            # One core budget for the whole job, shared with jobs in other workers
+            update_status("running", progress="Waiting for CPU cores...")
+            with cpu_governor.lease(label=task_id) as cores:
+                cv_results = job_checkpoint.load_cv_results(task_id) or {}
+                if request.cv_folds and not all(m in cv_results for m in models_to_train):
+                    update_status("running", progress=f"Running {request.cv_folds}-fold cross-validation...")
+                    cv_results = run_cross_validation(
+                        df=df,
+                        target_column=request.target_column,
+                        model_names=models_to_train,
+                        preprocessing_config=request.preprocessing_config,
+                        n_folds=request.cv_folds,
+                        hyperparameter_tuning=request.hyperparameter_tuning,
+                        n_jobs=cores,
+                        # Only the training rows of the holdout split below
+                        test_size=request.test_size
+                    )
+                    job_checkpoint.save_cv_results(task_id, cv_results)
+
+                all_results = {}
+                total_models = len(models_to_train)
             
-            for i, model_name in enumerate(request.models):
-                progress_message = f"({i+1}/{total_models}) Training {model_name}..."
-                update_status("running", progress=progress_message)
+                for i, model_name in enumerate(models_to_train):
+                    progress_message = f"({i+1}/{total_models}) Training {model_name}..."
+                    update_status("running", progress=progress_message)
                 
-                # The pipeline now returns a perfectly clean dictionary
-                pipeline_result = run_training_pipeline(
-                    df=df.copy(),
-                    target_column=request.target_column,
-                    model_name=model_name,
-                    preprocessing_config=request.preprocessing_config,
-                    test_size=request.test_size,
-                    plots_dir=str(settings.REPORTS_DIR),
-                    hyperparameter_tuning=request.hyperparameter_tuning
-                )
+                    # The pipeline now returns a perfectly clean dictionary
+                    pipeline_result = run_training_pipeline(
+                        df=df.copy(),
+                        target_column=request.target_column,
+                        model_name=model_name,
+                        preprocessing_config=request.preprocessing_config,
+                        test_size=request.test_size,
+                        plots_dir=str(settings.REPORTS_DIR),
+                        hyperparameter_tuning=request.hyperparameter_tuning,
+                        # Reuse the CV winner instead of running a second grid search
+                        model_params=cv_results.get(model_name, {}).get("best_params"),
+                        n_jobs=cores,
+                        search_state_path=job_checkpoint.search_state_path(task_id, model_name),
+                        on_search_checkpoint=lambda: job_checkpoint.persist_search_state(task_id, model_name)
+                    )
+                    if model_name in cv_results:
+                        pipeline_result["metrics"]["cross_validation"] = cv_results[model_name]
                 
-                model_object = pipeline_result.pop("model") # Remove model object before serialization
-                model_id = f"{task_id}_{model_name}"
-                model_path = settings.MODELS_DIR / f"{model_id}.joblib"
-                joblib.dump(model_object, model_path)
+                    model_object = pipeline_result.pop("model") # Remove model object before serialization
+                    # Everything needed to score raw rows later (see PredictionService)
+                    inference_artifacts = {key: pipeline_result.pop(key) for key in INFERENCE_ARTIFACT_KEYS}
+                    model_id = f"{task_id}_{model_name}"
+                    model_path = settings.MODELS_DIR / f"{model_id}.joblib"
+                    joblib.dump(model_object, model_path)
+                    joblib.dump(inference_artifacts, inference_artifacts_path(model_id))
+                    # Model size is only known once dumped: count it, evicting if over quota
+                    storage_lifecycle.record_written(model_path.stat().st_size + inference_artifacts_path(model_id).stat().st_size)
+                    persist(model_key(model_id))
+                    persist(inference_artifacts_key(model_id))
+                    # Serving cost of what was just saved: size, cold load time, footprint
+                    inference_profile = pipeline_result["details"].get("inference_profile") or {}
+                    inference_profile["artifacts"] = profile_artifacts([model_path, inference_artifacts_path(model_id)])
+                    pipeline_result["details"]["inference_profile"] = inference_profile
                 
-                # The rest of the pipeline_result is already a clean dict
-                model_result_obj = ModelResult(model_id=model_id, **pipeline_result)
-                all_results[model_name] = model_result_obj.dict()
+                    # The rest of the pipeline_result is already a clean dict
+                    model_result_obj = ModelResult(model_id=model_id, **pipeline_result)
+                    all_results[model_name] = model_result_obj.dict()
+                    job_checkpoint.save_model_result(task_id, model_name, all_results[model_name])
+                    if dataset_hash:
+                        training_memo.store(dataset_hash, request, model_name, task_id, all_results[model_name])
 
+            # Keep the requested order, mixing memoized and freshly trained models
+            all_results = {name: all_results.get(name) or cached_results[name] for name in request.models}
             update_status("completed", progress="All models trained successfully.", results=all_results)
 
         except Exception as e:
             error_details = traceback.format_exc()
             print(f"TRAINING FAILED for task {task_id}:\n{error_details}")
             update_status("failed", progress=f"Error: {str(e)}", error=str(e))
+        finally:
+            # The job reached a final state; only a dead worker leaves its checkpoint behind
+            job_checkpoint.clear(task_id)
+            job_checkpoint.release(checkpoint_lock)
+            if upload_pin is not None:
+                storage_lifecycle.unpin(upload_pin)
 
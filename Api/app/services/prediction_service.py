@@ -0,0 +1,179 @@
+import io
+import json
+import os
+import uuid
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import joblib
+import numpy as np
+import pandas as pd
+from fastapi import BackgroundTasks, Depends
+
+from app.core.config import settings
+from app.pipelines.training_pipeline import _finalize_features
+from app.schemas.model import BatchPredictionRequest, PredictionRequest
+from app.services.file_service import FileService
+from app.services.micro_batcher import MicroBatcher
+from app.services.storage_backend import ensure_local, persist
+from app.services.storage_lifecycle import storage_lifecycle
+from app.services.task_status import create_task_status, update_task_status
+
+OUTPUT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def model_key(model_id: str) -> str:
+    return f"models/{model_id}.joblib"
+
+
+def inference_artifacts_key(model_id: str) -> str:
+    return f"models/{model_id}.inference.joblib"
+
+
+def inference_artifacts_path(model_id: str) -> Path:
+    return settings.MODELS_DIR / f"{model_id}.inference.joblib"
+
+
+def batch_output_key(task_id: str, output_format: str) -> str:
+    return f"reports/predictions/{task_id}.{output_format}"
+
+
+def batch_output_path(task_id: str, output_format: str) -> Path:
+    return settings.REPORTS_DIR / "predictions" / f"{task_id}.{output_format}"
+
+
+@lru_cache(maxsize=8)
+def _load_model(model_id: str) -> dict:
+    """Loads (and keeps in memory) a trained model together with its preprocessing."""
+    try:
+        model_path = ensure_local(model_key(model_id))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Model {model_id} not found.")
+    try:
+        artifacts_path = ensure_local(inference_artifacts_key(model_id))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Model {model_id} has no saved preprocessing; retrain it to enable predictions.")
+    loaded = joblib.load(artifacts_path)
+    loaded["model"] = joblib.load(model_path)
+    return loaded
+
+
+def _predict_chunk(loaded: dict, df: pd.DataFrame) -> np.ndarray:
+    """Scores raw rows: same column selection, preprocessing and label decoding as training."""
+    X = df.reindex(columns=loaded["feature_columns"])
+    X_processed = _finalize_features(loaded["preprocessor"].transform(X))
+    y_pred = loaded["model"].predict(X_processed)
+    return loaded["label_encoder"].inverse_transform(np.asarray(y_pred).ravel().astype(int))
+
+
+def _predict_rows(model_id: str, df: pd.DataFrame) -> np.ndarray:
+    storage_lifecycle.touch("models", model_id)
+    return _predict_chunk(_load_model(model_id), df)
+
+
+# One batcher per worker process: concurrent /predict calls for the same model
+# within PREDICT_BATCH_WINDOW_MS are scored together.
+prediction_batcher = MicroBatcher(
+    _predict_rows,
+    max_wait_ms=settings.PREDICT_BATCH_WINDOW_MS,
+    max_batch_rows=settings.PREDICT_MAX_BATCH_ROWS
+)
+
+
+def _format_chunk(predictions: np.ndarray, first_row: int, output_format: str, header: bool) -> bytes:
+    rows = np.arange(first_row, first_row + len(predictions))
+    if output_format == "ndjson":
+        return "".join(
+            json.dumps({"row": int(r), "prediction": p.item() if isinstance(p, np.generic) else p}) + "\n"
+            for r, p in zip(rows, predictions)
+        ).encode()
+    buffer = io.StringIO()
+    pd.DataFrame({"row": rows, "prediction": predictions}).to_csv(buffer, index=False, header=header)
+    return buffer.getvalue().encode()
+
+
+class PredictionService:
+    def __init__(self, file_service: FileService = Depends(FileService)):
+        self.file_service = file_service
+
+    async def predict(self, request: PredictionRequest) -> list:
+        """Scores a small JSON payload of rows, micro-batched with concurrent requests."""
+        predictions = await prediction_batcher.submit(request.model_id, pd.DataFrame(request.data))
+        return predictions.tolist()
+
+    def iter_predictions(self, model_id: str, chunks: Iterable[pd.DataFrame], output_format: str = "csv") -> Iterator[bytes]:
+        """
+        Scores an iterable of row chunks and returns an iterator of encoded output in
+        input order. The model is loaded eagerly so a bad model_id fails before any
+        response is streamed.
+        """
+        loaded = _load_model(model_id)
+        storage_lifecycle.touch("models", model_id)
+        return self._iter_scored_chunks(loaded, chunks, output_format)
+
+    def _iter_scored_chunks(self, loaded: dict, chunks: Iterable[pd.DataFrame], output_format: str) -> Iterator[bytes]:
+        """
+        Chunks are scored on a thread pool (the boosters and tree ensembles release
+        the GIL while predicting). At most two chunks per worker are in flight, so
+        memory stays bounded however large the input is.
+        """
+        n_workers = settings.BATCH_PREDICTION_WORKERS or os.cpu_count() or 1
+        pending = deque()
+        rows_done = 0
+
+        def drain_one():
+            nonlocal rows_done
+            chunk_len, future = pending.popleft()
+            encoded = _format_chunk(future.result(), rows_done, output_format, header=rows_done == 0)
+            rows_done += chunk_len
+            return encoded
+
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            for chunk in chunks:
+                pending.append((len(chunk), pool.submit(_predict_chunk, loaded, chunk)))
+                if len(pending) >= 2 * n_workers:
+                    yield drain_one()
+            while pending:
+                yield drain_one()
+        if rows_done == 0 and output_format == "csv":
+            yield b"row,prediction\n"
+
+    def iter_file_predictions(self, request: BatchPredictionRequest) -> Iterator[bytes]:
+        chunks = self.file_service.iter_dataframe_chunks(request.file_id, request.chunk_size)
+        return self.iter_predictions(request.model_id, chunks, request.output_format)
+
+    def start_batch_job(self, request: BatchPredictionRequest, background_tasks: BackgroundTasks) -> str:
+        # Fail fast on unknown models/files instead of inside the background task
+        _load_model(request.model_id)
+        self.file_service.ensure_exists(request.file_id)
+
+        task_id = str(uuid.uuid4())
+        create_task_status(task_id, progress="Batch prediction has been queued.")
+        background_tasks.add_task(self._run_batch_in_background, task_id, request)
+        return task_id
+
+    def _run_batch_in_background(self, task_id: str, request: BatchPredictionRequest):
+        output_path = batch_output_path(task_id, request.output_format)
+        try:
+            update_task_status(task_id, "running", progress="Scoring rows...")
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            partial_path = output_path.with_suffix(output_path.suffix + ".part")
+            with storage_lifecycle.pinned("models", request.model_id), \
+                    storage_lifecycle.pinned("uploads", request.file_id), \
+                    open(partial_path, 'wb') as out_file:
+                for encoded in self.iter_file_predictions(request):
+                    out_file.write(encoded)
+            os.replace(partial_path, output_path)
+            persist(batch_output_key(task_id, request.output_format))
+            update_task_status(
+                task_id, "completed", progress="Batch prediction finished.",
+                output_file=f"{task_id}.{request.output_format}"
+            )
+        except Exception as e:
+            error_details = traceback.format_exc()
+            print(f"BATCH PREDICTION FAILED for task {task_id}:\n{error_details}")
+            update_task_status(task_id, "failed", progress=f"Error: {str(e)}", error=str(e))
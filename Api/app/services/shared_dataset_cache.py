@@ -0,0 +1,197 @@
+import os
+import shutil
+import uuid
+import weakref
+from pathlib import Path
+
+import pandas as pd
+
+from app.core.config import settings
+from app.core.processes import pid_alive
+from app.services.columnar_store import STORE_DIRNAME, has_columnar_store, read_columnar_store, store_path
+
+# Copies of columnar stores kept in RAM-backed shared memory (/dev/shm). Each
+# entry mirrors an upload directory ({root}/{file_id}/.columnar), so it is read
+# with `read_columnar_store` and every worker process maps the same pages.
+REFS_DIRNAME = ".refs"
+STAGING_PREFIX = ".staging-"
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class SharedDatasetCache:
+    """
+    Cross-worker cache of loaded datasets in shared memory.
+
+    The first worker to load a dataset publishes its columnar store (numeric buffers
+    and dictionary-encoded string/categorical codes) into the cache; every worker
+    then attaches to it zero-copy instead of parsing or reading from disk.
+
+    A worker holds a reference for as long as a DataFrame attached from the cache is
+    alive (reference marker files under .refs, dropped when the frame is garbage
+    collected or its process dies). When the cache exceeds its size limit, least
+    recently attached entries without live references are evicted.
+    """
+
+    def __init__(self, root: Path = None, max_bytes: int = None):
+        self._root = root
+        self._max_bytes = max_bytes
+
+    @property
+    def root(self) -> Path:
+        if self._root is not None:
+            return Path(self._root)
+        if settings.SHARED_DATASET_CACHE_DIR is not None:
+            return Path(settings.SHARED_DATASET_CACHE_DIR)
+        return Path("/dev/shm/automl-datasets")
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes if self._max_bytes is not None else settings.SHARED_DATASET_CACHE_MAX_BYTES
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.root.parent.exists()
+
+    def _entry_dir(self, file_id: str) -> Path:
+        return self.root / file_id
+
+    # --- Reference counting ---
+    def _acquire(self, file_id: str) -> Path:
+        refs_dir = self.root / REFS_DIRNAME
+        refs_dir.mkdir(parents=True, exist_ok=True)
+        token = refs_dir / f"{file_id}@{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        token.touch()
+        return token
+
+    @staticmethod
+    def _release(token: Path):
+        try:
+            token.unlink()
+        except FileNotFoundError:
+            pass
+
+    def ref_count(self, file_id: str) -> int:
+        count = 0
+        for token in (self.root / REFS_DIRNAME).glob(f"{file_id}@*"):
+            if pid_alive(int(token.name.rsplit("@", 1)[1].split("-")[0])):
+                count += 1
+            else:
+                self._release(token)  # left behind by a dead worker
+        return count
+
+    # --- Attach / publish ---
+    def attach(self, file_id: str, columns: list = None) -> pd.DataFrame:
+        """
+        Returns the cached dataset as a DataFrame backed by shared memory, or None if
+        it is not cached. The reference is taken before reading, so a concurrent
+        eviction either sees it or has already removed the entry.
+        """
+        if not self.enabled:
+            return None
+        token = self._acquire(file_id)
+        entry = self._entry_dir(file_id)
+        try:
+            if not has_columnar_store(str(entry)):
+                self._release(token)
+                return None
+            df = read_columnar_store(str(entry), columns=columns)
+            os.utime(entry, None)  # LRU position
+        except (OSError, ValueError):
+            self._release(token)
+            raise
+        weakref.finalize(df, self._release, token)
+        return df
+
+    def publish(self, file_id: str, upload_dir: str) -> bool:
+        """
+        Copies the columnar store of `upload_dir` into the cache, evicting idle entries
+        if needed. Returns False when there is no store or it cannot fit.
+        """
+        if not self.enabled or not has_columnar_store(upload_dir):
+            return False
+        entry = self._entry_dir(file_id)
+        if has_columnar_store(str(entry)):
+            return True
+
+        size = _dir_size(Path(store_path(upload_dir)))
+        if not self._make_room(size, keep=file_id):
+            return False
+
+        staging = self.root / f"{STAGING_PREFIX}{file_id}-{uuid.uuid4().hex[:8]}"
+        try:
+            shutil.copytree(store_path(upload_dir), staging / STORE_DIRNAME)
+            os.rename(staging, entry)
+            return True
+        except OSError:
+            # Another worker published it first, or shared memory is full
+            return has_columnar_store(str(entry))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    # --- Eviction ---
+    def entries(self) -> list:
+        if not self.root.exists():
+            return []
+        result = []
+        for path in self.root.iterdir():
+            if path.name.startswith(".") or not path.is_dir():
+                continue
+            try:
+                result.append({
+                    "file_id": path.name,
+                    "bytes": _dir_size(path),
+                    "last_access": path.stat().st_mtime,
+                    "refs": self.ref_count(path.name),
+                })
+            except FileNotFoundError:
+                continue  # evicted while scanning
+        return result
+
+    def discard(self, file_id: str) -> bool:
+        """Removes an entry unless a live worker still references it."""
+        entry = self._entry_dir(file_id)
+        if not entry.exists() or self.ref_count(file_id):
+            return False
+        # Rename first so attaching workers never read a half-deleted entry
+        doomed = self.root / f"{STAGING_PREFIX}evict-{file_id}-{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(entry, doomed)
+        except OSError:
+            return False
+        shutil.rmtree(doomed, ignore_errors=True)
+        return True
+
+    def _make_room(self, incoming_bytes: int, keep: str = None) -> bool:
+        if incoming_bytes > self.max_bytes:
+            return False
+        entries = sorted(self.entries(), key=lambda e: e["last_access"])
+        total = sum(e["bytes"] for e in entries)
+        for entry in entries:
+            if total + incoming_bytes <= self.max_bytes:
+                break
+            if entry["file_id"] != keep and entry["refs"] == 0 and self.discard(entry["file_id"]):
+                total -= entry["bytes"]
+        return total + incoming_bytes <= self.max_bytes
+
+    def stats(self) -> dict:
+        entries = self.entries()
+        return {
+            "enabled": self.enabled,
+            "root": str(self.root),
+            "max_bytes": self.max_bytes,
+            "total_bytes": sum(e["bytes"] for e in entries),
+            "entries": entries,
+        }
+
+
+shared_dataset_cache = SharedDatasetCache()
@@ -0,0 +1,399 @@
+import asyncio
+import datetime
+import hashlib
+import hmac
+import os
+import shutil
+import threading
+import uuid
+import weakref
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator
+from urllib.parse import quote
+
+import aiofiles
+import aiofiles.os
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# Durable storage for uploads, model artifacts, task records and reports, addressed
+# by keys that mirror the local layout ("uploads/{file_id}/{name}", "models/...",
+# "task_status/{task_id}.json"). STORAGE_DIR always holds the working copy that
+# pandas, joblib and the memory-mapped stores read; with the S3 backend it is a
+# cache that can be evicted and re-fetched, with the local backend it is the store.
+
+READ_CHUNK_SIZE = 1024 * 1024
+S3_NAMESPACE = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+class StorageBackend:
+    """Async object storage interface. Every method is safe to await on the event loop."""
+
+    is_local = False
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def read(self, key: str, start: int = None, end: int = None) -> bytes:
+        """Reads a whole object, or the inclusive byte range [start, end]."""
+        raise NotImplementedError
+
+    async def iter_read(self, key: str, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Streams an object in ranged chunks without holding it in memory."""
+        total = await self.size(key)
+        for start in range(0, total, chunk_size):
+            yield await self.read(key, start, min(start + chunk_size, total) - 1)
+
+    async def write(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    async def write_stream(self, key: str, chunks: AsyncIterable[bytes]):
+        raise NotImplementedError
+
+    async def upload_file(self, key: str, path: Path):
+        await self.write_stream(key, _aiter_file(path))
+
+    async def download_to(self, key: str, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.part")
+        try:
+            async with aiofiles.open(partial, 'wb') as f:
+                async for chunk in self.iter_read(key):
+                    await f.write(chunk)
+            await aiofiles.os.replace(partial, path)
+        finally:
+            if await aiofiles.os.path.exists(partial):
+                await aiofiles.os.remove(partial)
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def list(self, prefix: str) -> list:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+async def _aiter_file(path: Path, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, 'rb') as f:
+        while chunk := await f.read(chunk_size):
+            yield chunk
+
+
+class LocalStorageBackend(StorageBackend):
+    """Objects are files under `root`; file I/O runs in the thread pool via aiofiles."""
+
+    is_local = True
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    async def exists(self, key: str) -> bool:
+        return await aiofiles.os.path.isfile(self.local_path(key))
+
+    async def size(self, key: str) -> int:
+        try:
+            return (await aiofiles.os.stat(self.local_path(key))).st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Object {key} not found.")
+
+    async def read(self, key: str, start: int = None, end: int = None) -> bytes:
+        try:
+            async with aiofiles.open(self.local_path(key), 'rb') as f:
+                if start is None:
+                    return await f.read()
+                await f.seek(start)
+                return await f.read(-1 if end is None else end - start + 1)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Object {key} not found.")
+
+    async def write(self, key: str, data: bytes):
+        async def single():
+            yield data
+        await self.write_stream(key, single())
+
+    async def write_stream(self, key: str, chunks: AsyncIterable[bytes]):
+        path = self.local_path(key)
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.part")
+        async with aiofiles.open(partial, 'wb') as f:
+            async for chunk in chunks:
+                await f.write(chunk)
+        await aiofiles.os.replace(partial, path)
+
+    async def upload_file(self, key: str, path: Path):
+        target = self.local_path(key)
+        if Path(path).resolve() != target.resolve():
+            await aiofiles.os.makedirs(target.parent, exist_ok=True)
+            await run_in_threadpool(shutil.copyfile, path, target)
+
+    async def download_to(self, key: str, path: Path):
+        source = self.local_path(key)
+        if Path(path).resolve() != source.resolve():
+            await super().download_to(key, path)
+
+    async def delete(self, key: str):
+        try:
+            await aiofiles.os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    async def list(self, prefix: str) -> list:
+        def walk():
+            keys = []
+            for root, _, files in os.walk(self.root):
+                for name in files:
+                    key = Path(root, name).relative_to(self.root).as_posix()
+                    if key.startswith(prefix):
+                        keys.append(key)
+            return sorted(keys)
+        return await run_in_threadpool(walk)
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    S3-compatible object storage (AWS S3, Cloudflare R2, MinIO) over plain HTTPS.
+
+    Requests are signed with AWS Signature V4 (unsigned payloads) and sent through a
+    pooled httpx client, one per event loop. Uploads larger than `part_size` use
+    multipart uploads fed from a stream, so memory stays bounded by one part; reads
+    use HTTP Range requests.
+    """
+
+    def __init__(
+        self, endpoint_url: str, bucket: str, access_key_id: str, secret_access_key: str,
+        region: str = "auto", max_connections: int = 20, part_size: int = 8 * 1024 * 1024,
+        transport: httpx.AsyncBaseTransport = None
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.part_size = part_size
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._transport = transport
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self._limits, timeout=httpx.Timeout(60.0), transport=self._transport)
+            self._clients[loop] = client
+        return client
+
+    # --- Signing ---
+    def _signed_headers(self, method: str, path: str, query: str, headers: dict) -> dict:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = now.strftime("%Y%m%d")
+        host = httpx.URL(self.endpoint_url).netloc.decode()
+        signed = {"host": host, "x-amz-date": amz_date, "x-amz-content-sha256": "UNSIGNED-PAYLOAD"}
+        signed_names = ";".join(sorted(signed))
+        canonical_request = "\n".join([
+            method, path, query,
+            "".join(f"{name}:{signed[name]}\n" for name in sorted(signed)),
+            signed_names, "UNSIGNED-PAYLOAD",
+        ])
+        scope = f"{datestamp}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+        ])
+        key = f"AWS4{self.secret_access_key}".encode()
+        for part in (datestamp, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        return {
+            **headers,
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": "UNSIGNED-PAYLOAD",
+            "Authorization": (
+                f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+                f"SignedHeaders={signed_names}, Signature={signature}"
+            ),
+        }
+
+    async def _request(self, method: str, key: str = "", params: dict = None, headers: dict = None,
+                       content=None, allow_missing: bool = False) -> httpx.Response:
+        # Path-style addressing works with every S3-compatible service
+        path = f"/{quote(self.bucket)}/{quote(key, safe='/~')}" if key else f"/{quote(self.bucket)}"
+        query = "&".join(
+            f"{quote(str(k), safe='~')}={quote(str(v), safe='~')}" for k, v in sorted((params or {}).items())
+        )
+        url = f"{self.endpoint_url}{path}" + (f"?{query}" if query else "")
+        response = await self._client().request(
+            method, url, headers=self._signed_headers(method, path, query, headers or {}), content=content
+        )
+        if response.status_code == 404 and not allow_missing:
+            raise FileNotFoundError(f"Object {key} not found.")
+        if response.status_code >= 400 and response.status_code != 404:
+            raise IOError(f"S3 {method} {key} failed with {response.status_code}: {response.text[:200]}")
+        return response
+
+    # --- Object operations ---
+    async def exists(self, key: str) -> bool:
+        return (await self._request("HEAD", key, allow_missing=True)).status_code == 200
+
+    async def size(self, key: str) -> int:
+        return int((await self._request("HEAD", key)).headers["content-length"])
+
+    async def read(self, key: str, start: int = None, end: int = None) -> bytes:
+        headers = {}
+        if start is not None:
+            headers["Range"] = f"bytes={start}-" + ("" if end is None else str(end))
+        return (await self._request("GET", key, headers=headers)).content
+
+    async def write(self, key: str, data: bytes):
+        await self._request("PUT", key, content=data)
+
+    async def write_stream(self, key: str, chunks: AsyncIterable[bytes]):
+        buffer = bytearray()
+        upload_id, parts = None, []
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                while len(buffer) >= self.part_size:
+                    if upload_id is None:
+                        upload_id = await self._create_multipart_upload(key)
+                    parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer[:self.part_size])))
+                    del buffer[:self.part_size]
+            if upload_id is None:
+                # Small object: one PUT
+                await self.write(key, bytes(buffer))
+                return
+            if buffer:
+                parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+            await self._complete_multipart_upload(key, upload_id, parts)
+        except BaseException:
+            if upload_id is not None:
+                await self._request("DELETE", key, params={"uploadId": upload_id}, allow_missing=True)
+            raise
+
+    async def _create_multipart_upload(self, key: str) -> str:
+        root = ET.fromstring((await self._request("POST", key, params={"uploads": ""})).content)
+        return root.findtext(f"{S3_NAMESPACE}UploadId") or root.findtext("UploadId")
+
+    async def _upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> tuple:
+        response = await self._request("PUT", key, params={"partNumber": number, "uploadId": upload_id}, content=data)
+        return number, response.headers["etag"]
+
+    async def _complete_multipart_upload(self, key: str, upload_id: str, parts: list):
+        body = "<CompleteMultipartUpload>" + "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>" for number, etag in parts
+        ) + "</CompleteMultipartUpload>"
+        await self._request("POST", key, params={"uploadId": upload_id}, content=body.encode())
+
+    async def delete(self, key: str):
+        await self._request("DELETE", key, allow_missing=True)
+
+    async def list(self, prefix: str) -> list:
+        keys, token = [], None
+        while True:
+            params = {"list-type": 2, "prefix": prefix}
+            if token:
+                params["continuation-token"] = token
+            root = ET.fromstring((await self._request("GET", params=params)).content)
+            # Some S3-compatible services omit the namespace
+            ns = S3_NAMESPACE if root.tag.startswith(S3_NAMESPACE) else ""
+            keys.extend(element.findtext(f"{ns}Key") for element in root.iter(f"{ns}Contents"))
+            token = root.findtext(f"{ns}NextContinuationToken")
+            if root.findtext(f"{ns}IsTruncated") != "true" or not token:
+                return keys
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        for client_loop, client in list(self._clients.items()):
+            if client_loop is loop:
+                await client.aclose()
+            elif client_loop.is_running():
+                # e.g. the client of run_sync's background loop: close it on its own loop
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), client_loop))
+        self._clients.clear()
+
+
+@lru_cache(maxsize=1)
+def get_storage_backend() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3StorageBackend(
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            bucket=settings.S3_BUCKET,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            region=settings.S3_REGION,
+            max_connections=settings.S3_MAX_CONNECTIONS,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+        )
+    return LocalStorageBackend(settings.STORAGE_DIR)
+
+
+# --- Helpers for synchronous code (background jobs, pipelines) ---
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """One event loop per process, on a daemon thread, shared by every `run_sync` call."""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="storage-backend-sync", daemon=True).start()
+            _sync_loop = loop
+    return _sync_loop
+
+
+def run_sync(async_fn, *args):
+    """
+    Runs a backend coroutine from synchronous code (threadpool handlers, background
+    jobs, pipelines) on a dedicated background event loop, so the pooled client bound
+    to that loop stays valid across calls. Raises RuntimeError on a thread running an
+    event loop, which it would block: await the backend method there instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run_coroutine_threadsafe(async_fn(*args), _get_sync_loop()).result()
+    raise RuntimeError("run_sync() cannot be called from a running event loop; await the backend call instead.")
+
+
+def local_path(key: str) -> Path:
+    """Working copy of an object under STORAGE_DIR."""
+    return settings.STORAGE_DIR / key
+
+
+def persist(key: str):
+    """Pushes the working copy of `key` to the backend; a no-op for local storage."""
+    backend = get_storage_backend()
+    if not backend.is_local:
+        run_sync(backend.upload_file, key, local_path(key))
+
+
+def ensure_local(key: str) -> Path:
+    """
+    Returns the working copy of `key`, fetching it from the backend first if it was
+    never local here or has been evicted. Raises FileNotFoundError if it does not exist.
+    """
+    path = local_path(key)
+    backend = get_storage_backend()
+    if not path.exists() and not backend.is_local:
+        run_sync(backend.download_to, key, path)
+    if not path.exists():
+        raise FileNotFoundError(f"Object {key} not found.")
+    return path
+
+
+def list_keys(prefix: str) -> list:
+    backend = get_storage_backend()
+    return run_sync(backend.list, prefix)
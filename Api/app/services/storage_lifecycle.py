@@ -0,0 +1,311 @@
+import asyncio
+import fcntl
+import glob
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.processes import pid_alive
+from app.services.columnar_store import STORE_DIRNAME
+from app.services.shared_dataset_cache import shared_dataset_cache
+
+# Eviction order under disk pressure: cheapest to lose first. Within a category
+# the least recently used entry goes first.
+CATEGORY_PRIORITY = ["caches", "reports", "task_status", "uploads", "models"]
+ACTIVE_TASK_STATES = {"queued", "running"}
+# Last-access times are recorded at most this often per entry.
+TOUCH_INTERVAL_SECONDS = 60
+# `ensure_capacity` trusts this process's running usage total (refreshed by every
+# compaction) for this long before walking the storage tree again; writes by other
+# workers are picked up by the next walk.
+USAGE_REFRESH_SECONDS = 60
+
+
+def _path_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class StorageLifecycleManager:
+    """
+    Tracks disk usage of the storage directories and evicts old or cold entries.
+
+    Entries are grouped by category (uploads, caches, models, reports, task_status).
+    The last access of an entry is its mtime, refreshed through `touch`. An entry is
+    never evicted while it is pinned: pins are marker files under STORAGE_DIR/.pins,
+    held either by a live process (a running job) or persistently (a model in use).
+    Task records of queued or running jobs are never evicted either.
+    """
+
+    def __init__(self):
+        self._last_touch = {}
+        self._usage_bytes = None
+        self._usage_measured_at = 0.0
+
+    # --- Paths ---
+    @property
+    def pins_dir(self) -> Path:
+        return settings.STORAGE_DIR / ".pins"
+
+    def _entries(self, category: str) -> list:
+        """Returns [(key, primary path, [paths to delete])] for one category."""
+        entries = []
+        if category in ("uploads", "caches"):
+            if not settings.UPLOADS_DIR.exists():
+                return []
+            for upload_dir in settings.UPLOADS_DIR.iterdir():
+                if not upload_dir.is_dir():
+                    continue
+                store = upload_dir / STORE_DIRNAME
+                if category == "caches":
+                    if store.exists():
+                        entries.append((upload_dir.name, upload_dir, [store]))
+                else:
+                    entries.append((upload_dir.name, upload_dir, [upload_dir]))
+        elif category == "models":
+            groups = {}
+            if settings.MODELS_DIR.exists():
+                for path in settings.MODELS_DIR.iterdir():
+                    groups.setdefault(path.name.split(".")[0], []).append(path)
+            entries = [(key, paths[0], paths) for key, paths in groups.items()]
+        elif category == "reports":
+            if settings.REPORTS_DIR.exists():
+                for path in settings.REPORTS_DIR.iterdir():
+                    children = list(path.iterdir()) if path.is_dir() else [path]
+                    for child in children:
+                        key = f"{path.name}/{child.name}" if path.is_dir() else path.name
+                        entries.append((key, child, [child]))
+        elif category == "task_status":
+            if settings.TASK_STATUS_DIR.exists():
+                entries = [(path.stem, path, [path]) for path in settings.TASK_STATUS_DIR.glob("*.json")]
+        return entries
+
+    def _describe(self, category: str, key: str, primary: Path, paths: list) -> dict:
+        if category == "uploads":
+            size = sum(_path_size(p) for p in primary.iterdir() if p.name != STORE_DIRNAME)
+        else:
+            size = sum(_path_size(p) for p in paths if p.exists())
+        last_access = max(p.stat().st_mtime for p in [primary, *paths] if p.exists())
+        return {"category": category, "key": key, "bytes": size, "last_access": last_access, "paths": paths}
+
+    def list_entries(self) -> list:
+        entries = []
+        for category in CATEGORY_PRIORITY:
+            for key, primary, paths in self._entries(category):
+                try:
+                    entries.append(self._describe(category, key, primary, paths))
+                except FileNotFoundError:
+                    continue  # removed while scanning
+        return entries
+
+    # --- Access tracking ---
+    def touch(self, category: str, key: str):
+        """Records an access so LRU eviction keeps hot entries (throttled per entry)."""
+        now = time.time()
+        if now - self._last_touch.get((category, key), 0) < TOUCH_INTERVAL_SECONDS:
+            return
+        self._last_touch[(category, key)] = now
+        for entry_key, primary, paths in self._entries_for(category, key):
+            for path in [primary, *paths]:
+                try:
+                    os.utime(path, None)
+                except OSError:
+                    pass
+
+    def _entries_for(self, category: str, key: str) -> list:
+        if category in ("uploads", "caches"):
+            upload_dir = settings.UPLOADS_DIR / key
+            return [(key, upload_dir, [])] if upload_dir.exists() else []
+        if category == "models":
+            paths = list(settings.MODELS_DIR.glob(f"{glob.escape(key)}.*"))
+            return [(key, paths[0], paths)] if paths else []
+        return [e for e in self._entries(category) if e[0] == key]
+
+    def has_entry(self, category: str, key: str) -> bool:
+        return bool(self._entries_for(category, key))
+
+    # --- Pinning ---
+    def pin(self, category: str, key: str, persistent: bool = False) -> Path:
+        """
+        Protects an entry from eviction. Process pins disappear with the process that
+        created them; persistent pins stay until `unpin` is called.
+        """
+        pin_dir = self.pins_dir / category
+        pin_dir.mkdir(parents=True, exist_ok=True)
+        owner = "persistent" if persistent else f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        token = pin_dir / f"{key}@{owner}"
+        token.touch()
+        return token
+
+    def unpin(self, token: Path):
+        try:
+            token.unlink()
+        except FileNotFoundError:
+            pass
+
+    def unpin_persistent(self, category: str, key: str):
+        self.unpin(self.pins_dir / category / f"{key}@persistent")
+
+    @contextmanager
+    def pinned(self, category: str, key: str):
+        token = self.pin(category, key)
+        try:
+            yield
+        finally:
+            self.unpin(token)
+
+    def is_pinned(self, category: str, key: str) -> bool:
+        # Caches belong to their upload, so pinning the upload protects its cache too
+        categories = ["uploads", "caches"] if category in ("uploads", "caches") else [category]
+        for pin_category in categories:
+            # Escaped so a key like "*" only matches its own pins
+            for token in (self.pins_dir / pin_category).glob(f"{glob.escape(key)}@*"):
+                owner = token.name.rsplit("@", 1)[1]
+                if owner == "persistent" or pid_alive(int(owner.split("-")[0])):
+                    return True
+                self.unpin(token)  # left behind by a dead process
+        if category == "task_status":
+            try:
+                with open(settings.TASK_STATUS_DIR / f"{key}.json") as f:
+                    return json.load(f).get("status") in ACTIVE_TASK_STATES
+            except (OSError, ValueError):
+                return False
+        return False
+
+    # --- Usage & eviction ---
+    def usage(self) -> dict:
+        categories = {c: {"bytes": 0, "entries": 0, "pinned": 0} for c in CATEGORY_PRIORITY}
+        for entry in self.list_entries():
+            stats = categories[entry["category"]]
+            stats["bytes"] += entry["bytes"]
+            stats["entries"] += 1
+            stats["pinned"] += int(self.is_pinned(entry["category"], entry["key"]))
+        total = sum(c["bytes"] for c in categories.values())
+        disk = shutil.disk_usage(settings.STORAGE_DIR) if settings.STORAGE_DIR.exists() else None
+        return {
+            "categories": categories,
+            "total_bytes": total,
+            "quota_bytes": settings.STORAGE_QUOTA_BYTES,
+            "quota_used_pct": round(100.0 * total / settings.STORAGE_QUOTA_BYTES, 2),
+            "disk_free_bytes": disk.free if disk else None,
+            "shared_dataset_cache": shared_dataset_cache.stats(),
+        }
+
+    def _evict(self, entry: dict) -> bool:
+        if not any(path.exists() for path in entry["paths"]):
+            return False  # already gone, e.g. a cache removed with its upload
+        # Re-check right before deleting: a job may have pinned it since the scan.
+        if self.is_pinned(entry["category"], entry["key"]):
+            return False
+        if entry["category"] in ("uploads", "caches"):
+            shared_dataset_cache.discard(entry["key"])
+        for path in entry["paths"]:
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            elif path.exists():
+                path.unlink()
+        print(f"Storage lifecycle evicted {entry['category']}/{entry['key']} ({entry['bytes']} bytes)")
+        return True
+
+    def compact(self, incoming_bytes: int = 0) -> dict:
+        """
+        One eviction pass: first everything past its category TTL, then least recently
+        used entries (cheapest categories first) until usage plus `incoming_bytes` is
+        below the low watermark, if it was above the quota. Only one worker runs a pass
+        at a time; concurrent callers return immediately.
+        """
+        settings.STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(settings.STORAGE_DIR / ".compaction.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return {"skipped": "another compaction is running", "evicted": [], "freed_bytes": 0}
+
+            now = time.time()
+            evicted = []
+            entries = self.list_entries()
+
+            remaining = []
+            for entry in entries:
+                ttl_hours = settings.STORAGE_TTL_HOURS.get(entry["category"])
+                expired = ttl_hours is not None and now - entry["last_access"] > ttl_hours * 3600
+                if expired and self._evict(entry):
+                    evicted.append({**entry, "reason": "ttl"})
+                else:
+                    remaining.append(entry)
+
+            total = sum(e["bytes"] for e in remaining) + incoming_bytes
+            if total > settings.STORAGE_QUOTA_BYTES:
+                target = settings.STORAGE_QUOTA_BYTES * settings.STORAGE_LOW_WATERMARK
+                remaining.sort(key=lambda e: (CATEGORY_PRIORITY.index(e["category"]), e["last_access"]))
+                for entry in remaining:
+                    if total <= target:
+                        break
+                    if not any(path.exists() for path in entry["paths"]):
+                        total -= entry["bytes"]
+                        continue
+                    if self._evict(entry):
+                        evicted.append({**entry, "reason": "quota"})
+                        total -= entry["bytes"]
+
+            self._record_usage(total - incoming_bytes)
+            return {
+                "evicted": [{k: e[k] for k in ("category", "key", "bytes", "reason")} for e in evicted],
+                "freed_bytes": sum(e["bytes"] for e in evicted),
+            }
+
+    def _record_usage(self, total_bytes: int):
+        self._usage_bytes = total_bytes
+        self._usage_measured_at = time.time()
+
+    def ensure_capacity(self, incoming_bytes: int = 0):
+        """
+        Makes room before a write of `incoming_bytes`. Checks a running usage total,
+        so the storage tree is walked at most once per USAGE_REFRESH_SECONDS.
+        """
+        self._refresh_usage()
+        if self._usage_bytes + incoming_bytes > settings.STORAGE_QUOTA_BYTES:
+            self.compact(incoming_bytes)
+        self._usage_bytes += incoming_bytes
+
+    def record_written(self, written_bytes: int):
+        """
+        Accounts for a write whose size was only known once it was done (e.g. a
+        joblib dump), compacting right away if it took usage over the quota.
+        """
+        self._refresh_usage()
+        self._usage_bytes += written_bytes
+        if self._usage_bytes > settings.STORAGE_QUOTA_BYTES:
+            self.compact()
+
+    def _refresh_usage(self):
+        if self._usage_bytes is None or time.time() - self._usage_measured_at > USAGE_REFRESH_SECONDS:
+            self._record_usage(sum(e["bytes"] for e in self.list_entries()))
+
+
+storage_lifecycle = StorageLifecycleManager()
+
+
+async def run_periodic_compaction():
+    """Background loop started with the app; runs a compaction pass off the event loop."""
+    while True:
+        await asyncio.sleep(settings.STORAGE_COMPACTION_INTERVAL_MINUTES * 60)
+        try:
+            await run_in_threadpool(storage_lifecycle.compact)
+        except Exception as e:
+            print(f"Storage compaction failed: {e}")
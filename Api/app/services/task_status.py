@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+from app.core.config import settings
+from app.schemas.model import StatusResponse
+from app.services.storage_backend import get_storage_backend, persist
+
+# Background jobs (training, batch prediction) record their progress as one JSON
+# file per task in TASK_STATUS_DIR, which every worker process can read, and
+# persist it to the storage backend so other instances can read it too.
+
+
+def status_key(task_id: str) -> str:
+    return f"task_status/{task_id}.json"
+
+
+def status_path(task_id: str) -> Path:
+    return settings.TASK_STATUS_DIR / f"{task_id}.json"
+
+
+def create_task_status(task_id: str, progress: str, **extra) -> dict:
+    """Writes the initial `queued` record for a new task."""
+    data = StatusResponse(task_id=task_id, status="queued", progress=progress, **extra).dict()
+    with open(status_path(task_id), 'w') as f:
+        json.dump(data, f, indent=4)
+    persist(status_key(task_id))
+    return data
+
+
+def update_task_status(task_id: str, status: str, progress: str = None, results: dict = None, error: str = None, **extra):
+    """Updates a task record in place; fields left as None keep their current value."""
+    with open(status_path(task_id), 'r+') as f:
+        data = json.load(f)
+        data['status'] = status
+        if progress: data['progress'] = progress
+        if results: data['results'] = results
+        if error: data['error'] = error
+        data.update({k: v for k, v in extra.items() if v is not None})
+        f.seek(0)
+        json.dump(data, f, indent=4)
+        f.truncate()
+    persist(status_key(task_id))
+
+
+def read_task_status(task_id: str) -> dict:
+    """Returns the task record, or None if the task does not exist."""
+    path = status_path(task_id)
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+async def read_task_status_async(task_id: str) -> dict:
+    """Like `read_task_status`, for request handlers: reads from the backend off the event loop."""
+    try:
+        return json.loads(await get_storage_backend().read(status_key(task_id)))
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+
+from app.schemas.model import TrainingRequest
+from app.services.prediction_service import inference_artifacts_key, model_key
+from app.services.storage_backend import ensure_local, local_path, persist
+from app.services.storage_lifecycle import storage_lifecycle
+
+# Persistent memo of trained models: one JSON record per (dataset content,
+# model, training configuration) pointing at the saved artifacts and holding the
+# ModelResult. Bump MEMO_VERSION whenever the training pipeline's output changes,
+# so results from older code are not served.
+MEMO_VERSION = 5
+HASH_SIDECAR = ".content_sha256"
+
+
+def dataset_content_hash(data_file: str) -> str:
+    """SHA-256 of the uploaded file, cached next to it since uploads never change."""
+    sidecar = os.path.join(os.path.dirname(data_file), HASH_SIDECAR)
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            return f.read().strip()
+    digest = hashlib.sha256()
+    with open(data_file, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    with open(sidecar, 'w') as f:
+        f.write(digest.hexdigest())
+    return digest.hexdigest()
+
+
+def config_hash(request: TrainingRequest, model_name: str) -> str:
+    """Canonical hash of everything besides the data that determines one model's result."""
+    config = {
+        "version": MEMO_VERSION,
+        "model": model_name,
+        "target_column": request.target_column,
+        "test_size": request.test_size,
+        "hyperparameter_tuning": request.hyperparameter_tuning,
+        "cv_folds": request.cv_folds,
+        "preprocessing_config": request.preprocessing_config.dict(),
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _memo_key(dataset_hash: str, request: TrainingRequest, model_name: str) -> str:
+    digest = hashlib.sha256(f"{dataset_hash}:{config_hash(request, model_name)}".encode()).hexdigest()
+    return f"memo/{digest}.json"
+
+
+def lookup(dataset_hash: str, request: TrainingRequest, model_name: str) -> dict:
+    """
+    Returns the memoized ModelResult dict for this model, or None. A record whose model
+    artifacts no longer exist (e.g. evicted) counts as a miss.
+    """
+    try:
+        with open(ensure_local(_memo_key(dataset_hash, request, model_name))) as f:
+            record = json.load(f)
+        model_id = record["model_result"]["model_id"]
+        ensure_local(model_key(model_id))
+        ensure_local(inference_artifacts_key(model_id))
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    storage_lifecycle.touch("models", model_id)
+    result = record["model_result"]
+    result["details"]["memo"] = {"hit": True, "trained_by_task": record["task_id"]}
+    return result
+
+
+def store(dataset_hash: str, request: TrainingRequest, model_name: str, task_id: str, model_result: dict):
+    key = _memo_key(dataset_hash, request, model_name)
+    path = local_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".part")
+    with open(partial, 'w') as f:
+        json.dump({"task_id": task_id, "model_result": model_result}, f)
+    os.replace(partial, path)
+    persist(key)
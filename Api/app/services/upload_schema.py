@@ -0,0 +1,74 @@
+import json
+import os
+import uuid
+import pandas as pd
+
+# Column types of a CSV upload, inferred once when it is uploaded and saved next
+# to the file. Later reads pass them to the C parser as explicit `dtype` and
+# `na_values` arguments, so they skip type inference and always produce the same
+# dtypes (downcast integers, float32, categorical levels) as the first parse.
+SCHEMA_FILENAME = ".schema.json"
+SCHEMA_VERSION = 1
+
+# Fields read as missing: pandas' default NA strings plus " ", which the
+# analysis services used to replace by hand after every load.
+NA_TOKENS = [
+    "", " ", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def csv_read_options() -> dict:
+    """NA handling shared by every CSV parse, with or without a saved schema."""
+    return {"na_values": NA_TOKENS, "keep_default_na": False}
+
+
+def infer_schema(df: pd.DataFrame) -> dict:
+    """
+    Schema of a parsed and dtype-optimized upload (see `optimize_dtypes`): the
+    dtype of each column and the levels of categorical columns.
+    """
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        entry = {"name": col, "dtype": str(series.dtype)}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry["categories"] = series.dtype.categories.tolist()
+            entry["ordered"] = bool(series.dtype.ordered)
+        columns.append(entry)
+    return {"version": SCHEMA_VERSION, "na_values": NA_TOKENS, "columns": columns}
+
+
+def save_schema(schema: dict, upload_dir: str):
+    # Write-then-rename so concurrent readers never see a partial file
+    path = os.path.join(upload_dir, SCHEMA_FILENAME)
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(schema, f)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Could not save schema for {upload_dir}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_schema(upload_dir: str) -> dict:
+    """The saved schema of an upload, or None (not a CSV, uploaded before schemas, or unreadable)."""
+    try:
+        with open(os.path.join(upload_dir, SCHEMA_FILENAME), "r") as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return schema if schema.get("version") == SCHEMA_VERSION else None
+
+
+def pinned_read_options(schema: dict) -> dict:
+    """`pd.read_csv` arguments that reproduce the schema's dtypes without inferring them."""
+    dtypes = {}
+    for entry in schema["columns"]:
+        if entry["dtype"] == "category":
+            dtypes[entry["name"]] = pd.CategoricalDtype(entry["categories"], ordered=entry.get("ordered", False))
+        else:
+            dtypes[entry["name"]] = entry["dtype"]
+    return {"dtype": dtypes, "na_values": schema["na_values"], "keep_default_na": False, "engine": "c"}
@@ -0,0 +1,76 @@
+"""
+Measures API worker cold start: time to import the app and resident memory afterwards.
+
+Each measurement runs in a fresh interpreter so nothing is cached between runs.
+
+Usage (from the Api/ directory):
+    python -m benchmarks.cold_start            # lazy imports (default worker)
+    python -m benchmarks.cold_start --preload  # what a worker inherits with PRELOAD_ML_LIBRARIES
+    python -m benchmarks.cold_start --repeat 5 --first-model xgboost
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["shap", "xgboost", "lightgbm", "catboost", "matplotlib", "numba"]
+
+_PROBE = """
+import json, resource, sys, time
+preload, first_model = {preload!r}, {first_model!r}
+start = time.perf_counter()
+if preload:
+    from app.pipelines.model_registry import preload as _preload
+    _preload()
+import app.main
+import_seconds = time.perf_counter() - start
+first_model_seconds = None
+if first_model:
+    from app.pipelines.model_registry import MODELS
+    start = time.perf_counter()
+    MODELS[first_model]()
+    first_model_seconds = time.perf_counter() - start
+print(json.dumps({{
+    "import_seconds": import_seconds,
+    "first_model_seconds": first_model_seconds,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules_loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure_once(preload: bool, first_model: str = None) -> dict:
+    code = _PROBE.format(preload=preload, first_model=first_model, heavy=HEAVY_MODULES)
+    env = dict(os.environ)
+    env.setdefault("API_KEY", "benchmark")
+    api_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=api_dir, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preload", action="store_true", help="Import the full ML stack before the app.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of fresh interpreters to sample.")
+    parser.add_argument("--first-model", default=None, help="Also time the first construction of this model.")
+    args = parser.parse_args()
+
+    runs = [measure_once(args.preload, args.first_model) for _ in range(args.repeat)]
+    summary = {
+        "mode": "preload" if args.preload else "lazy",
+        "import_seconds_median": statistics.median(r["import_seconds"] for r in runs),
+        "max_rss_mb_median": statistics.median(r["max_rss_mb"] for r in runs),
+        "heavy_modules_loaded": runs[-1]["heavy_modules_loaded"],
+    }
+    if args.first_model:
+        summary["first_model_seconds_median"] = statistics.median(r["first_model_seconds"] for r in runs)
+    print(json.dumps(summary, indent=4))
+
+
+if __name__ == "__main__":
+    main()
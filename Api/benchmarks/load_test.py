@@ -0,0 +1,323 @@
+"""
+Load test: replays the Flutter client's traffic mix against the API and reports
+throughput and latency percentiles per route, error and 429 rates, and event-loop lag.
+
+By default the app is served in-process by uvicorn on a free localhost port, with a
+monitor on the server's event loop: any handler that blocks the loop shows up as
+loop lag. With --url the harness targets an already running server instead (e.g.
+gunicorn with several workers); a canary GET / every 100 ms then stands in for the
+loop-lag probe.
+
+Scenarios (weights set with --mix):
+    browse   upload a dataset, scroll the preview, open several charts, run the EDA
+    analyze  preview/visualize/EDA calls against a dataset uploaded during setup
+    train    upload, start a training job, poll /model/status every second until done
+    predict  /model/predict calls against a model trained during setup
+
+Usage (from the Api/ directory):
+    python -m benchmarks.load_test --users 20 --duration 60
+    python -m benchmarks.load_test --mix analyze=8,browse=2,train=1 --users 50
+    python -m benchmarks.load_test --url http://localhost:8000 --users 100 --output report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+import pandas as pd
+
+DEFAULT_MIX = "analyze=6,browse=2,predict=2,train=1"
+CANARY_INTERVAL_SECONDS = 0.1
+
+
+class Recorder:
+    """Latency samples and outcomes per route template."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, seconds: float, status):
+        self.samples[route].append(seconds)
+        self.statuses[route][status] += 1
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            statuses = self.statuses[route]
+            count = len(samples)
+            errors = sum(n for status, n in statuses.items() if status == "exception" or status >= 500)
+            ms = np.array(samples) * 1000
+            routes[route] = {
+                "requests": count,
+                "throughput_rps": round(count / elapsed, 2),
+                "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                "p95_ms": round(float(np.percentile(ms, 95)), 1),
+                "p99_ms": round(float(np.percentile(ms, 99)), 1),
+                "max_ms": round(float(ms.max()), 1),
+                "error_rate": round(errors / count, 4),
+                "rate_limited_rate": round(statuses.get(429, 0) / count, 4),
+                "statuses": {str(status): n for status, n in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+            }
+        total = sum(len(s) for route, s in self.samples.items() if route != "canary")
+        return {"elapsed_seconds": round(elapsed, 1), "total_requests": total,
+                "throughput_rps": round(total / elapsed, 2), "routes": routes}
+
+
+class Client:
+    def __init__(self, http: httpx.AsyncClient, recorder: Recorder):
+        self.http = http
+        self.recorder = recorder
+
+    async def request(self, method: str, route: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(route, time.perf_counter() - start, "exception")
+            return None
+        self.recorder.record(route, time.perf_counter() - start, response.status_code)
+        return response
+
+
+# --- Scenarios ---
+async def upload(client: Client, dataset: bytes, filename: str) -> str:
+    response = await client.request("POST", "POST /upload", "/api/upload", files={"file": (filename, dataset, "text/csv")})
+    return response.json()["file_id"] if response is not None and response.status_code == 200 else None
+
+
+async def analyze(client: Client, ctx: dict, file_id: str = None, views: int = 5):
+    file_id = file_id or ctx["file_id"]
+    etag = None
+    for _ in range(views):
+        # The app re-requests the preview while scrolling; it revalidates with its ETag
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await client.request("GET", "GET /analysis/preview/{file_id}", f"/api/analysis/preview/{file_id}", headers=headers)
+        if response is not None and response.status_code == 200:
+            etag = response.headers.get("etag")
+        col1 = random.choice(ctx["columns"])
+        col2 = random.choice(ctx["numeric_columns"] + [None])
+        params = {"col1": col1, **({"col2": col2} if col2 and col2 != col1 else {})}
+        await client.request("GET", "GET /analysis/visualize/{file_id}", f"/api/analysis/visualize/{file_id}", params=params)
+    await client.request("GET", "GET /analysis/eda/{file_id}", f"/api/analysis/eda/{file_id}",
+                         params={"target_column": ctx["target"]})
+
+
+async def browse(client: Client, ctx: dict):
+    file_id = await upload(client, ctx["dataset"], ctx["filename"])
+    if file_id:
+        await analyze(client, ctx, file_id, views=3)
+
+
+async def train(client: Client, ctx: dict):
+    file_id = await upload(client, ctx["dataset"], ctx["filename"])
+    if not file_id:
+        return
+    response = await client.request("POST", "POST /model/train", "/api/model/train", json={
+        "file_id": file_id, "target_column": ctx["target"], "models": ctx["models"],
+    })
+    if response is None or response.status_code != 200:
+        return
+    task_id = response.json()["task_id"]
+    for _ in range(ctx["max_polls"]):
+        response = await client.request("GET", "GET /model/status/{task_id}", f"/api/model/status/{task_id}")
+        if response is not None and response.status_code == 200 and response.json()["status"] in ("completed", "failed"):
+            return
+        await asyncio.sleep(1.0)
+
+
+async def predict(client: Client, ctx: dict):
+    if not ctx.get("model_id"):
+        return
+    rows = ctx["rows"].sample(random.randint(1, 5)).to_dict(orient="records")
+    await client.request("POST", "POST /model/predict", "/api/model/predict", json={"model_id": ctx["model_id"], "data": rows})
+
+
+SCENARIOS = {"analyze": analyze, "browse": browse, "train": train, "predict": predict}
+
+
+# --- Setup and drivers ---
+async def prepare(http: httpx.AsyncClient, args) -> dict:
+    """Uploads the shared dataset (and trains the model used by `predict`) outside the measurement."""
+    with open(args.dataset, "rb") as f:
+        dataset = f.read()
+    df = pd.read_csv(args.dataset, nrows=2000)
+    target = args.target or df.columns[-1]
+    features = df.drop(columns=[target])
+    ctx = {
+        "dataset": dataset,
+        "filename": os.path.basename(args.dataset),
+        "target": target,
+        "columns": features.columns.tolist(),
+        "numeric_columns": features.select_dtypes("number").columns.tolist(),
+        "rows": features.head(200).astype(object).where(features.head(200).notna(), None),
+        "models": args.models.split(","),
+        "max_polls": args.max_polls,
+    }
+    setup = Client(http, Recorder())
+    ctx["file_id"] = await upload(setup, dataset, ctx["filename"])
+    if ctx["file_id"] is None:
+        raise RuntimeError("Setup upload failed; is the server reachable?")
+    if "predict" in args.mix_weights:
+        response = await http.post("/api/model/train", json={
+            "file_id": ctx["file_id"], "target_column": target, "models": ctx["models"][:1],
+        })
+        task_id = response.json()["task_id"]
+        while True:
+            status = (await http.get(f"/api/model/status/{task_id}")).json()
+            if status["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(1.0)
+        if status["status"] != "completed":
+            # Without a model every `predict` call would be skipped, silently
+            raise RuntimeError(f"Setup training for the predict scenario failed: {status.get('error')}")
+        ctx["model_id"] = next(iter(status["results"].values()))["model_id"]
+    return ctx
+
+
+async def virtual_user(client: Client, ctx: dict, mix: dict, deadline: float):
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        await SCENARIOS[random.choices(names, weights)[0]](client, ctx)
+        await asyncio.sleep(random.uniform(0, 0.2))  # think time
+
+
+async def canary(client: Client, deadline: float):
+    while time.monotonic() < deadline:
+        await client.request("GET", "canary", "/")
+        await asyncio.sleep(CANARY_INTERVAL_SECONDS)
+
+
+async def run_load(base_url: str, args) -> dict:
+    headers = {"X-API-KEY": os.environ.get("API_KEY", "")}
+    limits = httpx.Limits(max_connections=args.users + 2)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=args.timeout) as http:
+        ctx = await prepare(http, args)
+        recorder = Recorder()
+        client = Client(http, recorder)
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(
+            canary(client, deadline),
+            *(virtual_user(client, ctx, args.mix_weights, deadline) for _ in range(args.users))
+        )
+        return recorder.report(time.monotonic() - start)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from short sleeps (time spent blocked)."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags = []
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(time.perf_counter() - start - self.interval)
+
+    def report(self) -> dict:
+        if not self.lags:
+            return {}
+        ms = np.array(self.lags) * 1000
+        return {
+            "p50_ms": round(float(np.percentile(ms, 50)), 1),
+            "p99_ms": round(float(np.percentile(ms, 99)), 1),
+            "max_ms": round(float(ms.max()), 1),
+            "blocked_over_100ms": int((ms > 100).sum()),
+        }
+
+
+def serve_in_process(port: int, monitor: LoopLagMonitor):
+    """Starts the app under uvicorn in a background thread; returns the server."""
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+
+    async def serve():
+        lag_task = asyncio.create_task(monitor.run())
+        try:
+            await server.serve()
+        finally:
+            lag_task.cancel()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _parse_mix(value: str) -> dict:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r}; choose from {sorted(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Target a running server instead of serving the app in-process.")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load after setup.")
+    parser.add_argument("--mix", dest="mix_weights", type=_parse_mix, default=_parse_mix(DEFAULT_MIX),
+                        help=f"Scenario weights (default: {DEFAULT_MIX}).")
+    parser.add_argument("--dataset", default="data2.csv", help="CSV uploaded by the scenarios.")
+    parser.add_argument("--target", default=None, help="Target column (default: last column).")
+    parser.add_argument("--models", default="logistic_regression", help="Models requested by the train scenario.")
+    parser.add_argument("--max-polls", type=int, default=120, help="Status polls per training job before giving up.")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    monitor, server = None, None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        os.environ.setdefault("API_KEY", "benchmark")
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        monitor = LoopLagMonitor()
+        port = _free_port()
+        server = serve_in_process(port, monitor)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        report = asyncio.run(run_load(base_url, args))
+    finally:
+        if server is not None:
+            server.should_exit = True
+    report = {
+        "target": args.url or "in-process",
+        "users": args.users,
+        "mix": args.mix_weights,
+        **report,
+        "server_event_loop_lag": monitor.report() if monitor else None,
+    }
+    print(json.dumps(report, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import os
+
+# Gunicorn settings for the production container (see Dockerfile).
+bind = "0.0.0.0:8000"
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def on_starting(server):
+    """
+    Runs once in the master before any worker is forked.
+
+    With PRELOAD_ML_LIBRARIES enabled the heavy ML stack is imported here, so
+    every worker inherits it copy-on-write instead of importing its own copy.
+    """
+    from app.core.config import settings
+    if settings.PRELOAD_ML_LIBRARIES:
+        from app.pipelines.model_registry import preload
+        loaded = preload()
+        server.log.info(f"Preloaded ML libraries in master: {', '.join(loaded)}")
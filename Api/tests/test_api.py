@@ -1,7 +1,9 @@
 import io
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.core.config import settings
 from app.schemas.model import PreprocessingConfig
 
 client = TestClient(app)
@@ -29,7 +31,8 @@ def test_upload_file():
     data = response.json()
     assert "file_id" in data
     assert "column_dtypes" in data
-    assert data['column_dtypes']['feature1'] == 'int64'
+    assert data['column_dtypes']['feature1'] == 'int8'  # as later reads return it
+    assert data['memory_report']['converted_columns']['feature1']['to'] == 'int8'
     test_state['file_id'] = data['file_id']
 
 def test_get_analysis():
@@ -69,3 +72,129 @@ def test_start_training_job():
     # Fix: Update the expected status message to match the actual API response
     assert data["status"] == "Training job successfully started."
 
+
+def _train_small_model():
+    """Uploads a small separable dataset and trains logistic regression on it; returns (file_id, model_id)."""
+    rows = "\n".join(f"{i % 10},{(i * 7) % 5},{'yes' if i % 10 >= 5 else 'no'}" for i in range(60))
+    csv_content = "feature1,feature2,label\n" + rows
+    upload = client.post("/api/upload", files={"file": ("small.csv", io.BytesIO(csv_content.encode()), "text/csv")})
+    file_id = upload.json()["file_id"]
+    task = client.post("/api/model/train", json={
+        "file_id": file_id, "target_column": "label", "models": ["logistic_regression"]
+    }).json()
+    status = client.get(f"/api/model/status/{task['task_id']}").json()
+    assert status["status"] == "completed", status
+    return file_id, status["results"]["logistic_regression"]["model_id"]
+
+def test_batch_prediction_streams_every_row():
+    file_id, model_id = _train_small_model()
+
+    response = client.post("/api/model/predict/batch", json={
+        "model_id": model_id, "file_id": file_id, "chunk_size": 25, "output_format": "ndjson"
+    })
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["row"] for line in lines] == list(range(60))
+    assert {line["prediction"] for line in lines} <= {"yes", "no"}
+
+
+def test_preview_is_revalidated_with_etag():
+    """A matching If-None-Match gets a 304 without recomputing the preview."""
+    assert 'file_id' in test_state, "file_id not found. Did the upload test fail?"
+    url = f"/api/analysis/preview/{test_state['file_id']}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    # One ETag covers the gzip and identity encodings, so it is weak and caches key on the encoding
+    assert etag.startswith('W/"')
+    assert "accept-encoding" in response.headers["vary"].lower()
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert client.get(url, headers={"If-None-Match": etag.removeprefix("W/")}).status_code == 304
+    assert cached.content == b""
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_identical_training_requests_are_memoized():
+    file_id, model_id = _train_small_model()
+    request = {"file_id": file_id, "target_column": "label", "models": ["logistic_regression", "random_forest"]}
+
+    # Partial overlap: logistic regression comes from the memo, only random forest is trained
+    task = client.post("/api/model/train", json=request).json()
+    status = client.get(f"/api/model/status/{task['task_id']}").json()
+    assert status["status"] == "completed", status
+    assert status["results"]["logistic_regression"]["model_id"] == model_id
+    assert status["results"]["logistic_regression"]["details"]["memo"]["hit"]
+    assert "memo" not in status["results"]["random_forest"]["details"]
+
+    # Identical request: answered without a training job
+    repeat = client.post("/api/model/train", json=request).json()
+    status = client.get(f"/api/model/status/{repeat['task_id']}").json()
+    assert status["progress"] == "All models served from previous training runs."
+    assert status["results"]["random_forest"]["model_id"] == f"{task['task_id']}_random_forest"
+
+
+def test_leaderboard_ranks_models_by_accuracy_and_latency():
+    file_id, _ = _train_small_model()
+    request = {"file_id": file_id, "target_column": "label", "models": ["logistic_regression", "random_forest"]}
+    task = client.post("/api/model/train", json=request).json()
+
+    status = client.get(f"/api/model/status/{task['task_id']}").json()
+    profile = status["results"]["random_forest"]["details"]["inference_profile"]
+    assert profile["single_row"]["p99_ms"] >= profile["single_row"]["p50_ms"] > 0
+    assert profile["artifacts"]["artifact_bytes"] > 0
+
+    response = client.get(f"/api/model/leaderboard/{task['task_id']}", params={"latency": "batch_1k_p50_ms"})
+    assert response.status_code == 200
+    board = response.json()
+    assert {e["model_name"] for e in board["entries"]} == {"logistic_regression", "random_forest"}
+    assert board["pareto_front"] and board["recommended"] in board["pareto_front"]
+    assert client.get(f"/api/model/leaderboard/{task['task_id']}", params={"latency": "p42"}).status_code == 400
+
+
+def test_correlations_are_cached_per_dataset():
+    file_id, _ = _train_small_model()
+    first = client.get(f"/api/analysis/correlations/{file_id}")
+    assert first.status_code == 200
+    assert first.json()["pearson"]["heatmap"]["columns"] == ["feature1", "feature2"]
+    assert (settings.UPLOADS_DIR / file_id / ".correlations.json").exists()
+
+    eda = client.get(f"/api/analysis/eda/{file_id}").json()
+    assert eda["visualizations"]["correlations"] == first.json()
+
+
+def test_interrupted_training_job_is_resumed():
+    from app.schemas.model import TrainingRequest
+    from app.services import job_checkpoint, training_memo
+    from app.services.file_service import FileService
+    from app.services.model_service import ModelService
+    from app.services.task_status import create_task_status, read_task_status
+
+    file_id, _ = _train_small_model()
+    service = ModelService(FileService())
+    request = TrainingRequest(file_id=file_id, target_column="label", models=["logistic_regression", "random_forest"])
+    dataset_hash = training_memo.dataset_content_hash(service.file_service.ensure_exists(file_id))
+    task_id = "interrupted-job"
+    create_task_status(task_id, progress="Training job has been queued.")
+    lock = job_checkpoint.start_job(task_id, request, dataset_hash)
+    # The worker finished logistic regression before it died
+    job_checkpoint.save_model_result(task_id, "logistic_regression",
+                                     training_memo.lookup(dataset_hash, request, "logistic_regression"))
+
+    # Not claimed while its worker holds the owner lock
+    assert task_id not in [job[0] for job in service.resume_interrupted_jobs()]
+
+    job_checkpoint.release(lock)  # the worker died
+    jobs = service.resume_interrupted_jobs()
+    assert [job[0] for job in jobs] == [task_id]
+    assert "1 of 2 models already trained" in read_task_status(task_id)["progress"]
+
+    service._run_training_in_background(*jobs[0])
+    status = read_task_status(task_id)
+    assert status["status"] == "completed", status
+    assert set(status["results"]) == {"logistic_regression", "random_forest"}
+    assert not (settings.STORAGE_DIR / "checkpoints" / task_id).exists()
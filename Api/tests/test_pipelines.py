@@ -1,3 +1,4 @@
+import os
 import pytest
 import pandas as pd
 import numpy as np
@@ -84,3 +85,311 @@ def test_run_training_pipeline(sample_dataframe):
     assert 'confusion_matrix' in plots
     assert os.path.exists(plots['confusion_matrix'])
 
+
+def test_app_import_does_not_load_heavy_ml_libraries():
+    """
+    Importing the API must not pull in the boosters or shap; they load on first use.
+    """
+    import subprocess, sys, os
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('shap', 'xgboost', 'lightgbm', 'catboost') if m in sys.modules))"
+    )
+    env = dict(os.environ, API_KEY=os.environ.get("API_KEY", "test"))
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert output.stdout.strip() == ""
+
+def test_lazy_model_registry_resolves_on_first_use():
+    from app.pipelines.model_registry import LazyModelRegistry, MODELS
+    registry = LazyModelRegistry({"logistic_regression": ("sklearn.linear_model", "LogisticRegression", {"max_iter": 50})})
+    assert not registry.is_loaded("logistic_regression")
+    model = registry["logistic_regression"]()
+    assert registry.is_loaded("logistic_regression")
+    assert model.max_iter == 50
+    assert set(MODELS) == {"random_forest", "xgboost", "lightgbm", "catboost", "logistic_regression"}
+
+def test_split_cores_never_exceeds_budget():
+    from app.pipelines.parallelism import split_cores
+    assert split_cores(8, 36) == (8, 1)
+    assert split_cores(8, 2) == (2, 4)
+    assert split_cores(1, 5) == (1, 1)
+
+def test_limited_threads_is_shared_by_concurrent_jobs():
+    from threadpoolctl import threadpool_info, threadpool_limits
+    from app.pipelines.parallelism import limited_threads
+
+    def current():
+        return {pool['num_threads'] for pool in threadpool_info()}
+
+    if not threadpool_info():
+        pytest.skip("no native thread pools loaded")
+    with threadpool_limits(limits=4):
+        first, second = limited_threads(1, 2), limited_threads(1, 1)
+        first.__enter__()
+        second.__enter__()
+        # The first job leaving must not lift the limit of the one still running
+        first.__exit__(None, None, None)
+        assert current() == {1}
+        second.__exit__(None, None, None)
+        assert current() == {4}
+
+def test_run_cross_validation_reports_mean_and_std():
+    from app.pipelines.evaluation_pipeline import run_cross_validation
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'x1': rng.normal(size=60),
+        'x2': rng.normal(size=60),
+        'cat': rng.choice(['A', 'B', 'C'], size=60),
+    })
+    df['target'] = (df['x1'] + 0.1 * rng.normal(size=60) > 0).astype(int)
+
+    results = run_cross_validation(
+        df=df,
+        target_column='target',
+        model_names=['logistic_regression', 'random_forest'],
+        preprocessing_config=PreprocessingConfig(),
+        n_folds=3,
+        hyperparameter_tuning=True,
+        n_jobs=2
+    )
+
+    assert set(results) == {'logistic_regression', 'random_forest'}
+    lr = results['logistic_regression']
+    assert lr['n_folds'] == 3
+    assert lr['candidates_evaluated'] == 3
+    assert lr['best_params']['C'] in [0.1, 1.0, 10.0]
+    assert 0.5 < lr['mean']['accuracy'] <= 1.0
+    assert lr['std']['accuracy'] >= 0.0
+    # Two pool processes with one thread each stay within the 2-core budget
+    assert lr['cpu_budget']['allotted_cores'] == 2
+    assert lr['cpu_budget']['parallel_fits'] * lr['cpu_budget']['threads_per_fit'] <= 2
+
+def test_cross_validation_leaves_out_the_holdout_rows(monkeypatch):
+    from app.pipelines import evaluation_pipeline
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({'x': rng.normal(size=100)})
+    df['target'] = (df['x'] > 0).astype(int)
+    seen = []
+    make_splitter = evaluation_pipeline._make_splitter
+    monkeypatch.setattr(evaluation_pipeline, '_make_splitter', lambda y, n: seen.append(len(y)) or make_splitter(y, n))
+
+    evaluation_pipeline.run_cross_validation(df, 'target', ['logistic_regression'], PreprocessingConfig(),
+                                             n_folds=3, n_jobs=1, test_size=0.2)
+    # Only the 80 training rows of run_training_pipeline's split are cross-validated
+    assert seen == [80]
+
+def test_cross_validation_fold_errors_propagate():
+    from app.pipelines.evaluation_pipeline import _score_fold
+    rng = np.random.RandomState(0)
+    fold = {'X_train': rng.normal(size=(20, 2)), 'y_train': np.arange(20) % 2,
+            'X_valid': rng.normal(size=(5, 2)), 'y_valid': np.arange(5) % 2}
+    # An invalid candidate must fail the evaluation, not turn into NaN scores
+    with pytest.raises(ValueError):
+        _score_fold('logistic_regression', 2, {'C': -1.0}, fold)
+
+def test_prune_features_reports_dropped_columns():
+    from app.pipelines.feature_pruning import prune_features
+    rng = np.random.RandomState(1)
+    base = rng.normal(size=40)
+    df = pd.DataFrame({
+        'Unnamed: 0': np.arange(40),
+        'constant': 7,
+        'signal': base,
+        'signal_copy': base,
+        'signal_scaled': base * 3.0 + 1.0 + rng.normal(scale=1e-3, size=40),
+        'noise': rng.normal(size=40),
+        'track_id': [f'id_{i}' for i in range(40)],
+        'target': rng.randint(0, 2, size=40),
+    })
+
+    pruned, report = prune_features(df, 'target')
+
+    reasons = {entry['column']: entry['reason'] for entry in report['dropped_columns']}
+    assert reasons == {
+        'Unnamed: 0': 'id_like',
+        'constant': 'constant',
+        'signal_copy': 'duplicate',
+        'signal_scaled': 'collinear',
+        'track_id': 'high_cardinality_text',
+    }
+    assert sorted(pruned.columns) == ['noise', 'signal', 'target']
+    assert report['n_columns_before'] == 7 and report['n_columns_after'] == 2
+
+def test_prune_features_id_detection_needs_name_or_enough_rows():
+    from app.pipelines.feature_pruning import prune_features
+    rng = np.random.RandomState(2)
+    # On small data a unique run of integers may be a real ordinal: kept
+    small = pd.DataFrame({'rank': rng.permutation(40) + 1, 'x': rng.normal(size=40)})
+    assert prune_features(small)[1]['dropped_columns'] == []
+
+    # A row index keeps enough of its range after a split to be recognized
+    large = pd.DataFrame({'row': np.arange(2000), 'x': rng.normal(size=2000)}).sample(frac=0.8, random_state=0)
+    reasons = {entry['column']: entry['reason'] for entry in prune_features(large)[1]['dropped_columns']}
+    assert reasons == {'row': 'id_like'}
+
+def test_training_artifacts_list_only_the_columns_kept_after_pruning(tmp_path):
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({'x': rng.normal(size=80), 'constant': 1.0})
+    df['target'] = (df['x'] > 0).astype(int)
+
+    result = run_training_pipeline(df, 'target', 'logistic_regression', PreprocessingConfig(), 0.25,
+                                   str(tmp_path), n_jobs=1, profile_inference=False)
+
+    assert result['feature_columns'] == ['x']
+    assert [entry['column'] for entry in result['details']['feature_pruning']['dropped_columns']] == ['constant']
+
+def test_optimize_dtypes_is_lossless():
+    from app.pipelines.dtype_optimizer import optimize_dtypes
+    df = pd.DataFrame({
+        'small_int': [1, 2, 3, 4] * 25,
+        'half': [0.5, 1.5, np.nan, 2.25] * 25,
+        'precise': [0.1, 0.2, 0.3, 0.4] * 25,
+        'genre': ['rock', 'pop', 'jazz', 'pop'] * 25,
+        'flag': [True, False, True, True] * 25,
+        'name': [f'track {i}' for i in range(100)],
+    })
+    df['flag'] = df['flag'].astype(object)
+
+    optimized, report = optimize_dtypes(df)
+
+    assert optimized['small_int'].dtype == np.int8
+    assert optimized['half'].dtype == np.float32
+    assert optimized['precise'].dtype == np.float64
+    assert optimized['genre'].dtype == 'category'
+    assert optimized['flag'].dtype == bool
+    assert optimized['name'].dtype == object
+    assert report['bytes_after'] < report['bytes_before']
+    assert report['converted_columns']['small_int'] == {'from': 'int64', 'to': 'int8'}
+    pd.testing.assert_frame_equal(optimized.astype(df.dtypes.to_dict()), df)
+
+def test_pareto_front_keeps_only_undominated_models():
+    from app.pipelines.inference_profile import pareto_front
+    entries = [
+        {'model_name': 'fast', 'accuracy': 0.90, 'latency': 1.0},
+        {'model_name': 'slow_worse', 'accuracy': 0.89, 'latency': 5.0},
+        {'model_name': 'slow_better', 'accuracy': 0.95, 'latency': 8.0},
+        {'model_name': 'tie_slower', 'accuracy': 0.90, 'latency': 2.0},
+        {'model_name': 'unprofiled', 'accuracy': 0.99, 'latency': None},
+    ]
+    assert pareto_front(entries, 'accuracy', 'latency') == ['fast', 'slow_better']
+
+def test_high_cardinality_categoricals_get_bounded_width_encoders():
+    rng = np.random.RandomState(0)
+    n = 400
+    df = pd.DataFrame({
+        'x': rng.normal(size=n),
+        'color': rng.choice(['red', 'green', 'blue'], size=n),
+        'user': [f'user_{i}' for i in rng.randint(0, 300, size=n)],
+    })
+    y = (df['x'] > 0).astype(int).to_numpy()
+    cardinality = df[['color', 'user']].nunique().to_dict()
+
+    widths = {}
+    for encoding in ['target', 'frequency', 'hashing']:
+        config = PreprocessingConfig(high_cardinality_encoding=encoding, high_cardinality_threshold=20, hashing_buckets=16)
+        preprocessor = create_preprocessing_pipeline(['x'], ['color', 'user'], config, categorical_cardinality=cardinality)
+        preprocessor.set_output(transform="pandas")
+        encoded = preprocessor.fit_transform(df, y)
+        # Unseen categories must still transform
+        unseen = preprocessor.transform(df.assign(user='never_seen').head(5))
+        assert list(unseen.columns) == list(encoded.columns)
+        assert not encoded.isna().any().any()
+        widths[encoding] = encoded.shape[1]
+
+    # 1 numeric + 3 one-hot color columns + the bounded encoding of 'user'
+    assert widths == {'target': 5, 'frequency': 5, 'hashing': 20}
+
+    onehot = create_preprocessing_pipeline(['x'], ['color', 'user'], PreprocessingConfig(categorical_encoding='onehot'))
+    assert onehot.fit_transform(df).shape[1] > 200
+
+def test_bool_categorical_column_in_its_own_encoder_group():
+    # A bool column can end up alone in an encoder group (here one-hot, while the
+    # text column is target encoded); SimpleImputer must still accept it
+    rng = np.random.RandomState(0)
+    n = 200
+    df = pd.DataFrame({
+        'x': rng.normal(size=n),
+        'explicit': rng.choice([True, False], size=n),
+        'user': [f'user_{i}' for i in rng.randint(0, 150, size=n)],
+    })
+    y = (df['x'] > 0).astype(int).to_numpy()
+    config = PreprocessingConfig(high_cardinality_threshold=20)
+    cardinality = df[['explicit', 'user']].nunique().to_dict()
+    preprocessor = create_preprocessing_pipeline(['x'], ['explicit', 'user'], config, categorical_cardinality=cardinality)
+    preprocessor.set_output(transform="pandas")
+    encoded = preprocessor.fit_transform(df, y)
+    assert encoded.shape == (n, 1 + 2 + 1)
+    assert not encoded.isna().any().any()
+
+def test_blockwise_correlations_match_full_matrix():
+    from app.pipelines.correlation_analysis import association_overview, correlation_overview
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(rng.normal(size=(500, 12)), columns=[f'x{i}' for i in range(12)])
+    df['x11'] = 0.9 * df['x2'] + 0.1 * rng.normal(size=500)
+    df['x5'] = -np.exp(df['x7'])  # monotonic: Spearman -1, Pearson weaker
+    df['const'] = 1.0
+
+    # Blocks of 5 columns, only the 3 strongest pairs kept
+    pearson = correlation_overview(df, 'pearson', top_k=3, block_size=5)
+    spearman = correlation_overview(df, 'spearman', top_k=3, block_size=5)
+
+    full = df.drop(columns='const').corr().where(np.triu(np.ones((12, 12), dtype=bool), k=1)).stack()
+    expected = full.reindex(full.abs().sort_values(ascending=False).index)[:3]
+    assert [(p['column_1'], p['column_2']) for p in pearson['top_pairs']] == list(expected.index)
+    assert np.allclose([p['value'] for p in pearson['top_pairs']], expected.values, atol=1e-3)
+    assert spearman['top_pairs'][0] == {'column_1': 'x5', 'column_2': 'x7', 'value': -1.0}
+    assert pearson['n_columns'] == 12 and len(pearson['heatmap']['matrix']) == 12
+
+    categories = pd.DataFrame({'a': rng.choice(['x', 'y'], 500), 'noise': rng.choice(['p', 'q', 'r'], 500)})
+    categories['b'] = categories['a'].map({'x': 'left', 'y': 'right'})
+    associations = association_overview(categories)
+    assert associations['top_pairs'][0]['column_1'] == 'a' and associations['top_pairs'][0]['column_2'] == 'b'
+    assert associations['top_pairs'][0]['value'] > 0.99
+
+def test_shared_matrices_reach_workers_zero_copy(tmp_path):
+    from joblib import Parallel, delayed
+    from app.pipelines.shared_matrices import SharedMatrices
+
+    def backing_file(array):
+        base = array
+        while base is not None and not isinstance(base, np.memmap):
+            base = getattr(base, 'base', None)
+        return getattr(base, 'filename', None), float(array.sum())
+
+    X = np.arange(300_000, dtype=np.float64).reshape(-1, 3)
+    with SharedMatrices(root=str(tmp_path)) as shared:
+        X_shared = shared.share('X_train', pd.DataFrame(X))
+        results = Parallel(n_jobs=2, backend='loky')(delayed(backing_file)(X_shared) for _ in range(2))
+        directory = shared.directory
+
+    # Workers map the job's file rather than a pickled or re-dumped copy
+    assert all(filename and filename.startswith(directory) for filename, _ in results)
+    assert all(total == X.sum() for _, total in results)
+    assert shared.report()['shared_bytes'] == X.nbytes
+    assert not X_shared.flags['WRITEABLE']
+    assert not os.path.exists(directory)
+
+def test_grid_search_resumes_from_saved_candidates(tmp_path):
+    import json
+    from sklearn.linear_model import LogisticRegression
+    from app.pipelines.training_pipeline import _resumable_grid_search
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(90, 3))
+    y = (X[:, 0] > 0).astype(int)
+    grid = {'C': [0.1, 1.0, 10.0], 'solver': ['liblinear']}
+    state_path = str(tmp_path / 'search.json')
+
+    # A previous run got as far as C=0.1; its (unbeatable) score must be reused, not recomputed
+    saved = {'C': 0.1, 'solver': 'liblinear'}
+    with open(state_path, 'w') as f:
+        json.dump({'candidates': {json.dumps(saved, sort_keys=True): {'params': saved, 'score': 2.0}}}, f)
+
+    checkpoints = []
+    search = _resumable_grid_search(LogisticRegression(), grid, X, y, n_jobs=1, state_path=state_path,
+                                    on_checkpoint=lambda: checkpoints.append(1))
+
+    assert search['resumed_candidates'] == 1
+    assert search['best_params'] == saved
+    assert len(checkpoints) == 2  # one batch per remaining candidate with n_jobs=1
+    with open(state_path) as f:
+        assert len(json.load(f)['candidates']) == 3
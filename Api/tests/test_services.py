@@ -0,0 +1,359 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.services.columnar_store import has_columnar_store, read_columnar_store, write_columnar_store
+
+
+def test_columnar_store_round_trip_is_zero_copy(tmp_path):
+    df = pd.DataFrame({
+        'score': np.array([1.5, np.nan, 3.25], dtype=np.float32),
+        'count': np.array([1, 2, 3], dtype=np.int8),
+        'flag': [True, False, True],
+        'genre': pd.Categorical(['pop', 'rock', 'pop']),
+        'title': ['a', np.nan, 'c'],
+        'when': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+    })
+
+    assert write_columnar_store(df, str(tmp_path))
+    assert has_columnar_store(str(tmp_path))
+
+    loaded = read_columnar_store(str(tmp_path))
+    pd.testing.assert_frame_equal(loaded, df)
+    # Numeric columns are views over the memory-mapped files, not parsed copies
+    assert not loaded['score'].to_numpy().flags['OWNDATA']
+
+    projected = read_columnar_store(str(tmp_path), columns=['genre'])
+    assert projected.columns.tolist() == ['genre']
+
+
+def test_get_dataframe_pushes_column_and_row_limits_down(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.services.file_service import FileService
+
+    monkeypatch.setattr(settings, "STORAGE_DIR", tmp_path)
+    monkeypatch.setattr(settings, "SHARED_DATASET_CACHE_MAX_BYTES", 0)
+    upload_dir = settings.UPLOADS_DIR / "f1"
+    upload_dir.mkdir(parents=True)
+    pd.DataFrame({f'c{i}': np.arange(100) * i for i in range(20)}).to_csv(upload_dir / "data.csv", index=False)
+    service = FileService()
+
+    # No store yet: only the requested columns and rows are parsed, nothing is stored
+    partial = service.get_dataframe("f1", columns=['c7', 'c2'], nrows=10)
+    assert partial.columns.tolist() == ['c7', 'c2'] and len(partial) == 10
+    assert not has_columnar_store(str(upload_dir))
+
+    assert len(service.get_dataframe("f1")) == 100
+    projected = service.get_dataframe("f1", columns=['c3'], nrows=5)
+    assert projected['c3'].tolist() == [0, 3, 6, 9, 12]
+    assert service.get_row_count("f1") == 100
+
+    with pytest.raises(ValueError, match='missing'):
+        service.get_dataframe("f1", columns=['missing'])
+
+
+def test_upload_schema_pins_dtypes_for_later_reads(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.services.file_service import FileService
+    from app.services.upload_schema import load_schema
+
+    monkeypatch.setattr(settings, "STORAGE_DIR", tmp_path)
+    monkeypatch.setattr(settings, "SHARED_DATASET_CACHE_MAX_BYTES", 0)
+    upload_dir = settings.UPLOADS_DIR / "f1"
+    upload_dir.mkdir(parents=True)
+    n = 200
+    pd.DataFrame({
+        'count': np.arange(n) % 7,
+        'color': np.where(np.arange(n) % 10 == 0, ' ', np.array(['red', 'blue'] * (n // 2))),
+        'day': pd.date_range('2024-01-01', periods=n).strftime('%d/%m/%Y'),
+    }).to_csv(upload_dir / "data.csv", index=False)
+    service = FileService()
+    _, _, optimized, _ = service._parse_upload(str(upload_dir / "data.csv"))
+
+    schema = load_schema(str(upload_dir))
+    entries = {entry['name']: entry for entry in schema['columns']}
+    assert entries['count']['dtype'] == 'int8'
+    assert entries['color']['categories'] == ['blue', 'red']  # " " is a missing value
+
+    # Partial, full and chunked parses all produce the dtypes seen at upload
+    head = service.get_dataframe("f1", nrows=5)
+    assert head['color'].cat.categories.tolist() == ['blue', 'red']
+    pd.testing.assert_frame_equal(service.get_dataframe("f1"), optimized)
+    chunk = next(service.iter_dataframe_chunks("f1", 50))
+    assert chunk.dtypes.equals(optimized.dtypes)
+
+
+def test_infs_to_nan_only_touches_float_columns():
+    from app.services.analysis_service import infs_to_nan
+
+    df = pd.DataFrame({'x': np.array([1.0, np.inf, -np.inf], dtype='float32'), 'label': pd.Categorical(['a', 'b', 'a'])})
+    cleaned = infs_to_nan(df)
+    assert cleaned['x'].isna().tolist() == [False, True, True]
+    assert cleaned.dtypes.equals(df.dtypes)
+    assert np.isinf(df['x']).sum() == 2  # the caller's frame is left as is
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    import asyncio
+    from app.services.micro_batcher import MicroBatcher
+
+    calls = []
+
+    def predict_fn(key, df):
+        calls.append(len(df))
+        return df['x'].to_numpy() * 10
+
+    batcher = MicroBatcher(predict_fn, max_wait_ms=20, max_batch_rows=1000)
+
+    async def run():
+        frames = [pd.DataFrame({'x': [i, i + 100]}) for i in range(5)]
+        return await asyncio.gather(*(batcher.submit('model', df) for df in frames))
+
+    results = asyncio.run(run())
+
+    assert calls == [10]
+    assert [r.tolist() for r in results] == [[i * 10, (i + 100) * 10] for i in range(5)]
+    metrics = batcher.metrics()
+    assert metrics['batches'] == 1 and metrics['requests'] == 5
+    assert metrics['requests_per_batch']['max'] == 5
+
+
+def test_micro_batcher_isolates_failing_request():
+    import asyncio
+    from app.services.micro_batcher import MicroBatcher
+
+    def predict_fn(key, df):
+        if df['x'].isna().any():
+            raise ValueError("bad row")
+        return df['x'].to_numpy()
+
+    batcher = MicroBatcher(predict_fn, max_wait_ms=20, max_batch_rows=1000)
+
+    async def run():
+        good = batcher.submit('model', pd.DataFrame({'x': [1.0]}))
+        bad = batcher.submit('model', pd.DataFrame({'x': [np.nan]}))
+        return await asyncio.gather(good, bad, return_exceptions=True)
+
+    good, bad = asyncio.run(run())
+    assert good.tolist() == [1.0]
+    assert isinstance(bad, ValueError)
+
+
+def test_storage_lifecycle_evicts_cold_entries_but_keeps_pinned(tmp_path, monkeypatch):
+    import os
+    import time
+    from app.core.config import settings
+    from app.services.storage_lifecycle import StorageLifecycleManager
+
+    monkeypatch.setattr(settings, "STORAGE_DIR", tmp_path)
+    monkeypatch.setattr(settings, "STORAGE_QUOTA_BYTES", 2500)
+    monkeypatch.setattr(settings, "STORAGE_TTL_HOURS", {"reports": 1})
+    for category in ("uploads", "models", "reports", "task_status"):
+        (tmp_path / category).mkdir()
+
+    old = time.time() - 7200
+    for name, age in (("cold", old), ("pinned", old - 60), ("hot", time.time())):
+        upload_dir = tmp_path / "uploads" / name
+        upload_dir.mkdir()
+        (upload_dir / "data.csv").write_bytes(b"x" * 1000)
+        os.utime(upload_dir / "data.csv", (age, age))
+        os.utime(upload_dir, (age, age))
+    (tmp_path / "reports" / "old.png").write_bytes(b"x" * 10)
+    os.utime(tmp_path / "reports" / "old.png", (old, old))
+
+    manager = StorageLifecycleManager()
+    assert manager.usage()["categories"]["uploads"]["bytes"] == 3000
+
+    with manager.pinned("uploads", "pinned"):
+        report = manager.compact()
+
+    evicted = {(e["category"], e["key"], e["reason"]) for e in report["evicted"]}
+    # The expired report goes by TTL; the least recently used unpinned upload goes by quota
+    assert evicted == {("reports", "old.png", "ttl"), ("uploads", "cold", "quota")}
+    assert (tmp_path / "uploads" / "pinned").exists()
+    assert (tmp_path / "uploads" / "hot").exists()
+    assert not list((tmp_path / ".pins" / "uploads").iterdir())
+
+    # Glob characters in a key never match other entries' pins
+    token = manager.pin("uploads", "hot", persistent=True)
+    assert manager.is_pinned("uploads", "hot")
+    assert not manager.is_pinned("uploads", "*") and not manager.is_pinned("uploads", "h?t")
+    assert token.exists()
+
+
+def test_storage_lifecycle_ensure_capacity_keeps_a_running_total(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.services.storage_lifecycle import StorageLifecycleManager
+
+    monkeypatch.setattr(settings, "STORAGE_DIR", tmp_path)
+    monkeypatch.setattr(settings, "STORAGE_QUOTA_BYTES", 10_000)
+    manager = StorageLifecycleManager()
+    walks = []
+    list_entries = manager.list_entries
+    monkeypatch.setattr(manager, "list_entries", lambda: walks.append(1) or list_entries())
+
+    for _ in range(5):
+        manager.ensure_capacity(1000)
+    # One walk for the first call; the rest use the running total
+    assert len(walks) == 1 and manager._usage_bytes == 5000
+
+    # Going over the quota compacts, which refreshes the total from disk
+    manager.ensure_capacity(6000)
+    assert len(walks) == 2 and manager._usage_bytes == 6000
+
+    # Writes sized after the fact are counted too
+    manager.record_written(3000)
+    assert len(walks) == 2 and manager._usage_bytes == 9000
+
+
+def test_shared_dataset_cache_attaches_zero_copy_and_evicts_idle_entries(tmp_path):
+    import gc
+    from app.services.shared_dataset_cache import SharedDatasetCache
+
+    df = pd.DataFrame({'x': np.arange(1000, dtype=np.int64), 'genre': pd.Categorical(['a', 'b'] * 500)})
+    for file_id in ('first', 'second'):
+        assert write_columnar_store(df, str(tmp_path / file_id))
+
+    cache = SharedDatasetCache(root=tmp_path / "shm", max_bytes=12_000)
+    assert cache.attach('first') is None
+    assert cache.publish('first', str(tmp_path / 'first'))
+
+    attached = cache.attach('first')
+    pd.testing.assert_frame_equal(attached, df)
+    assert not attached['x'].to_numpy().flags['OWNDATA']
+    assert cache.ref_count('first') == 1
+
+    # 'first' is referenced, so there is no room for 'second'
+    assert not cache.publish('second', str(tmp_path / 'second'))
+    del attached
+    gc.collect()
+    assert cache.ref_count('first') == 0
+    # Once released, the idle entry is evicted to make room
+    assert cache.publish('second', str(tmp_path / 'second'))
+    assert [e['file_id'] for e in cache.entries()] == ['second']
+
+
+def test_cpu_governor_splits_cores_between_jobs(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.services.cpu_governor import CpuGovernor
+
+    monkeypatch.setattr(settings, "STORAGE_DIR", tmp_path)
+    monkeypatch.setattr(settings, "CPU_TOTAL_CORES", 4)
+    monkeypatch.setattr(settings, "CPU_MAX_CORES_PER_JOB", 3)
+    monkeypatch.setattr(settings, "CPU_LEASE_WAIT_SECONDS", 0)
+    governor = CpuGovernor()
+
+    with governor.lease(label="first") as first, governor.lease(label="second") as second:
+        assert (first, second) == (3, 1)
+        assert governor.snapshot()["free_cores"] == 0
+        # Nothing left: after the wait the job still runs, on a single core
+        with governor.lease(label="third") as third:
+            assert third == 1
+    assert governor.snapshot()["leased_cores"] == 0
+
+
+def _fake_s3_app():
+    """Minimal in-memory S3 stand-in: objects, ranged GET, multipart uploads, ListObjectsV2."""
+    import re
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+    objects, uploads = {}, {}
+
+    async def app(scope, receive, send):
+        request = Request(scope, receive)
+        assert request.headers["authorization"].startswith("AWS4-HMAC-SHA256 Credential=test/")
+        _, bucket, *key_parts = request.url.path.split("/", 2) + [""]
+        key = key_parts[0]
+        params = request.query_params
+        body = await request.body()
+        if request.method == "GET" and not key:
+            keys = sorted(k for k in objects if k.startswith(params.get("prefix", "")))
+            contents = "".join(f"<Contents><Key>{k}</Key></Contents>" for k in keys)
+            response = Response(f"<ListBucketResult><IsTruncated>false</IsTruncated>{contents}</ListBucketResult>")
+        elif request.method == "POST" and "uploads" in params:
+            uploads["1"] = {}
+            response = Response("<InitiateMultipartUploadResult><UploadId>1</UploadId></InitiateMultipartUploadResult>")
+        elif request.method == "PUT" and "partNumber" in params:
+            uploads[params["uploadId"]][int(params["partNumber"])] = body
+            response = Response(headers={"ETag": f'"{params["partNumber"]}"'})
+        elif request.method == "POST" and "uploadId" in params:
+            parts = uploads.pop(params["uploadId"])
+            numbers = [int(n) for n in re.findall(r"<PartNumber>(\d+)</PartNumber>", body.decode())]
+            objects[key] = b"".join(parts[n] for n in numbers)
+            response = Response("<CompleteMultipartUploadResult/>")
+        elif request.method == "PUT":
+            objects[key] = body
+            response = Response()
+        elif key not in objects:
+            response = Response(status_code=404)
+        elif request.method == "DELETE":
+            del objects[key]
+            response = Response(status_code=204)
+        elif request.method == "HEAD":
+            response = Response(headers={"Content-Length": str(len(objects[key]))})
+        else:
+            data = objects[key]
+            if "range" in request.headers:
+                start, end = request.headers["range"].removeprefix("bytes=").split("-")
+                data = data[int(start):int(end) + 1 if end else None]
+            response = Response(data, status_code=206 if "range" in request.headers else 200)
+        await response(scope, receive, send)
+
+    return app, objects
+
+
+def test_s3_storage_backend_against_local_stand_in(tmp_path):
+    import asyncio
+    import httpx
+    from app.services.storage_backend import S3StorageBackend
+
+    app, objects = _fake_s3_app()
+    backend = S3StorageBackend(
+        "http://s3.test", "bucket", "test", "secret", part_size=10,
+        transport=httpx.ASGITransport(app=app)
+    )
+
+    async def chunks():
+        for i in range(5):
+            yield bytes([65 + i]) * 7
+
+    async def scenario():
+        await backend.write("task_status/a.json", b'{"status": "queued"}')
+        # 35 bytes with 10-byte parts: a four-part multipart upload
+        await backend.write_stream("models/m.joblib", chunks())
+        assert objects["models/m.joblib"] == b"A" * 7 + b"B" * 7 + b"C" * 7 + b"D" * 7 + b"E" * 7
+        assert await backend.read("models/m.joblib", 5, 9) == b"AABBB"
+        streamed = b"".join([c async for c in backend.iter_read("models/m.joblib", chunk_size=8)])
+        assert streamed == objects["models/m.joblib"]
+        assert await backend.list("models/") == ["models/m.joblib"]
+        assert await backend.exists("task_status/a.json")
+        await backend.delete("task_status/a.json")
+        assert not await backend.exists("task_status/a.json")
+        await backend.download_to("models/m.joblib", tmp_path / "m.joblib")
+        await backend.close()
+
+    asyncio.run(scenario())
+    assert (tmp_path / "m.joblib").read_bytes() == objects["models/m.joblib"]
+
+
+def test_run_sync_reuses_one_background_loop(tmp_path):
+    import asyncio
+    import httpx
+    from app.services.storage_backend import S3StorageBackend, run_sync
+
+    app, objects = _fake_s3_app()
+    backend = S3StorageBackend("http://s3.test", "bucket", "test", "secret", transport=httpx.ASGITransport(app=app))
+    run_sync(backend.write, "a", b"1")
+    run_sync(backend.write, "b", b"2")
+    # Both calls ran on the same loop, through the same still-open pooled client
+    assert len(backend._clients) == 1 and not next(iter(backend._clients.values())).is_closed
+    assert run_sync(backend.list, "") == ["a", "b"]
+
+    async def on_event_loop():
+        with pytest.raises(RuntimeError):
+            run_sync(backend.exists, "a")
+        await backend.close()
+
+    asyncio.run(on_event_loop())
+    assert not backend._clients